@@ -0,0 +1,90 @@
+"""
+Startup benchmark — import cost and time to liveness / readiness.
+
+Each import is measured in a fresh interpreter. The server is started with
+uvicorn and polled until /api/health/live then /api/health/ready answer 200.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5] [--port 8765]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORTS = [
+    "pandas",
+    "plotly.express",
+    "pydantic_ai",
+    "src.agent.agent",
+    "src.main",
+]
+
+
+def time_import(module: str) -> float:
+    """Seconds needed to import a module in a fresh interpreter."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_for(url: str, deadline: float) -> float:
+    """Poll `url` until it answers 200 and return the time it happened."""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def time_startup(port: int, timeout: float = 120.0) -> tuple[float, float]:
+    """Seconds from process start to liveness and to readiness."""
+    base = f"http://127.0.0.1:{port}/api/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        live = wait_for(f"{base}/live", start + timeout)
+        ready = wait_for(f"{base}/ready", start + timeout)
+    finally:
+        server.terminate()
+        server.wait()
+    return live - start, ready - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'import':<24}{'median (ms)':>12}")
+    for module in IMPORTS:
+        samples = [time_import(module) for _ in range(args.runs)]
+        print(f"{module:<24}{statistics.median(samples) * 1000:>12.0f}")
+
+    startups = [time_startup(args.port) for _ in range(args.runs)]
+    print()
+    print(f"{'startup':<24}{'median (ms)':>12}")
+    print(f"{'liveness':<24}{statistics.median(s[0] for s in startups) * 1000:>12.0f}")
+    print(f"{'readiness':<24}{statistics.median(s[1] for s in startups) * 1000:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
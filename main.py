@@ -2,24 +2,33 @@
 Data Analysis Agent — CLI
 
 Interactive command-line interface for the data analysis agent.
-Load CSV files from data/, ask questions, and get SQL queries + visualizations.
+Datasets are loaded by the same DatasetService as the API, and answers are
+streamed with the same events as the WebSocket chat.
 
 Usage:
     python main.py
+    python main.py --batch questions.txt --concurrency 4 --output results.jsonl
 """
 
+import argparse
 import asyncio
 import json
-import re
+import statistics
 import sys
-from pathlib import Path
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, TextIO, Tuple
 
-import pandas as pd
 from dotenv import load_dotenv
-from typing import List
 
-from src.agent.agent import create_agent
-from src.agent.context import AgentContext
+from src.services.dataset_service import DatasetService
+from src.services.query_service import QueryService
+from src.services.result_handle_service import ResultHandleService
+from src.services.sample_service import SampleService
+from src.services.session_service import SessionService
+from src.services.session_table_service import SessionTableService
+from src.usecases.chat_usecase import ChatUseCase
+from src.usecases.infrastructure.event_collector import EventCollector
 
 load_dotenv()
 
@@ -36,124 +45,106 @@ RESET = "\033[0m"
 
 
 # ---------------------------------------------------------------------------
-# Dataset loading
+# Services
 # ---------------------------------------------------------------------------
-def load_datasets(data_dir: str = "data") -> tuple[dict[str, pd.DataFrame], str]:
-    """Load all CSV files from data_dir. Returns (datasets_dict, info_string)."""
-    data_path = Path(data_dir)
-    if not data_path.exists():
-        data_path.mkdir(parents=True, exist_ok=True)
-        return {}, "No datasets available."
-
-    datasets: dict[str, pd.DataFrame] = {}
-    info_lines: list[str] = []
-
-    for csv_file in sorted(data_path.glob("*.csv")):
-        # Sanitize name to be a valid SQL table name
-        name = re.sub(r"[^a-zA-Z0-9_]", "_", csv_file.stem).strip("_").lower()
-        df = pd.read_csv(csv_file)
-        datasets[name] = df
-
-        cols = ", ".join(df.columns.tolist())
-        info_lines.append(
-            f"- **{name}** ({df.shape[0]} rows, {df.shape[1]} columns)\n"
-            f"  Columns: {cols}"
-        )
-
-    if not info_lines:
-        return {}, "No datasets available. Add CSV files to the data/ directory."
-
-    return datasets, "\n".join(info_lines)
+def create_services(
+    data_dir: str = "data",
+) -> Tuple[DatasetService, SessionService, ChatUseCase]:
+    """Load the datasets and wire the services the way the API lifespan does."""
+    dataset_service = DatasetService(data_dir=data_dir)
+    dataset_service.load()
+    session_service = SessionService()
+    session_table_service = SessionTableService(dataset_service)
+    query_service = QueryService(dataset_service, session_tables=session_table_service)
+    result_handle_service = ResultHandleService(dataset_service, query_service)
+    session_service.add_delete_listener(result_handle_service.drop_session)
+    session_service.add_delete_listener(session_table_service.drop_session)
+    chat_usecase = ChatUseCase(
+        dataset_service,
+        session_service,
+        query_service,
+        result_handle_service,
+        session_table_service=session_table_service,
+        sample_service=SampleService(dataset_service),
+    )
+    return dataset_service, session_service, chat_usecase
 
 
 # ---------------------------------------------------------------------------
-# Thinking tag parser
+# Event display
 # ---------------------------------------------------------------------------
-def parse_thinking(text: str) -> tuple[str, str]:
-    """Extract <thinking> blocks and return (thinking_text, clean_text)."""
-    pattern = re.compile(r"<thinking>(.*?)</thinking>", re.DOTALL)
-    thinking_parts = pattern.findall(text)
-    thinking = "\n".join(t.strip() for t in thinking_parts)
-    clean_text = pattern.sub("", text).strip()
-    return thinking, clean_text
+class TerminalSink:
+    """Prints chat events (thinking, tool calls, answer tokens) as they arrive."""
+
+    def __init__(self) -> None:
+        self._section: Optional[str] = None
+
+    async def send_json(self, event: dict) -> None:
+        kind = event.get("type")
+        if kind == "thinking":
+            self._open("thinking", f"\n{CYAN}[Thinking]{RESET}")
+            for line in event["content"].split("\n"):
+                print(f"  {DIM}{line}{RESET}")
+        elif kind == "text":
+            self._open("text", f"\n{BOLD}Assistant:{RESET} ", end="")
+            print(event["content"], end="", flush=True)
+        elif kind == "tool_call":
+            self._open("tool", f"\n{YELLOW}[Tool: {event['name']}]{RESET}")
+            for key, value in event["args"].items():
+                _print_argument(key, str(value))
+        elif kind == "tool_result":
+            content = event["result"]
+            if len(content) > 400:
+                content = content[:400] + "..."
+            print(f"  {GREEN}> {content}{RESET}")
+        elif kind == "table":
+            print(f"  {DIM}[{event['name']}: {event['total_rows']} rows]{RESET}")
+        elif kind == "done":
+            self._section = None
+            print("\n")
+
+    def _open(self, section: str, header: str, end: str = "\n") -> None:
+        if self._section != section:
+            print(header, end=end, flush=True)
+            self._section = section
+
+
+def _print_argument(key: str, value: str) -> None:
+    if len(value) > 300:
+        value = value[:300] + "..."
+    # Indent multiline values (like SQL)
+    if "\n" in value:
+        print(f"  {BOLD}{key}{RESET}:")
+        for line in value.split("\n"):
+            print(f"    {line}")
+    else:
+        print(f"  {BOLD}{key}{RESET}: {value}")
 
 
 # ---------------------------------------------------------------------------
-# Message display
+# Interactive mode
 # ---------------------------------------------------------------------------
-def display_messages(messages) -> None:
-    """Display the agent's run trace: thinking, tool calls, tool results."""
-    from pydantic_ai.messages import (
-        ModelRequest,
-        ModelResponse,
-        TextPart,
-        ToolCallPart,
-        ToolReturnPart,
-    )
+async def interactive(data_dir: str) -> None:
+    dataset_service, session_service, chat_usecase = create_services(data_dir)
 
-    for msg in messages:
-        if isinstance(msg, ModelResponse):
-            for part in msg.parts:
-                if isinstance(part, TextPart) and part.content.strip():
-                    thinking, text = parse_thinking(part.content)
-                    if thinking:
-                        print(f"\n{CYAN}[Thinking]{RESET}")
-                        for line in thinking.split("\n"):
-                            print(f"  {DIM}{line}{RESET}")
-
-                elif isinstance(part, ToolCallPart):
-                    args = (
-                        part.args
-                        if isinstance(part.args, dict)
-                        else json.loads(part.args) if isinstance(part.args, str) else {}
-                    )
-                    print(f"\n{YELLOW}[Tool: {part.tool_name}]{RESET}")
-                    for key, value in args.items():
-                        val_str = str(value)
-                        if len(val_str) > 300:
-                            val_str = val_str[:300] + "..."
-                        # Indent multiline values (like SQL)
-                        if "\n" in val_str:
-                            print(f"  {BOLD}{key}{RESET}:")
-                            for vline in val_str.split("\n"):
-                                print(f"    {vline}")
-                        else:
-                            print(f"  {BOLD}{key}{RESET}: {val_str}")
-
-        elif isinstance(msg, ModelRequest):
-            for part in msg.parts:
-                if isinstance(part, ToolReturnPart):
-                    content = str(part.content)
-                    if len(content) > 400:
-                        content = content[:400] + "..."
-                    print(f"  {GREEN}> {content}{RESET}")
-
-
-# ---------------------------------------------------------------------------
-# Main loop
-# ---------------------------------------------------------------------------
-async def main() -> None:
-    datasets, dataset_info = load_datasets()
-
-    if not datasets:
-        print(f"{RED}No CSV files found in data/.{RESET}")
-        print("Add CSV files to the data/ directory and try again.")
+    if not dataset_service.datasets:
+        print(f"{RED}No datasets found in {data_dir}/.{RESET}")
+        print(f"Add CSV or Parquet files to the {data_dir}/ directory and try again.")
         sys.exit(1)
 
     print(f"\n{BOLD}Data Analysis Agent — CLI{RESET}")
     print("=" * 40)
     print("\nDatasets loaded:\n")
-    for name, df in datasets.items():
-        cols = ", ".join(df.columns.tolist())
+    for name, metadata in dataset_service.metadata.items():
+        cols = ", ".join(metadata.column_types)
         print(
-            f"  {BOLD}{name}{RESET}  {DIM}({df.shape[0]} rows, {df.shape[1]} columns){RESET}"
+            f"  {BOLD}{name}{RESET}  "
+            f"{DIM}({metadata.rows} rows, {len(metadata.column_types)} columns){RESET}"
         )
         print(f"  {DIM}Columns: {cols}{RESET}\n")
 
-    agent = create_agent(dataset_info)
-    context = AgentContext(datasets=datasets, dataset_info=dataset_info)
-    message_history: List[str] = []
-
+    session_id = session_service.create_session()
+    sink = TerminalSink()
     print("Ask questions about your data. Type 'quit' to exit.\n")
 
     while True:
@@ -170,34 +161,127 @@ async def main() -> None:
         if not question.strip():
             continue
 
-        print(f"\n{DIM}Processing...{RESET}")
-
         try:
-            result = await agent.run(
-                question,
-                deps=context,
-                message_history=message_history or None,
+            await chat_usecase.stream_agent_response(sink, session_id, question)
+        except Exception as e:
+            print(f"\n{RED}Error:{RESET} {e}\n")
+
+
+# ---------------------------------------------------------------------------
+# Batch mode
+# ---------------------------------------------------------------------------
+def read_questions(path: str) -> List[str]:
+    """One question per line; blank lines and `#` comments are skipped."""
+    with open(path, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+async def run_batch(
+    chat_usecase: ChatUseCase,
+    session_service: SessionService,
+    questions: List[str],
+    concurrency: int,
+    output: TextIO,
+) -> List[Dict]:
+    """Answer each question in its own session, at most `concurrency` at a time.
+
+    One JSON line per question is written to `output` as soon as it finishes.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(index: int, question: str) -> Dict:
+        async with semaphore:
+            session_id = session_service.create_session()
+            collector = EventCollector()
+            record: Dict = {
+                "index": index,
+                "question": question,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                await chat_usecase.stream_agent_response(
+                    collector, session_id, question
+                )
+                record.update(collector.summary(), error=None)
+            except Exception as e:
+                record.update(collector.summary(), error=str(e))
+            finally:
+                session_service.delete_session(session_id)
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+        status = f"{RED}failed{RESET}" if record["error"] else f"{GREEN}ok{RESET}"
+        print(
+            f"[{index + 1}/{len(questions)}] {status} "
+            f"{record['duration_ms']:.0f} ms  {question[:60]}",
+            file=sys.stderr,
+        )
+        return record
+
+    return await asyncio.gather(*(answer(i, q) for i, q in enumerate(questions)))
+
+
+async def batch(data_dir: str, path: str, concurrency: int, output_path: str) -> None:
+    questions = read_questions(path)
+    _, session_service, chat_usecase = create_services(data_dir)
+
+    started = time.perf_counter()
+    if output_path == "-":
+        records = await run_batch(
+            chat_usecase, session_service, questions, concurrency, sys.stdout
+        )
+    else:
+        with open(output_path, "w", encoding="utf-8") as output:
+            records = await run_batch(
+                chat_usecase, session_service, questions, concurrency, output
             )
+    elapsed = time.perf_counter() - started
+
+    failed = sum(1 for r in records if r["error"])
+    durations = [r["duration_ms"] for r in records] or [0.0]
+    print(
+        f"{len(records) - failed} answered, {failed} failed in {elapsed:.1f} s "
+        f"(median {statistics.median(durations):.0f} ms, "
+        f"max {max(durations):.0f} ms per question)",
+        file=sys.stderr,
+    )
 
-            # Display only the new messages from this run
-            all_msgs = result.all_messages()
-            new_msgs = all_msgs[len(message_history) :]
-            display_messages(new_msgs)
 
-            # Display final answer
-            thinking, answer = parse_thinking(result.output)
-            if thinking:
-                print(f"\n{CYAN}[Thinking]{RESET}")
-                for line in thinking.split("\n"):
-                    print(f"  {DIM}{line}{RESET}")
-            print(f"\n{BOLD}Assistant:{RESET} {answer}\n")
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Data Analysis Agent — CLI")
+    parser.add_argument("--data-dir", default="data", help="datasets directory")
+    parser.add_argument(
+        "--batch",
+        metavar="QUESTIONS_FILE",
+        help="answer the questions of this file (one per line) and exit",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="questions answered in parallel in batch mode (default: 4)",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="JSONL results file in batch mode (default: stdout)",
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
 
-            # Keep history for multi-turn conversation
-            message_history = all_msgs
 
-        except Exception as e:
-            print(f"\n{RED}Error:{RESET} {e}\n")
+def main() -> None:
+    args = parse_args()
+    if args.batch:
+        asyncio.run(batch(args.data_dir, args.batch, args.concurrency, args.output))
+    else:
+        asyncio.run(interactive(args.data_dir))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
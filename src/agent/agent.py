@@ -1,6 +1,6 @@
 import os
 
-from pydantic_ai import Agent
+from pydantic_ai import Agent, RunContext
 
 from src.agent.context import AgentContext
 from src.agent.prompt import get_system_prompt
@@ -8,9 +8,16 @@ from src.agent.tools.query_data import query_data
 from src.agent.tools.visualize import visualize
 
 
+DEFAULT_MODEL = "anthropic:claude-haiku-4-5-20251001"
+
+
+def get_model_name() -> str:
+    return os.getenv("MODEL", DEFAULT_MODEL)
+
+
 def create_agent(dataset_info: str) -> Agent[AgentContext]:
     """Create the data analysis agent with query and visualization tools."""
-    model = os.getenv("MODEL", "anthropic:claude-haiku-4-5-20251001")
+    model = get_model_name()
 
     agent: Agent[AgentContext] = Agent(
         model=model,
@@ -19,6 +26,14 @@ def create_agent(dataset_info: str) -> Agent[AgentContext]:
         retries=3,
     )
 
+    @agent.system_prompt(dynamic=True)
+    def saved_tables(ctx: RunContext[AgentContext]) -> str:
+        tables = ctx.deps.session_tables
+        listing = tables.describe(ctx.deps.session_id) if tables is not None else ""
+        if not listing:
+            return ""
+        return f"## Saved Tables (this session)\n\n{listing}"
+
     agent.tool(query_data)
     agent.tool(visualize)
 
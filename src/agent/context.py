@@ -1,13 +1,35 @@
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import pandas as pd
 
+from src.agent.figure_decimation import FigureBudget
+from src.agent.result_formatter import ResultBudget
+from src.agent.result_slots import ResultSlots
+from src.services.infrastructure.cancellation import Cancellation
+
+if TYPE_CHECKING:
+    from src.services.query_service import QueryService
+    from src.services.result_handle_service import ResultHandleService
+    from src.services.rollup_service import RollupService
+    from src.services.sample_service import SampleService
+    from src.services.session_table_service import SessionTableService
+
 
 @dataclass
 class AgentContext:
     """Context injected into all agent tools via PydanticAI dependency injection."""
 
-    datasets: dict[str, pd.DataFrame] = field(default_factory=dict)
+    datasets: Mapping[str, pd.DataFrame] = field(default_factory=dict)
     dataset_info: str = ""
-    current_dataframe: Optional[pd.DataFrame] = None
+    query_service: Optional["QueryService"] = None
+    session_id: Optional[str] = None
+    result_handles: Optional["ResultHandleService"] = None
+    session_tables: Optional["SessionTableService"] = None
+    samples: Optional["SampleService"] = None
+    rollups: Optional["RollupService"] = None
+    results: ResultSlots = field(default_factory=ResultSlots)
+    result_budget: ResultBudget = field(default_factory=ResultBudget)
+    figure_budget: FigureBudget = field(default_factory=FigureBudget.from_env)
+    cancellation: Cancellation = field(default_factory=Cancellation)
@@ -0,0 +1,183 @@
+import os
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Per-point attributes sliced along with x/y when a trace is downsampled.
+_POINT_ATTRIBUTES = ("x", "y", "text", "hovertext", "customdata", "ids")
+_MARKER_ATTRIBUTES = ("color", "size", "symbol", "opacity")
+# Scatter attributes without a WebGL counterpart that do not change the rendering.
+_SVG_ONLY_ATTRIBUTES = ("type", "orientation", "cliponaxis")
+
+
+@dataclass(frozen=True)
+class FigureBudget:
+    """Point limits applied to scatter/line traces before a figure is saved."""
+
+    max_points_per_trace: int = 5000
+    webgl_threshold: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "FigureBudget":
+        return cls(
+            max_points_per_trace=int(
+                os.getenv("FIGURE_MAX_POINTS", cls.max_points_per_trace)
+            ),
+            webgl_threshold=int(
+                os.getenv("FIGURE_WEBGL_THRESHOLD", cls.webgl_threshold)
+            ),
+        )
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previous pick and the
+    next bucket's average, which preserves peaks and the overall shape.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    picked = np.empty(threshold, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        picked[i + 1] = previous
+    return picked
+
+
+def bin_points(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Indices of one point per occupied cell of a grid of about `max_points` cells.
+
+    Dense regions are thinned while isolated points and outliers all survive,
+    so the visual density and extent of a scatter plot are preserved.
+    """
+    side = max(int(np.sqrt(max_points)), 1)
+    cells = _grid_cell(x, side) * side + _grid_cell(y, side)
+    _, first = np.unique(cells, return_index=True)
+    return np.sort(first)
+
+
+def decimate_figure(fig: Any, budget: FigureBudget) -> Tuple[Any, List[str]]:
+    """Downsample oversized scatter/line traces and switch large ones to WebGL.
+
+    Returns the figure to save and one note per changed trace. Animated
+    figures are returned unchanged since their frames share the traces.
+    """
+    if fig.frames:
+        return fig, []
+    import plotly.graph_objects as go
+
+    traces, notes = [], []
+    for position, trace in enumerate(fig.data):
+        if trace.type not in ("scatter", "scattergl"):
+            traces.append(trace)
+            continue
+        n = _point_count(trace)
+        changes = []
+        if n > budget.max_points_per_trace:
+            keep, method = _select_points(trace, n, budget.max_points_per_trace)
+            trace = _subset(trace, keep, n)
+            changes.append(f"{n} -> {len(keep)} points ({method})")
+            n = len(keep)
+        if trace.type == "scatter" and n > budget.webgl_threshold:
+            webgl = _to_webgl(go, trace)
+            if webgl is not None:
+                trace = webgl
+                changes.append("WebGL")
+        if changes:
+            label = f"'{trace.name}'" if trace.name else str(position)
+            notes.append(f"trace {label}: {', '.join(changes)}")
+        traces.append(trace)
+
+    if not notes:
+        return fig, []
+    return go.Figure(data=traces, layout=fig.layout), notes
+
+
+def _point_count(trace: Any) -> int:
+    values = trace.y if trace.y is not None else trace.x
+    return 0 if values is None else len(values)
+
+
+def _select_points(trace: Any, n: int, max_points: int) -> Tuple[np.ndarray, str]:
+    x = _numeric(trace.x, n)
+    y = _numeric(trace.y, n)
+    is_line = trace.mode is None or "lines" in trace.mode
+    if y is not None and np.isfinite(y).all():
+        if is_line:
+            positions = np.arange(n, dtype=float)
+            return lttb(x if x is not None else positions, y, max_points), "LTTB"
+        if x is not None and np.isfinite(x).all():
+            return bin_points(x, y, max_points), "binning"
+    return np.linspace(0, n - 1, max_points).astype(int), "stride"
+
+
+def _numeric(values: Optional[Any], n: int) -> Optional[np.ndarray]:
+    """Values as floats (datetimes as epoch nanoseconds), or None for categories."""
+    if values is None or len(values) != n:
+        return None
+    series = pd.Series(np.asarray(values))
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=float, na_value=np.nan)
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        try:
+            series = pd.to_datetime(series, format="ISO8601")
+        except (ValueError, TypeError):
+            return None
+    return series.astype("int64").to_numpy(dtype=float)
+
+
+def _grid_cell(values: np.ndarray, side: int) -> np.ndarray:
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.zeros(len(values), dtype=np.int64)
+    scaled = (values - low) / (high - low) * side
+    return np.minimum(scaled.astype(np.int64), side - 1)
+
+
+def _subset(trace: Any, keep: np.ndarray, n: int) -> Any:
+    props = trace.to_plotly_json()
+    for attribute in _POINT_ATTRIBUTES:
+        props[attribute] = _take(props.get(attribute), keep, n)
+    marker = props.get("marker")
+    if isinstance(marker, dict):
+        for attribute in _MARKER_ATTRIBUTES:
+            marker[attribute] = _take(marker.get(attribute), keep, n)
+    props = {key: value for key, value in props.items() if value is not None}
+    if isinstance(marker, dict):
+        props["marker"] = {k: v for k, v in marker.items() if v is not None}
+    return type(trace)(props)
+
+
+def _take(values: Any, keep: np.ndarray, n: int) -> Any:
+    if values is None or isinstance(values, (str, bytes, int, float)):
+        return values
+    array = np.asarray(values, dtype=object if isinstance(values, list) else None)
+    if array.ndim == 0 or len(array) != n:
+        return values
+    return array[keep]
+
+
+def _to_webgl(go: Any, trace: Any) -> Optional[Any]:
+    """The Scattergl equivalent of a scatter trace, or None when unsupported."""
+    props = trace.to_plotly_json()
+    for attribute in _SVG_ONLY_ATTRIBUTES:
+        props.pop(attribute, None)
+    try:
+        return go.Scattergl(props)
+    except ValueError:
+        return None
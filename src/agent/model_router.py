@@ -0,0 +1,251 @@
+import re
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Deque, Dict, List, Mapping, Optional, Union
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    RetryPromptPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.models import Model, infer_model
+from pydantic_ai.models.wrapper import WrapperModel
+
+FAST_TIER = "fast"
+STRONG_TIER = "strong"
+
+# Words hinting at multi-step analysis rather than a lookup or a count.
+_ANALYSIS_WORDS = {
+    "churn",
+    "cohort",
+    "compare",
+    "comparison",
+    "correlation",
+    "correlate",
+    "forecast",
+    "predict",
+    "retention",
+    "segment",
+    "segmentation",
+    "trend",
+    "versus",
+    "vs",
+    "why",
+}
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+
+
+@dataclass
+class RoutingDecision:
+    tier: str
+    model_name: str
+    reasons: List[str]
+    escalation: Optional[str] = None
+
+    @property
+    def final_tier(self) -> str:
+        return STRONG_TIER if self.escalation else self.tier
+
+
+@dataclass
+class TierStats:
+    runs: int = 0
+    escalations: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.runs if self.runs else 0.0
+
+
+class EscalatingModel(WrapperModel):
+    """Model of the routed tier that switches to the strong model for the rest
+    of the run as soon as a tool call of the run fails or is retried."""
+
+    def __init__(self, model: Model, strong: Model, decision: RoutingDecision):
+        super().__init__(model)
+        self._strong = strong
+        self.decision = decision
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        self._select(messages)
+        return await super().request(messages, model_settings, model_request_parameters)
+
+    @asynccontextmanager
+    async def request_stream(
+        self, messages, model_settings, model_request_parameters, run_context=None
+    ) -> AsyncIterator[Any]:
+        self._select(messages)
+        async with super().request_stream(
+            messages, model_settings, model_request_parameters, run_context
+        ) as response_stream:
+            yield response_stream
+
+    def _select(self, messages: List[ModelMessage]) -> None:
+        if self.wrapped is self._strong:
+            return
+        error = _last_tool_error(messages)
+        if error is not None:
+            self.wrapped = self._strong
+            self.decision.escalation = error
+
+
+class ModelRouter:
+    """Picks a model tier per question and records how each tier performs.
+
+    Questions go to the fast model unless heuristics on the wording and on
+    the catalog (datasets and columns it mentions, their size) point to a
+    multi-step analysis. A run on the fast model escalates to the strong one
+    at its first failed tool call.
+    """
+
+    def __init__(
+        self,
+        fast_model: Union[Model, str],
+        strong_model: Union[Model, str],
+        large_dataset_rows: int = 1_000_000,
+        max_recent: int = 100,
+    ) -> None:
+        self._model_specs = {FAST_TIER: fast_model, STRONG_TIER: strong_model}
+        self._models: Dict[str, Model] = {}
+        self._large_dataset_rows = large_dataset_rows
+        self._stats: Dict[str, TierStats] = {}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=max_recent)
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """Identifies the routing configuration (answer cache keys)."""
+        return "routed:" + ",".join(
+            self._spec_name(tier) for tier in (FAST_TIER, STRONG_TIER)
+        )
+
+    def route(
+        self, question: str, catalog: Mapping[str, Any], history_turns: int = 0
+    ) -> RoutingDecision:
+        """Choose the tier for a question; `catalog` maps dataset names to metadata."""
+        words = _WORD_RE.findall(question.lower())
+        reasons: List[str] = []
+        score = 0
+
+        analysis = sorted(_ANALYSIS_WORDS.intersection(words))
+        if analysis:
+            score += 2
+            reasons.append(f"analysis wording: {', '.join(analysis)}")
+        if len(words) > 40:
+            score += 1
+            reasons.append(f"long question ({len(words)} words)")
+
+        mentioned = _mentioned_datasets(set(words), catalog)
+        if len(mentioned) >= 2:
+            score += 2
+            reasons.append(f"spans {len(mentioned)} datasets: {', '.join(mentioned)}")
+        large = [
+            name
+            for name in mentioned
+            if getattr(catalog[name], "rows", 0) >= self._large_dataset_rows
+        ]
+        if large:
+            score += 1
+            reasons.append(f"large dataset: {', '.join(large)}")
+        if history_turns >= 10:
+            score += 1
+            reasons.append(f"long conversation ({history_turns} messages)")
+
+        tier = STRONG_TIER if score >= 2 else FAST_TIER
+        if not reasons:
+            reasons.append("simple question")
+        return RoutingDecision(
+            tier=tier, model_name=self._spec_name(tier), reasons=reasons
+        )
+
+    def model_for(self, decision: RoutingDecision) -> Model:
+        """The model to run a decision with, escalating from the fast tier."""
+        model = self._model(decision.tier)
+        if decision.tier == STRONG_TIER:
+            return model
+        return EscalatingModel(model, self._model(STRONG_TIER), decision)
+
+    def record(
+        self,
+        decision: RoutingDecision,
+        latency_ms: float,
+        error: Optional[str] = None,
+        question: str = "",
+    ) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(decision.tier, TierStats())
+            stats.runs += 1
+            stats.escalations += decision.escalation is not None
+            stats.errors += error is not None
+            stats.total_ms += latency_ms
+            stats.max_ms = max(stats.max_ms, latency_ms)
+            self._recent.append(
+                {
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "question": question[:120],
+                    **asdict(decision),
+                    "final_tier": decision.final_tier,
+                    "latency_ms": round(latency_ms, 1),
+                    "error": error,
+                }
+            )
+
+    def stats(self) -> Dict[str, TierStats]:
+        with self._lock:
+            return {tier: TierStats(**asdict(s)) for tier, s in self._stats.items()}
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._recent)[-limit:][::-1]
+
+    def _model(self, tier: str) -> Model:
+        with self._lock:
+            if tier not in self._models:
+                self._models[tier] = infer_model(self._model_specs[tier])
+            return self._models[tier]
+
+    def _spec_name(self, tier: str) -> str:
+        spec = self._model_specs[tier]
+        return spec if isinstance(spec, str) else spec.model_name
+
+
+def _mentioned_datasets(words: set, catalog: Mapping[str, Any]) -> List[str]:
+    """Datasets named in the question, directly or through a column only they have."""
+    owners: Dict[str, set] = {}
+    for name, metadata in catalog.items():
+        for column in getattr(metadata, "column_types", {}):
+            owners.setdefault(column.lower(), set()).add(name)
+    mentioned = {name for name in catalog if name.lower() in words}
+    for word in words:
+        if len(owners.get(word, ())) == 1:
+            mentioned |= owners[word]
+    return sorted(mentioned)
+
+
+def _last_tool_error(messages: List[ModelMessage]) -> Optional[str]:
+    """The first tool failure since the question of the current run, if any."""
+    run_start = 0
+    for i, message in enumerate(messages):
+        if isinstance(message, ModelRequest) and any(
+            isinstance(part, UserPromptPart) for part in message.parts
+        ):
+            run_start = i
+    for message in messages[run_start:]:
+        if not isinstance(message, ModelRequest):
+            continue
+        for part in message.parts:
+            if isinstance(part, RetryPromptPart):
+                return f"retry requested by {part.tool_name or 'output validation'}"
+            if isinstance(part, ToolReturnPart) and str(part.content).startswith(
+                "Error"
+            ):
+                return f"{part.tool_name} failed: {str(part.content)[:120]}"
+    return None
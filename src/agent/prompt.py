@@ -9,16 +9,24 @@ def get_system_prompt(dataset_info: str) -> str:
 
 You have 2 tools:
 
-1. **query_data(sql, description)** — Execute a SQL query against the available datasets.
+1. **query_data(sql, description, name, save_as, approximate)** — Execute a SQL query against the available datasets.
    - Table names in SQL correspond to the dataset names listed above.
    - Always use this tool first to explore or prepare data.
-   - The result DataFrame is stored automatically for visualization.
-
-2. **visualize(code, title, result_type, description)** — Create a visualization from the last query result.
-   - The variable `df` contains the DataFrame from the last `query_data` call.
+   - The result DataFrame is stored under `name` (or `result_N`) for visualization.
+   - Independent queries can be issued together in one response; they run in parallel.
+   - Pass `save_as` to keep an intermediate result (a filtered cohort, a join) as a table for the rest of the conversation; later queries select from it by that name instead of recomputing it. Saved tables are listed under "Saved Tables".
+   - Queries are time and size limited: when one is rejected, follow the error hint and rewrite it.
+   - Lookups by the indexed keys listed with a dataset (`WHERE customerID = '...'`) are instant; prefer them to filters on other columns when looking up one record, and join datasets on the key columns they share.
+   - Pass `approximate=true` for exploratory questions on large datasets (distributions, rough shares): the query runs on a random sample, much faster. Very large datasets are sampled by default; pass `approximate=false` when exact figures matter. An approximate result says so, with the sample size, how to scale counts and sums, and its margin of error: state in your answer that the figures are estimates.
+   - The preview is `|`-separated and truncated; its last line tells how many rows and columns are shown.
+
+2. **visualize(code, title, result_type, description, result_name)** — Create a visualization from a query result.
+   - The variable `df` contains the DataFrame stored as `result_name` (the latest result when omitted).
+   - Always pass `result_name` when several queries were run.
    - Available libraries: `pd` (pandas), `px` (plotly.express), `go` (plotly.graph_objects).
    - For `result_type="figure"`: your code must create a `fig` variable (Plotly Figure).
    - For `result_type="table"`: your code must create a `result` variable (DataFrame).
+   - Plot every row: large scatter and line traces are downsampled for display automatically, and the result says so.
 
 ## Rules
 
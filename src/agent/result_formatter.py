@@ -0,0 +1,68 @@
+import math
+from dataclasses import dataclass
+from typing import List
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ResultBudget:
+    """Upper bounds for a DataFrame rendered into a tool result."""
+
+    max_tokens: int = 400
+    max_rows: int = 10
+    max_columns: int = 16
+    max_cell_chars: int = 32
+    delimiter: str = "|"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def format_result(df: pd.DataFrame, budget: ResultBudget = ResultBudget()) -> str:
+    """Render a DataFrame as delimiter-separated lines that fit the budget.
+
+    Columns past `max_columns` are only named in the footer, long cells are
+    truncated and rows stop at `max_rows` or when the token budget is spent.
+    The footer always tells how much of the result is shown.
+    """
+    columns = df.columns[: budget.max_columns]
+    hidden_columns = len(df.columns) - len(columns)
+
+    lines = [budget.delimiter.join(_cell(c, budget) for c in columns)]
+    tokens = estimate_tokens(lines[0])
+    shown_rows = 0
+    shown = df.iloc[: budget.max_rows, : budget.max_columns]
+    for row in shown.itertuples(index=False):
+        line = budget.delimiter.join(_cell(value, budget) for value in row)
+        tokens += estimate_tokens(line)
+        if tokens > budget.max_tokens:
+            break
+        lines.append(line)
+        shown_rows += 1
+
+    footer: List[str] = [f"{shown_rows} of {len(df)} rows shown"]
+    if hidden_columns:
+        hidden = df.columns[len(columns) :]
+        names = [_cell(c, budget) for c in hidden[: budget.max_columns]]
+        if len(hidden) > budget.max_columns:
+            names.append("…")
+        footer.append(f"{hidden_columns} more columns: {', '.join(names)}")
+    lines.append(f"[{'; '.join(footer)}]")
+    return "\n".join(lines)
+
+
+def _cell(value: object, budget: ResultBudget) -> str:
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return ""
+    if isinstance(value, float):
+        # Shortest exact form: totals keep every digit, only ".0" is dropped.
+        text = repr(float(value)).removesuffix(".0")
+    else:
+        text = str(value)
+    text = text.replace("\n", " ").replace(budget.delimiter, "/")
+    if len(text) > budget.max_cell_chars:
+        text = text[: budget.max_cell_chars - 1] + "…"
+    return text
@@ -0,0 +1,104 @@
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from src.services.result_handle_service import ResultHandle
+
+_SLOT_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,63}$")
+
+
+@dataclass
+class ResultSlot:
+    name: str
+    sql: str
+    dataframe: pd.DataFrame
+    handle: Optional["ResultHandle"] = None
+
+
+class ResultSlots:
+    """Named query results of one agent run.
+
+    `query_data` reserves its slot before running, so a `visualize` call from
+    the same model response can wait for it while other tool calls run
+    concurrently.
+    """
+
+    def __init__(self) -> None:
+        self._slots: Dict[str, ResultSlot] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._by_tool_call: Dict[str, str] = {}
+        self._reserved = 0
+
+    def reserve(
+        self, name: Optional[str] = None, tool_call_id: Optional[str] = None
+    ) -> str:
+        """Claim a slot name (generated when missing) for a query about to run."""
+        self._reserved += 1
+        name = name or f"result_{self._reserved}"
+        if not _SLOT_NAME_RE.match(name):
+            raise ValueError(
+                f"Invalid result name '{name}', use letters, digits and underscores"
+            )
+        if name in self._pending and not self._pending[name].done():
+            raise ValueError(f"Result '{name}' is already being computed")
+        self._pending[name] = asyncio.get_running_loop().create_future()
+        if tool_call_id:
+            self._by_tool_call[tool_call_id] = name
+        return name
+
+    def store(self, slot: ResultSlot) -> None:
+        self._slots.pop(slot.name, None)
+        self._slots[slot.name] = slot
+        self._resolve(slot.name)
+
+    def release(self, name: str) -> None:
+        """End a reservation, after its query stored its result or failed.
+
+        When nothing was stored, an earlier result under the same name is
+        dropped: it must not be mistaken for the one that failed.
+        """
+        pending = self._pending.get(name)
+        if pending is not None and not pending.done():
+            self._slots.pop(name, None)
+        self._resolve(name)
+
+    async def get(self, name: Optional[str] = None) -> Optional[ResultSlot]:
+        """Return a slot by name, waiting for it if its query is still running.
+
+        Without a name, the most recently stored slot is returned once every
+        running query is done.
+        """
+        if name is None:
+            running = [p for p in self._pending.values() if not p.done()]
+            if running:
+                await asyncio.wait(running)
+            return self.latest
+        pending = self._pending.get(name)
+        if pending is not None:
+            await asyncio.shield(pending)
+        return self._slots.get(name)
+
+    def for_tool_call(self, tool_call_id: str) -> Optional[ResultSlot]:
+        name = self._by_tool_call.get(tool_call_id)
+        return self._slots.get(name) if name else None
+
+    @property
+    def latest(self) -> Optional[ResultSlot]:
+        return next(reversed(self._slots.values()), None)
+
+    @property
+    def slots(self) -> List[ResultSlot]:
+        return list(self._slots.values())
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._slots)
+
+    def _resolve(self, name: str) -> None:
+        pending = self._pending.get(name)
+        if pending is not None and not pending.done():
+            pending.set_result(None)
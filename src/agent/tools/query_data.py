@@ -1,13 +1,25 @@
+import asyncio
+from collections.abc import Mapping
+from typing import Optional
+
 import duckdb
+import pandas as pd
 from pydantic_ai import RunContext
 
 from src.agent.context import AgentContext
+from src.agent.result_formatter import format_result
+from src.agent.result_slots import ResultSlot
+from src.exceptions.session.session_table_exception import SessionTableException
+from src.services.sample_service import describe_approximation
 
 
 async def query_data(
     ctx: RunContext[AgentContext],
     sql: str,
     description: str,
+    name: Optional[str] = None,
+    save_as: Optional[str] = None,
+    approximate: Optional[bool] = None,
 ) -> str:
     """Execute a SQL query against the loaded datasets.
 
@@ -15,26 +27,98 @@ async def query_data(
         ctx: Injected context with loaded datasets.
         sql: SQL query to execute. Table names correspond to dataset names.
         description: Short description of what this query does.
+        name: Optional name to store the result under (letters, digits, underscores),
+              to pass to `visualize`. Defaults to `result_N`.
+        save_as: Optional table name to save the result under for the rest of the
+                 session, so later queries can select from it instead of recomputing.
+        approximate: True to run on random samples of the large datasets (fast,
+                     approximate), False to force an exact run. By default very
+                     large datasets are sampled.
     """
     if not ctx.deps.datasets:
         return "Error: No datasets loaded."
 
     try:
-        with duckdb.connect(database=":memory:") as conn:
-            for name, df in ctx.deps.datasets.items():
-                conn.register(name, df)
-            result_df = conn.execute(sql).fetchdf()
+        name = ctx.deps.results.reserve(name, ctx.tool_call_id)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    try:
+        rewritten, samples = None, []
+        if ctx.deps.query_service is not None:
+            # An exact answer from a rollup beats an approximate one.
+            if ctx.deps.rollups is not None and approximate is not True:
+                rewritten = await asyncio.to_thread(ctx.deps.rollups.rewrite, sql)
+            if ctx.deps.samples is not None and rewritten is None:
+                samples = await asyncio.to_thread(
+                    ctx.deps.samples.plan, sql, approximate
+                )
+        if ctx.deps.query_service is not None:
+            result_df = await asyncio.to_thread(
+                ctx.deps.query_service.execute,
+                sql,
+                ctx.deps.session_id,
+                ctx.deps.cancellation,
+                bool(samples),
+                rewritten,
+            )
+        else:
+            result_df = await asyncio.to_thread(
+                _execute_locally, ctx.deps.datasets, sql
+            )
 
-        ctx.deps.current_dataframe = result_df
+        handle = None
+        # Handles re-run their SQL when read again, which would not be sampled.
+        if ctx.deps.result_handles is not None and ctx.deps.session_id and not samples:
+            handle = await asyncio.to_thread(
+                ctx.deps.result_handles.register, ctx.deps.session_id, sql, result_df
+            )
+        ctx.deps.results.store(
+            ResultSlot(name=name, sql=sql, dataframe=result_df, handle=handle)
+        )
+
+        saved = ""
+        if save_as and samples:
+            saved = "Not saved: approximate results are not saved as tables.\n"
+        elif save_as:
+            saved = await _save_table(ctx, save_as, sql, result_df)
 
-        preview = result_df.head(5).to_string(index=False)
+        preview = format_result(result_df, ctx.deps.result_budget)
         summary = (
             f"Query executed successfully.\n"
+            f"Stored as: {name}\n"
+            f"{saved}"
             f"Result: {result_df.shape[0]} rows x {result_df.shape[1]} columns\n"
-            f"Columns: {', '.join(result_df.columns.tolist())}\n"
             f"Preview:\n{preview}"
         )
+        if samples:
+            summary += "\n" + describe_approximation(samples)
         return summary
 
     except Exception as e:
         return f"Error executing SQL query: {e}"
+    finally:
+        ctx.deps.results.release(name)
+
+
+async def _save_table(
+    ctx: RunContext[AgentContext], save_as: str, sql: str, result_df: pd.DataFrame
+) -> str:
+    """Save the result as a session table and describe the outcome."""
+    if ctx.deps.session_tables is None or not ctx.deps.session_id:
+        return "Not saved: saved tables are not available here.\n"
+    try:
+        table = await asyncio.to_thread(
+            ctx.deps.session_tables.save, ctx.deps.session_id, save_as, sql, result_df
+        )
+    except SessionTableException as e:
+        return f"Not saved: {e}\n"
+    return f"Saved as table: {table.name}\n"
+
+
+def _execute_locally(datasets: Mapping[str, pd.DataFrame], sql: str) -> pd.DataFrame:
+    """Run a query on a throwaway connection over in-memory DataFrames."""
+    with duckdb.connect(database=":memory:") as conn:
+        for name, df in datasets.items():
+            conn.register(name, df)
+        return conn.execute(sql).fetchdf()
@@ -1,13 +1,26 @@
+import asyncio
+import importlib
 import os
 import re
-from typing import Literal
+from typing import Literal, Optional
 
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from pydantic_ai import RunContext
 
 from src.agent.context import AgentContext
+from src.agent.figure_decimation import FigureBudget, decimate_figure
+from src.agent.result_formatter import ResultBudget, format_result
+from src.services.infrastructure.artifact_storage import ensure_plotly_js, precompress
+from src.services.infrastructure.cancellation import Cancellation
+
+# plotly is imported on first use (or by `warm_up`), not when the agent module loads.
+_PLOTLY_MODULES = ("plotly.express", "plotly.graph_objects")
+
+
+def warm_up() -> None:
+    """Import plotly ahead of the first visualization, off the request path."""
+    for module in _PLOTLY_MODULES:
+        importlib.import_module(module)
 
 
 async def visualize(
@@ -16,11 +29,12 @@ async def visualize(
     title: str,
     result_type: Literal["figure", "table"],
     description: str,
+    result_name: Optional[str] = None,
 ) -> str:
-    """Create a visualization from the last query result.
+    """Create a visualization from a stored query result.
 
     Args:
-        ctx: Injected context with current DataFrame.
+        ctx: Injected context with the stored query results.
         code: Python code to create the visualization.
               Use `df` for the data, `px` for plotly.express,
               `go` for plotly.graph_objects, `pd` for pandas.
@@ -28,13 +42,48 @@ async def visualize(
         title: Title of the visualization.
         result_type: Either "figure" (Plotly chart) or "table" (formatted DataFrame).
         description: Description of what this visualization shows.
+        result_name: Name of the `query_data` result to use as `df`.
+                     Defaults to the latest result.
     """
-    if ctx.deps.current_dataframe is None:
+    slot = await ctx.deps.results.get(result_name)
+    if slot is None:
+        if result_name and ctx.deps.results.names:
+            return (
+                f"Error: No result named '{result_name}'. "
+                f"Available: {', '.join(ctx.deps.results.names)}."
+            )
         return "Error: No data available. Call query_data first."
 
-    df = ctx.deps.current_dataframe
+    return await asyncio.to_thread(
+        _render,
+        slot.dataframe,
+        code,
+        title,
+        result_type,
+        ctx.deps.result_budget,
+        ctx.deps.figure_budget,
+        ctx.deps.cancellation,
+    )
+
 
+def _render(
+    df: pd.DataFrame,
+    code: str,
+    title: str,
+    result_type: str,
+    budget: ResultBudget,
+    figure_budget: FigureBudget = FigureBudget(),
+    cancellation: Optional[Cancellation] = None,
+) -> str:
+    """Run the visualization code and save its output, off the event loop.
+
+    A thread can't be interrupted, so a cancelled run stops at the next step
+    instead (before running the code, before writing the output).
+    """
+    cancellation = cancellation or Cancellation()
     try:
+        cancellation.raise_if_cancelled()
+        px, go = (importlib.import_module(module) for module in _PLOTLY_MODULES)
         namespace = {
             "df": df.copy(),
             "pd": pd,
@@ -42,6 +91,7 @@ async def visualize(
             "go": go,
         }
         exec(code, namespace)
+        cancellation.raise_if_cancelled()
 
         safe_title = re.sub(r"[^\w\s-]", "", title).strip().replace(" ", "_").lower()
         os.makedirs("output", exist_ok=True)
@@ -51,27 +101,38 @@ async def visualize(
             if fig is None:
                 return "Error: Code must create a 'fig' variable (plotly Figure)."
 
+            fig, reductions = decimate_figure(fig, figure_budget)
+            cancellation.raise_if_cancelled()
             filepath = f"output/{safe_title}.html"
-            fig.write_html(filepath)
+            fig.write_html(filepath, include_plotlyjs=ensure_plotly_js("output"))
+            precompress(filepath)
 
-            return (
+            summary = (
                 f"Figure created: {title}\n"
                 f"Saved to: {filepath}\n"
                 f"Type: {type(fig).__name__}\n"
                 f"Traces: {len(fig.data)}"
             )
+            if reductions:
+                summary += (
+                    "\nReduced for display (the shape is preserved, the stored "
+                    "result is complete):\n- " + "\n- ".join(reductions)
+                )
+            return summary
 
         elif result_type == "table":
             result = namespace.get("result", df)
+            cancellation.raise_if_cancelled()
 
             filepath = f"output/{safe_title}.csv"
             result.to_csv(filepath, index=False)
+            precompress(filepath)
 
             return (
                 f"Table created: {title}\n"
                 f"Saved to: {filepath}\n"
                 f"Shape: {result.shape[0]} rows x {result.shape[1]} columns\n"
-                f"Preview:\n{result.head(10).to_string(index=False)}"
+                f"Preview:\n{format_result(result, budget)}"
             )
 
         else:
@@ -0,0 +1,3 @@
+class BatchNotFoundException(Exception):
+    def __init__(self, job_id: str, message: str = "Batch not found") -> None:
+        super().__init__(f"{message}, job_id provided: {job_id}")
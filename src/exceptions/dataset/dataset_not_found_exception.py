@@ -0,0 +1,3 @@
+class DatasetNotFoundException(Exception):
+    def __init__(self, name: str, message: str = "Dataset not found") -> None:
+        super().__init__(f"{message}, dataset name provided: {name}")
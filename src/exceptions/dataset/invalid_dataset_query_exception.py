@@ -0,0 +1,3 @@
+class InvalidDatasetQueryException(Exception):
+    def __init__(self, detail: str, message: str = "Invalid dataset query") -> None:
+        super().__init__(f"{message}: {detail}")
@@ -0,0 +1,3 @@
+class InvalidQueryException(Exception):
+    def __init__(self, detail: str, message: str = "Invalid query") -> None:
+        super().__init__(f"{message}: {detail}")
@@ -0,0 +1,6 @@
+from src.exceptions.query.invalid_query_exception import InvalidQueryException
+
+
+class QueryLimitExceededException(InvalidQueryException):
+    def __init__(self, detail: str, message: str = "Query rejected") -> None:
+        super().__init__(detail, message)
@@ -0,0 +1,5 @@
+class ResultHandleNotFoundException(Exception):
+    def __init__(
+        self, handle_id: str, message: str = "Result handle not found"
+    ) -> None:
+        super().__init__(f"{message}, handle_id provided: {handle_id}")
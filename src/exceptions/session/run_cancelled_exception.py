@@ -0,0 +1,3 @@
+class RunCancelledException(Exception):
+    def __init__(self, detail: str, message: str = "Run cancelled") -> None:
+        super().__init__(f"{message}: {detail}")
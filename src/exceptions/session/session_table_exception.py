@@ -0,0 +1,3 @@
+class SessionTableException(Exception):
+    def __init__(self, detail: str, message: str = "Cannot save session table") -> None:
+        super().__init__(f"{message}: {detail}")
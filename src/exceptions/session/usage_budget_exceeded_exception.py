@@ -0,0 +1,3 @@
+class UsageBudgetExceededException(Exception):
+    def __init__(self, detail: str, message: str = "Usage budget exceeded") -> None:
+        super().__init__(f"{message}: {detail}")
@@ -1,33 +1,177 @@
 # flake8: noqa: E402
 # chut down flake to have the load_dotenv at the beginning of the code, if not pre-commit will scream here.
+import asyncio
+import logging
 import os
+from concurrent.futures import Future
 from dotenv import load_dotenv
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
 load_dotenv()
 
+from src.agent.agent import get_model_name
+from src.agent.model_router import ModelRouter
+from src.agent.tools.visualize import warm_up
+from src.services.answer_cache_service import AnswerCacheService
+from src.services.batch_service import BatchService
+from src.services.connection_monitor import ConnectionMonitor
 from src.services.dataset_service import DatasetService
+from src.services.query_log_service import QueryLogService
+from src.services.rollup_service import RollupService
+from src.services.query_service import QueryService
+from src.services.result_handle_service import ResultHandleService
+from src.services.sample_service import SampleService
 from src.services.session_service import SessionService
+from src.services.session_table_service import SessionTableService
+from src.services.usage_service import UsageService
+from src.usecases.chat_usecase import ChatUseCase
 from src.routes.session_routes import router as sessions_router
 from src.routes.dataset_routes import router as dataset_router
+from src.routes.query_routes import router as query_router
+from src.routes.health_routes import router as health_router
+from src.routes.admin_routes import router as admin_router
+from src.routes.batch_routes import router as batch_router
+from src.routes.artifact_files import ArtifactFiles
+
+logger = logging.getLogger(__name__)
+
+
+async def _finish_startup(loading: Future, sample_service: SampleService) -> None:
+    """Pre-import plotly while datasets load, log a failed load, then draw
+    the samples of the large datasets."""
+    await asyncio.to_thread(warm_up)
+    try:
+        await asyncio.wrap_future(loading)
+    except Exception:
+        logger.exception("Dataset loading failed")
+        return
+    try:
+        await asyncio.to_thread(sample_service.refresh)
+    except Exception:
+        logger.exception("Sampling the datasets failed")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """load datasets and session singleton and ensure output exist"""
+    """create singletons, start loading datasets in the background and ensure output exist"""
     dataset_service = DatasetService(data_dir="data")
-    dataset_service.load()
+    loading = dataset_service.load_in_background()
+    sample_service = SampleService(
+        dataset_service,
+        sample_rows=int(os.getenv("APPROXIMATE_SAMPLE_ROWS", "100000")),
+        auto_rows=int(os.getenv("APPROXIMATE_AUTO_ROWS", "0")) or None,
+    )
+    app.state.sample_service = sample_service
+    app.state.startup_task = asyncio.create_task(
+        _finish_startup(loading, sample_service)
+    )
 
     app.state.dataset_service = dataset_service
-    app.state.session_service = SessionService()
+    session_service = SessionService()
+    query_log_service = QueryLogService(
+        path=os.getenv("QUERY_LOG_PATH", "logs/query_log.jsonl"),
+        slow_query_ms=float(os.getenv("SLOW_QUERY_MS", "1000")),
+    )
+    session_table_service = SessionTableService(
+        dataset_service,
+        max_tables_per_session=int(os.getenv("SESSION_MAX_TABLES", "20")),
+        max_bytes_per_session=int(os.getenv("SESSION_MAX_TABLE_MB", "256")) * 2**20,
+    )
+    query_service = QueryService(
+        dataset_service,
+        timeout_seconds=float(os.getenv("QUERY_TIMEOUT_SECONDS", "30")),
+        max_estimated_rows=int(os.getenv("QUERY_MAX_ESTIMATED_ROWS", "50000000")),
+        memory_limit=os.getenv("QUERY_MEMORY_LIMIT") or None,
+        threads=int(os.getenv("QUERY_THREADS", "0")) or None,
+        query_log=query_log_service,
+        session_tables=session_table_service,
+    )
+    result_handle_service = ResultHandleService(
+        dataset_service,
+        query_service,
+        max_bytes_total=int(os.getenv("RESULTS_MAX_TOTAL_MB", "1024")) * 2**20,
+    )
+    session_service.add_delete_listener(result_handle_service.drop_session)
+    session_service.add_delete_listener(session_table_service.drop_session)
+    usage_service = UsageService(
+        max_tokens_per_session=int(os.getenv("SESSION_MAX_TOKENS", "0")) or None,
+        max_requests_per_session=int(os.getenv("SESSION_MAX_REQUESTS", "0")) or None,
+    )
+    session_service.add_delete_listener(usage_service.drop_session)
+
+    max_rollups = int(os.getenv("ROLLUP_MAX_TABLES", "8"))
+    rollup_service = (
+        RollupService(
+            dataset_service,
+            query_log_service,
+            max_rollups=max_rollups,
+            min_queries=int(os.getenv("ROLLUP_MIN_QUERIES", "3")),
+            min_rows=int(os.getenv("ROLLUP_MIN_ROWS", "100000")),
+            interval_seconds=float(os.getenv("ROLLUP_ADVISOR_INTERVAL_SECONDS", "60")),
+        )
+        if max_rollups > 0
+        else None
+    )
+    if rollup_service is not None:
+        rollup_service.start()
+
+    app.state.session_service = session_service
+    app.state.rollup_service = rollup_service
+    app.state.query_service = query_service
+    app.state.query_log_service = query_log_service
+    app.state.result_handle_service = result_handle_service
+    app.state.session_table_service = session_table_service
+    app.state.usage_service = usage_service
+    app.state.connection_monitor = ConnectionMonitor(
+        max_queued_events=int(os.getenv("WS_SEND_QUEUE_SIZE", "256")),
+        stall_timeout_seconds=float(os.getenv("WS_STALL_TIMEOUT_SECONDS", "10")),
+    )
+    app.state.answer_cache_service = (
+        AnswerCacheService()
+        if os.getenv("ANSWER_CACHE", "false").lower() == "true"
+        else None
+    )
+    app.state.model_router = (
+        ModelRouter(
+            fast_model=os.getenv("FAST_MODEL") or get_model_name(),
+            strong_model=os.getenv("STRONG_MODEL", "anthropic:claude-sonnet-4-5"),
+            large_dataset_rows=int(os.getenv("ROUTING_LARGE_DATASET_ROWS", "1000000")),
+        )
+        if os.getenv("MODEL_ROUTING", "false").lower() == "true"
+        else None
+    )
+    batch_chat_usecase = ChatUseCase(
+        dataset_service,
+        session_service,
+        query_service,
+        result_handle_service,
+        app.state.answer_cache_service,
+        session_table_service,
+        usage_service,
+        app.state.model_router,
+        sample_service=sample_service,
+        rollup_service=rollup_service,
+    )
+    batch_service = BatchService(
+        batch_chat_usecase.collect_agent_response,
+        session_service,
+        path=os.getenv("BATCH_DIR", "logs/batches"),
+        workers=int(os.getenv("BATCH_WORKERS", "2")),
+        max_retries=int(os.getenv("BATCH_MAX_RETRIES", "2")),
+    )
+    batch_service.start()
+    app.state.batch_service = batch_service
 
     os.makedirs("output", exist_ok=True)
 
     yield
 
+    await batch_service.stop()
+    if rollup_service is not None:
+        await rollup_service.stop()
+
 
 app = FastAPI(title="Data Analysis Agent API", lifespan=lifespan)
 
@@ -47,5 +191,9 @@ app.add_middleware(
 
 app.include_router(sessions_router, prefix="/api")
 app.include_router(dataset_router, prefix="/api")
+app.include_router(query_router, prefix="/api")
+app.include_router(health_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
+app.include_router(batch_router, prefix="/api")
 
-app.mount("/api/files", StaticFiles(directory="output"), name="output_files")
+app.mount("/api/files", ArtifactFiles(directory="output"), name="output_files")
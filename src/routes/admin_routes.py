@@ -0,0 +1,134 @@
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Annotated, Optional
+
+from src.agent.model_router import ModelRouter
+from src.schemas.admin_schemas.connection_stats_model import ConnectionStatsModel
+from src.schemas.admin_schemas.query_log_report_model import QueryLogReportModel
+from src.schemas.admin_schemas.query_shape_model import QueryShapeModel
+from src.schemas.admin_schemas.rollup_report_model import (
+    RollupModel,
+    RollupReportModel,
+)
+from src.schemas.admin_schemas.routing_report_model import (
+    RoutingDecisionModel,
+    RoutingReportModel,
+    TierStatsModel,
+)
+from src.schemas.admin_schemas.usage_report_model import (
+    SessionUsageModel,
+    UsageReportModel,
+)
+from src.schemas.session_schemas.usage_model import UsageModel
+from src.services.connection_monitor import ConnectionMonitor
+from src.services.query_log_service import QueryLogService, QueryShapeStats
+from src.services.rollup_service import RollupService
+from src.services.usage_service import UsageService
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+
+def get_query_log_service(request: Request) -> QueryLogService:
+    return request.app.state.query_log_service
+
+
+def get_usage_service(request: Request) -> UsageService:
+    return request.app.state.usage_service
+
+
+def get_model_router(request: Request) -> Optional[ModelRouter]:
+    return request.app.state.model_router
+
+
+def get_connection_monitor(request: Request) -> ConnectionMonitor:
+    return request.app.state.connection_monitor
+
+
+def get_rollup_service(request: Request) -> Optional[RollupService]:
+    return request.app.state.rollup_service
+
+
+@router.get("/query-log", response_model=QueryLogReportModel)
+def get_query_log_report(
+    query_log_service: Annotated[QueryLogService, Depends(get_query_log_service)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> QueryLogReportModel:
+    """Top query shapes by slowest execution and by frequency."""
+    return QueryLogReportModel(
+        slowest=[_to_model(s) for s in query_log_service.slowest(limit)],
+        most_frequent=[_to_model(s) for s in query_log_service.most_frequent(limit)],
+    )
+
+
+@router.get("/usage", response_model=UsageReportModel)
+def get_usage_report(
+    usage_service: Annotated[UsageService, Depends(get_usage_service)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> UsageReportModel:
+    """Model usage in total, per dataset queried and for the top sessions."""
+    return UsageReportModel(
+        total=UsageModel(**usage_service.totals().to_dict()),
+        by_dataset={
+            name: UsageModel(**usage.to_dict())
+            for name, usage in usage_service.by_dataset().items()
+        },
+        top_sessions=[
+            SessionUsageModel(session_id=session_id, **usage.to_dict())
+            for session_id, usage in usage_service.top_sessions(limit)
+        ],
+    )
+
+
+@router.get("/routing", response_model=RoutingReportModel)
+def get_routing_report(
+    model_router: Annotated[Optional[ModelRouter], Depends(get_model_router)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> RoutingReportModel:
+    """Runs, escalations and latency per model tier, and the latest decisions."""
+    if model_router is None:
+        return RoutingReportModel(enabled=False, tiers={}, recent=[])
+    return RoutingReportModel(
+        enabled=True,
+        tiers={
+            tier: TierStatsModel(**asdict(stats), avg_ms=round(stats.avg_ms, 1))
+            for tier, stats in model_router.stats().items()
+        },
+        recent=[RoutingDecisionModel(**d) for d in model_router.recent(limit)],
+    )
+
+
+@router.get("/connections", response_model=ConnectionStatsModel)
+def get_connection_stats(
+    connection_monitor: Annotated[ConnectionMonitor, Depends(get_connection_monitor)],
+) -> ConnectionStatsModel:
+    """Open chat connections and the depth of their send queues."""
+    return ConnectionStatsModel(
+        **asdict(connection_monitor.stats()),
+        max_queued_events=connection_monitor.max_queued_events,
+    )
+
+
+@router.get("/rollups", response_model=RollupReportModel)
+def get_rollup_report(
+    rollup_service: Annotated[Optional[RollupService], Depends(get_rollup_service)],
+) -> RollupReportModel:
+    """Materialized rollups, and how often aggregate queries were answered by one."""
+    if rollup_service is None:
+        return RollupReportModel(
+            enabled=False, lookups=0, hits=0, hit_rate=0.0, rollups=[]
+        )
+    lookups, hits = rollup_service.hit_counts()
+    return RollupReportModel(
+        enabled=True,
+        lookups=lookups,
+        hits=hits,
+        hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+        rollups=[RollupModel(**r.to_dict()) for r in rollup_service.rollups()],
+    )
+
+
+def _to_model(stats: QueryShapeStats) -> QueryShapeModel:
+    return QueryShapeModel(**asdict(stats), avg_ms=round(stats.avg_ms, 3))
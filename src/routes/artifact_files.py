@@ -0,0 +1,88 @@
+import mimetypes
+import os
+from typing import Optional, Tuple, Union
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from src.services.infrastructure.artifact_storage import (
+    PRECOMPRESSED_SUFFIXES,
+    VENDOR_DIRECTORY,
+)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class ArtifactFiles(StaticFiles):
+    """Static files for generated artifacts.
+
+    Serves the precompressed `.br`/`.gz` variant written next to a file when
+    the client accepts it (identity for `Range` requests, so byte ranges
+    refer to the original file). Versioned vendor assets are cached forever;
+    artifacts, which can be regenerated under the same name, are revalidated
+    with their ETag.
+    """
+
+    def file_response(
+        self,
+        full_path: Union[str, "os.PathLike[str]"],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = os.fspath(full_path)
+        headers = {
+            "Cache-Control": self._cache_control(path),
+            "Vary": "Accept-Encoding",
+        }
+
+        variant = self._precompressed_variant(path, request_headers)
+        if variant is None:
+            response = FileResponse(
+                path, status_code=status_code, stat_result=stat_result, headers=headers
+            )
+        else:
+            encoding, variant_path, variant_stat = variant
+            response = FileResponse(
+                variant_path,
+                status_code=status_code,
+                stat_result=variant_stat,
+                media_type=mimetypes.guess_type(path)[0] or "text/plain",
+                headers={**headers, "Content-Encoding": encoding},
+            )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _precompressed_variant(
+        path: str, request_headers: Headers
+    ) -> Optional[Tuple[str, str, os.stat_result]]:
+        if "range" in request_headers:
+            return None
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in request_headers.get("accept-encoding", "").split(",")
+        }
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+            if encoding not in accepted:
+                continue
+            try:
+                variant_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            if variant_stat.st_mtime >= os.stat(path).st_mtime:
+                return encoding, path + suffix, variant_stat
+        return None
+
+    def _cache_control(self, path: str) -> str:
+        if self.directory is None:
+            return REVALIDATE_CACHE_CONTROL
+        vendor = os.path.join(os.path.realpath(self.directory), VENDOR_DIRECTORY)
+        if os.path.realpath(path).startswith(vendor + os.sep):
+            return IMMUTABLE_CACHE_CONTROL
+        return REVALIDATE_CACHE_CONTROL
@@ -0,0 +1,74 @@
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import Annotated
+
+from src.exceptions.batch.batch_not_found_exception import BatchNotFoundException
+from src.exceptions.session.session_not_found_exception import (
+    SessionNotFoundException,
+)
+from src.schemas.batch_schemas.batch_item_model import BatchItemModel
+from src.schemas.batch_schemas.batch_request_model import BatchRequestModel
+from src.schemas.batch_schemas.batch_response_model import BatchResponseModel
+from src.services.batch_service import BatchJob, BatchService
+
+router = APIRouter(
+    prefix="/batches",
+    tags=["batches"],
+)
+
+
+def get_batch_service(request: Request) -> BatchService:
+    return request.app.state.batch_service
+
+
+@router.post("/", response_model=BatchResponseModel, status_code=202)
+async def create_batch(
+    batch: BatchRequestModel,
+    batch_service: Annotated[BatchService, Depends(get_batch_service)],
+) -> BatchResponseModel:
+    """Queue questions for the agent and return the job to poll."""
+    try:
+        job = batch_service.submit(
+            batch.questions, batch.session_id, batch.shared_session
+        )
+    except SessionNotFoundException:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Session not found. session id provided: {batch.session_id}",
+        )
+    return _to_model(job)
+
+
+@router.get("/", response_model=list[BatchResponseModel])
+def list_batches(
+    batch_service: Annotated[BatchService, Depends(get_batch_service)],
+) -> list[BatchResponseModel]:
+    return [_to_model(job) for job in batch_service.list_jobs()]
+
+
+@router.get("/{job_id}", response_model=BatchResponseModel)
+def get_batch(
+    job_id: str,
+    batch_service: Annotated[BatchService, Depends(get_batch_service)],
+) -> BatchResponseModel:
+    try:
+        return _to_model(batch_service.get_job(job_id))
+    except BatchNotFoundException:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Batch not found. job id provided: {job_id}",
+        )
+
+
+def _to_model(job: BatchJob) -> BatchResponseModel:
+    items = [BatchItemModel(**asdict(item)) for item in job.items]
+    return BatchResponseModel(
+        job_id=job.job_id,
+        status=job.status,
+        created_at=job.created_at,
+        session_id=job.session_id,
+        total=len(items),
+        completed=sum(item.status in ("succeeded", "failed") for item in items),
+        failed=sum(item.status == "failed" for item in items),
+        items=items,
+    )
@@ -1,14 +1,29 @@
-from fastapi import APIRouter, Depends, Request
-from typing import List
+import hashlib
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from typing import Annotated, List
 
+from src.exceptions.dataset.dataset_not_found_exception import (
+    DatasetNotFoundException,
+)
+from src.exceptions.dataset.invalid_dataset_query_exception import (
+    InvalidDatasetQueryException,
+)
+from src.routes.health_routes import require_datasets_ready
+from src.routes.rows_query_params import RowsQueryParams
 from src.schemas.dataset_schemas.dataset_response_model import DatasetResponseModel
+from src.schemas.dataset_schemas.dataset_rows_response_model import (
+    DatasetRowsResponseModel,
+)
 from src.services.dataset_service import DatasetService
 
 router = APIRouter(
     prefix="/datasets",
     tags=["datasets"],
+    dependencies=[Depends(require_datasets_ready)],
 )
 
+ROWS_CACHE_CONTROL = "private, max-age=0, must-revalidate"
+
 
 def get_dataset_service(request: Request) -> DatasetService:
     return request.app.state.dataset_service
@@ -19,3 +34,44 @@ def list_datasets(
     dataset_service: DatasetService = Depends(get_dataset_service),
 ) -> List[DatasetResponseModel]:
     return [DatasetResponseModel(**d) for d in dataset_service.get_dataset_summaries()]
+
+
+@router.post("/reload", response_model=List[DatasetResponseModel])
+def reload_datasets(
+    dataset_service: DatasetService = Depends(get_dataset_service),
+) -> List[DatasetResponseModel]:
+    """Pick up changes in the data directory; appended CSV lines are inserted."""
+    dataset_service.load()
+    return [DatasetResponseModel(**d) for d in dataset_service.get_dataset_summaries()]
+
+
+@router.get("/{name}/rows", response_model=DatasetRowsResponseModel)
+def get_dataset_rows(
+    name: str,
+    request: Request,
+    response: Response,
+    dataset_service: Annotated[DatasetService, Depends(get_dataset_service)],
+    params: Annotated[RowsQueryParams, Depends()],
+):
+    try:
+        version = dataset_service.get_version(name)
+    except DatasetNotFoundException:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Dataset not found. dataset name provided: {name}",
+        )
+
+    etag = (
+        '"' + hashlib.sha1(f"{version}?{request.url.query}".encode()).hexdigest() + '"'
+    )
+    headers = {"ETag": etag, "Cache-Control": ROWS_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        page = dataset_service.get_rows(name, **params.as_kwargs())
+    except InvalidDatasetQueryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response.headers.update(headers)
+    return DatasetRowsResponseModel(**page)
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from src.schemas.health_schemas.health_response_model import HealthResponseModel
+from src.services.dataset_service import DatasetService
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"],
+)
+
+RETRY_AFTER_SECONDS = "1"
+
+
+def get_dataset_service(request: Request) -> DatasetService:
+    return request.app.state.dataset_service
+
+
+def require_datasets_ready(
+    dataset_service: DatasetService = Depends(get_dataset_service),
+) -> None:
+    """Answer 503 while datasets are still loading in the background."""
+    if not dataset_service.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Datasets are still loading, retry shortly.",
+            headers={"Retry-After": RETRY_AFTER_SECONDS},
+        )
+
+
+@router.get("/live", response_model=HealthResponseModel)
+def liveness() -> HealthResponseModel:
+    """The process is up and serving requests."""
+    return HealthResponseModel(status="alive")
+
+
+@router.get("/ready", response_model=HealthResponseModel)
+def readiness(
+    dataset_service: DatasetService = Depends(get_dataset_service),
+):
+    """Datasets are loaded and queries can be served."""
+    if dataset_service.is_ready:
+        return HealthResponseModel(
+            status="ready", datasets=len(dataset_service.metadata)
+        )
+    if dataset_service.load_error is not None:
+        body = HealthResponseModel(
+            status="failed", detail=str(dataset_service.load_error)
+        )
+    else:
+        body = HealthResponseModel(status="loading")
+    return JSONResponse(
+        status_code=503,
+        content=body.model_dump(exclude_none=True),
+        headers={"Retry-After": RETRY_AFTER_SECONDS},
+    )
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import Annotated
+
+from src.exceptions.query.invalid_query_exception import InvalidQueryException
+from src.routes.health_routes import require_datasets_ready
+from src.schemas.query_schemas.query_request import QueryRequest
+from src.services.query_service import QueryService
+
+router = APIRouter(
+    prefix="/query",
+    tags=["query"],
+    dependencies=[Depends(require_datasets_ready)],
+)
+
+_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def get_query_service(request: Request) -> QueryService:
+    return request.app.state.query_service
+
+
+@router.post("/", response_class=StreamingResponse)
+def run_query(
+    query: QueryRequest,
+    query_service: Annotated[QueryService, Depends(get_query_service)],
+) -> StreamingResponse:
+    """Run one read-only SELECT and stream its rows as DuckDB produces them."""
+    try:
+        if query.format == "arrow":
+            chunks = query_service.stream_arrow(query.sql)
+        else:
+            chunks = query_service.stream_ndjson(query.sql)
+    except InvalidQueryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(chunks, media_type=_MEDIA_TYPES[query.format])
@@ -0,0 +1,55 @@
+from fastapi import HTTPException, Query
+from typing import Annotated, List, Optional
+
+from src.exceptions.dataset.invalid_dataset_query_exception import (
+    InvalidDatasetQueryException,
+)
+from src.services.infrastructure.rows_query_builder import parse_filters, parse_sort
+
+
+class RowsQueryParams:
+    """Query parameters shared by the paged rows endpoints."""
+
+    def __init__(
+        self,
+        columns: Annotated[
+            Optional[str], Query(description="Comma separated columns to return.")
+        ] = None,
+        filters: Annotated[
+            List[str],
+            Query(
+                alias="filter",
+                description="Repeatable `column:operator:value` filter "
+                "(eq, ne, lt, le, gt, ge, contains, in, isnull, notnull).",
+            ),
+        ] = [],
+        sort: Annotated[
+            Optional[str], Query(description="`col1,-col2`, '-' for descending.")
+        ] = None,
+        offset: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+        cursor: Annotated[
+            Optional[str], Query(description="`next_cursor` of the previous page.")
+        ] = None,
+    ) -> None:
+        try:
+            self.filters = parse_filters(filters)
+            self.sort = parse_sort(sort)
+        except InvalidDatasetQueryException as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        self.columns = (
+            [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+        )
+        self.offset = offset
+        self.limit = limit
+        self.cursor = cursor
+
+    def as_kwargs(self) -> dict:
+        return {
+            "columns": self.columns,
+            "filters": self.filters,
+            "sort": self.sort,
+            "offset": self.offset,
+            "limit": self.limit,
+            "cursor": self.cursor,
+        }
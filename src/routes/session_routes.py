@@ -6,14 +6,37 @@ from fastapi import (
     WebSocket,
     WebSocketDisconnect,
 )
-from typing import Annotated
+from typing import Annotated, Optional
 
+from src.agent.model_router import ModelRouter
+from src.exceptions.dataset.invalid_dataset_query_exception import (
+    InvalidDatasetQueryException,
+)
+from src.exceptions.query.invalid_query_exception import InvalidQueryException
+from src.exceptions.session.result_handle_not_found_exception import (
+    ResultHandleNotFoundException,
+)
 from src.exceptions.session.session_not_found_exception import SessionNotFoundException
+from src.exceptions.session.usage_budget_exceeded_exception import (
+    UsageBudgetExceededException,
+)
+from src.routes.rows_query_params import RowsQueryParams
 from src.schemas.session_schemas.session_response import SessionResponse
+from src.services.answer_cache_service import AnswerCacheService
+from src.services.connection_monitor import ConnectionMonitor
 from src.services.dataset_service import DatasetService
+from src.services.query_service import QueryService
+from src.services.result_handle_service import ResultHandleService
+from src.services.rollup_service import RollupService
+from src.services.sample_service import SampleService
+from src.services.session_table_service import SessionTableService
 from src.services.session_service import SessionService
+from src.services.usage_service import UsageService
 from src.schemas.session_schemas.ask_response_model import AskResponseModel
 from src.schemas.session_schemas.ask_query import AskQuery
+from src.schemas.session_schemas.result_rows_response_model import (
+    ResultRowsResponseModel,
+)
 from src.usecases.chat_usecase import ChatUseCase
 
 router = APIRouter(
@@ -31,7 +54,39 @@ def get_dataset_service_http(request: Request) -> DatasetService:
     return request.app.state.dataset_service
 
 
+def get_query_service_http(request: Request) -> QueryService:
+    return request.app.state.query_service
+
+
+def get_result_handle_service_http(request: Request) -> ResultHandleService:
+    return request.app.state.result_handle_service
+
+
+def get_answer_cache_service_http(request: Request) -> Optional[AnswerCacheService]:
+    return request.app.state.answer_cache_service
+
+
+def get_session_table_service_http(request: Request) -> SessionTableService:
+    return request.app.state.session_table_service
+
+
 # pour les websockets
+def get_usage_service_http(request: Request) -> UsageService:
+    return request.app.state.usage_service
+
+
+def get_model_router_http(request: Request) -> Optional[ModelRouter]:
+    return request.app.state.model_router
+
+
+def get_sample_service_http(request: Request) -> Optional[SampleService]:
+    return request.app.state.sample_service
+
+
+def get_rollup_service_http(request: Request) -> Optional[RollupService]:
+    return request.app.state.rollup_service
+
+
 def get_session_service_ws(web_socket: WebSocket) -> SessionService:
     return web_socket.app.state.session_service
 
@@ -40,6 +95,42 @@ def get_dataset_service_ws(web_socket: WebSocket) -> DatasetService:
     return web_socket.app.state.dataset_service
 
 
+def get_query_service_ws(web_socket: WebSocket) -> QueryService:
+    return web_socket.app.state.query_service
+
+
+def get_result_handle_service_ws(web_socket: WebSocket) -> ResultHandleService:
+    return web_socket.app.state.result_handle_service
+
+
+def get_answer_cache_service_ws(web_socket: WebSocket) -> Optional[AnswerCacheService]:
+    return web_socket.app.state.answer_cache_service
+
+
+def get_session_table_service_ws(web_socket: WebSocket) -> SessionTableService:
+    return web_socket.app.state.session_table_service
+
+
+def get_usage_service_ws(web_socket: WebSocket) -> UsageService:
+    return web_socket.app.state.usage_service
+
+
+def get_model_router_ws(web_socket: WebSocket) -> Optional[ModelRouter]:
+    return web_socket.app.state.model_router
+
+
+def get_connection_monitor_ws(web_socket: WebSocket) -> ConnectionMonitor:
+    return web_socket.app.state.connection_monitor
+
+
+def get_sample_service_ws(web_socket: WebSocket) -> Optional[SampleService]:
+    return web_socket.app.state.sample_service
+
+
+def get_rollup_service_ws(web_socket: WebSocket) -> Optional[RollupService]:
+    return web_socket.app.state.rollup_service
+
+
 @router.post("/", response_model=SessionResponse)
 def create_session(
     session_service: Annotated[SessionService, Depends(get_session_service_http)],
@@ -68,15 +159,78 @@ async def ask(
     query: AskQuery,
     dataset_service: Annotated[DatasetService, Depends(get_dataset_service_http)],
     session_service: Annotated[SessionService, Depends(get_session_service_http)],
+    query_service: Annotated[QueryService, Depends(get_query_service_http)],
+    result_handle_service: Annotated[
+        ResultHandleService, Depends(get_result_handle_service_http)
+    ],
+    answer_cache_service: Annotated[
+        Optional[AnswerCacheService], Depends(get_answer_cache_service_http)
+    ],
+    session_table_service: Annotated[
+        SessionTableService, Depends(get_session_table_service_http)
+    ],
+    usage_service: Annotated[UsageService, Depends(get_usage_service_http)],
+    model_router: Annotated[Optional[ModelRouter], Depends(get_model_router_http)],
+    sample_service: Annotated[
+        Optional[SampleService], Depends(get_sample_service_http)
+    ],
+    rollup_service: Annotated[
+        Optional[RollupService], Depends(get_rollup_service_http)
+    ],
 ):
     try:
-        chat_usecase = ChatUseCase(dataset_service, session_service)
+        chat_usecase = ChatUseCase(
+            dataset_service,
+            session_service,
+            query_service,
+            result_handle_service,
+            answer_cache_service,
+            session_table_service,
+            usage_service,
+            model_router,
+            sample_service=sample_service,
+            rollup_service=rollup_service,
+        )
         return await chat_usecase.ask(session_id, query.question)
     except SessionNotFoundException:
         raise HTTPException(
             status_code=404,
             detail=f"Session not found. session id provided: {session_id}",
         )
+    except UsageBudgetExceededException as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+@router.get(
+    "/{session_id}/results/{handle_id}/rows", response_model=ResultRowsResponseModel
+)
+def get_result_rows(
+    session_id: str,
+    handle_id: str,
+    params: Annotated[RowsQueryParams, Depends()],
+    session_service: Annotated[SessionService, Depends(get_session_service_http)],
+    result_handle_service: Annotated[
+        ResultHandleService, Depends(get_result_handle_service_http)
+    ],
+):
+    try:
+        session_service.get_history(session_id)
+        page = result_handle_service.get_rows(
+            session_id, handle_id, **params.as_kwargs()
+        )
+    except SessionNotFoundException:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Session not found. session id provided: {session_id}",
+        )
+    except ResultHandleNotFoundException:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Result not found. handle id provided: {handle_id}",
+        )
+    except (InvalidDatasetQueryException, InvalidQueryException) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ResultRowsResponseModel(**page)
 
 
 @router.websocket("/{session_id}/chat")
@@ -85,6 +239,17 @@ async def chat_websocket(
     session_id: str,
     dataset_service: DatasetService = Depends(get_dataset_service_ws),
     session_service: SessionService = Depends(get_session_service_ws),
+    query_service: QueryService = Depends(get_query_service_ws),
+    result_handle_service: ResultHandleService = Depends(get_result_handle_service_ws),
+    answer_cache_service: Optional[AnswerCacheService] = Depends(
+        get_answer_cache_service_ws
+    ),
+    session_table_service: SessionTableService = Depends(get_session_table_service_ws),
+    usage_service: UsageService = Depends(get_usage_service_ws),
+    model_router: Optional[ModelRouter] = Depends(get_model_router_ws),
+    connection_monitor: ConnectionMonitor = Depends(get_connection_monitor_ws),
+    sample_service: Optional[SampleService] = Depends(get_sample_service_ws),
+    rollup_service: Optional[RollupService] = Depends(get_rollup_service_ws),
 ):
     try:
         session_service.get_history(session_id)
@@ -95,7 +260,19 @@ async def chat_websocket(
         return
 
     await web_socket.accept()
-    chat_usecase = ChatUseCase(dataset_service, session_service)
+    chat_usecase = ChatUseCase(
+        dataset_service,
+        session_service,
+        query_service,
+        result_handle_service,
+        answer_cache_service,
+        session_table_service,
+        usage_service,
+        model_router,
+        connection_monitor,
+        sample_service,
+        rollup_service,
+    )
 
     try:
         await chat_usecase.stream_ask(web_socket, session_id)
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class ConnectionStatsModel(BaseModel):
+    open_connections: int
+    queued_events: int
+    max_queue_depth: int
+    max_queued_events: int
+    merged_events: int
+    slow_disconnects: int
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+from src.schemas.admin_schemas.query_shape_model import QueryShapeModel
+
+
+class QueryLogReportModel(BaseModel):
+    slowest: list[QueryShapeModel]
+    most_frequent: list[QueryShapeModel]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class QueryShapeModel(BaseModel):
+    fingerprint: str
+    normalized_sql: str
+    tables: list[str]
+    count: int
+    errors: int
+    avg_ms: float
+    max_ms: float
+    last_seen: str
+    plan: Optional[str] = None
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+
+class RollupModel(BaseModel):
+    name: str
+    dataset: str
+    version: str
+    groups: list[str]
+    measures: list[str]
+    rows: int
+    source_rows: int
+    built_at: str
+    hits: int
+
+
+class RollupReportModel(BaseModel):
+    enabled: bool
+    lookups: int
+    hits: int
+    hit_rate: float
+    rollups: list[RollupModel]
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class TierStatsModel(BaseModel):
+    runs: int
+    escalations: int
+    errors: int
+    total_ms: float
+    max_ms: float
+    avg_ms: float
+
+
+class RoutingDecisionModel(BaseModel):
+    timestamp: str
+    question: str
+    tier: str
+    model_name: str
+    reasons: list[str]
+    escalation: Optional[str] = None
+    final_tier: str
+    latency_ms: float
+    error: Optional[str] = None
+
+
+class RoutingReportModel(BaseModel):
+    enabled: bool
+    tiers: dict[str, TierStatsModel]
+    recent: list[RoutingDecisionModel]
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+from src.schemas.session_schemas.usage_model import UsageModel
+
+
+class SessionUsageModel(UsageModel):
+    session_id: str
+
+
+class UsageReportModel(BaseModel):
+    total: UsageModel
+    by_dataset: dict[str, UsageModel]
+    top_sessions: list[SessionUsageModel]
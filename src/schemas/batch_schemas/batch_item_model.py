@@ -0,0 +1,18 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class BatchItemModel(BaseModel):
+    index: int
+    question: str
+    status: str
+    attempts: int
+    answer: Optional[str] = None
+    tool_calls: list[dict[str, Any]]
+    file_urls: list[str]
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    first_token_ms: Optional[float] = None
+    duration_ms: Optional[float] = None
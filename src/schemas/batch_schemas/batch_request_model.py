@@ -0,0 +1,9 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class BatchRequestModel(BaseModel):
+    questions: list[str] = Field(min_length=1, max_length=500)
+    session_id: Optional[str] = None
+    shared_session: bool = False
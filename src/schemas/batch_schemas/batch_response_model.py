@@ -0,0 +1,16 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from src.schemas.batch_schemas.batch_item_model import BatchItemModel
+
+
+class BatchResponseModel(BaseModel):
+    job_id: str
+    status: str
+    created_at: str
+    session_id: Optional[str] = None
+    total: int
+    completed: int
+    failed: int
+    items: list[BatchItemModel]
@@ -6,3 +6,4 @@ class DatasetResponseModel(BaseModel):
     rows: int
     columns: int
     column_names: list[str]
+    memory_bytes: int
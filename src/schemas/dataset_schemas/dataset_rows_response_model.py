@@ -0,0 +1,13 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class DatasetRowsResponseModel(BaseModel):
+    name: str
+    columns: list[str]
+    rows: list[dict[str, Any]]
+    offset: int
+    limit: int
+    total_rows: int
+    next_cursor: Optional[str] = None
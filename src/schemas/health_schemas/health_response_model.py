@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class HealthResponseModel(BaseModel):
+    status: str
+    datasets: Optional[int] = None
+    detail: Optional[str] = None
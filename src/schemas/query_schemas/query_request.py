@@ -0,0 +1,8 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class QueryRequest(BaseModel):
+    sql: str
+    format: Literal["ndjson", "arrow"] = "ndjson"
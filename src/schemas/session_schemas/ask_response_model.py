@@ -1,6 +1,9 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 from src.schemas.session_schemas.tool_calls import ToolCall
+from src.schemas.session_schemas.usage_model import UsageModel
 
 
 class AskResponseModel(BaseModel):
@@ -8,3 +11,5 @@ class AskResponseModel(BaseModel):
     thinking: list[str]
     tool_calls: list[ToolCall]
     answer: str
+    usage: Optional[UsageModel] = None
+    session_usage: Optional[UsageModel] = None
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class UsageModel(BaseModel):
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_write_tokens: int
+    total_tokens: int
+    requests: int
+    tool_calls: int
+    runs: int
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from src.services.result_handle_service import ResultHandle
+    from src.services.session_table_service import SessionTable
+
+EventSender = Callable[[dict], Awaitable[None]]
+EventEmitter = Callable[[dict, Optional["ResultHandle"]], Awaitable[None]]
+HandleAdopter = Callable[["ResultHandle"], str]
+
+
+@dataclass
+class CachedAnswer:
+    """Everything needed to replay an agent run into another fresh session."""
+
+    events: List[dict] = field(default_factory=list)
+    handles: Dict[str, "ResultHandle"] = field(default_factory=dict)
+    messages: List[Any] = field(default_factory=list)
+    output: str = ""
+    # Tables the run saved, recreated in each session the answer is replayed to.
+    tables: List["SessionTable"] = field(default_factory=list)
+    created_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Waiter:
+    send: Optional[EventSender]
+    adopt: Optional[HandleAdopter]
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+
+
+class AnswerCacheService:
+    """Caches answers to first questions of a session and coalesces identical runs.
+
+    The key covers the normalized question, the catalog version and the model,
+    so a reload or a model change never serves a stale answer. While a run is
+    in flight, identical questions subscribe to its event stream instead of
+    starting their own run; the run is cancelled when all of them are.
+    Result handles found in replayed `table` events are re-registered in the
+    waiter's session through its `adopt` callback.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._in_flight: Dict[str, tuple[CachedAnswer, List[_Waiter], asyncio.Task]] = (
+            {}
+        )
+
+    @staticmethod
+    def make_key(question: str, catalog_version: str, model: str) -> str:
+        normalized = " ".join(question.lower().split()).rstrip(" ?!.")
+        payload = json.dumps([normalized, catalog_version, model])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedAnswer]:
+        answer = self._entries.get(key)
+        if answer is None:
+            return None
+        if time.monotonic() - answer.created_at > self._ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return answer
+
+    async def fetch(
+        self,
+        key: str,
+        run: Callable[[EventEmitter, CachedAnswer], Awaitable[None]],
+        send: Optional[EventSender] = None,
+        adopt: Optional[HandleAdopter] = None,
+    ) -> CachedAnswer:
+        """Return the answer for `key`, replaying, joining or running it.
+
+        `run` is only called when nothing is cached or in flight; it must emit
+        every event and fill the answer's messages and output.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            waiter = _Waiter(send, adopt)
+            for event in cached.events:
+                await self._deliver(waiter, event, cached)
+            return cached
+
+        if key in self._in_flight:
+            return await self._join(key, send, adopt)
+
+        answer = CachedAnswer()
+        waiters: List[_Waiter] = []
+        task = asyncio.create_task(self._run(key, run, answer, waiters))
+        self._in_flight[key] = (answer, waiters, task)
+        # The caller's own handles need no adoption.
+        return await self._join(key, send, None)
+
+    async def _run(
+        self,
+        key: str,
+        run: Callable[[EventEmitter, CachedAnswer], Awaitable[None]],
+        answer: CachedAnswer,
+        waiters: List[_Waiter],
+    ) -> CachedAnswer:
+        async def emit(event: dict, handle: Optional["ResultHandle"] = None) -> None:
+            if handle is not None:
+                answer.handles[handle.handle_id] = handle
+            answer.events.append(event)
+            for waiter in waiters:
+                waiter.queue.put_nowait(event)
+
+        try:
+            await run(emit, answer)
+            answer.created_at = time.monotonic()
+            self._store(key, answer)
+            return answer
+        finally:
+            del self._in_flight[key]
+            for waiter in waiters:
+                waiter.queue.put_nowait(None)
+
+    async def _join(
+        self, key: str, send: Optional[EventSender], adopt: Optional[HandleAdopter]
+    ) -> CachedAnswer:
+        """Subscribe to the run in flight for `key` until it ends.
+
+        A subscriber that is cancelled only leaves: the run goes on for the
+        others, and is cancelled once nobody is subscribed anymore.
+        """
+        answer, waiters, task = self._in_flight[key]
+        waiter = _Waiter(send, adopt)
+        for event in answer.events:
+            waiter.queue.put_nowait(event)
+        waiters.append(waiter)
+        try:
+            while (event := await waiter.queue.get()) is not None:
+                await self._deliver(waiter, event, answer)
+        finally:
+            waiters.remove(waiter)
+            if not waiters and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        if task.cancelled():
+            raise RuntimeError("The shared run for this question was cancelled")
+        return task.result()
+
+    @staticmethod
+    async def _deliver(waiter: _Waiter, event: dict, answer: CachedAnswer) -> None:
+        if waiter.send is None:
+            return
+        handle = answer.handles.get(event.get("handle_id") or "")
+        if handle is not None and waiter.adopt is not None:
+            event = {**event, "handle_id": waiter.adopt(handle)}
+        await waiter.send(event)
+
+    def _store(self, key: str, answer: CachedAnswer) -> None:
+        self._entries[key] = answer
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.exceptions.batch.batch_not_found_exception import BatchNotFoundException
+from src.exceptions.query.query_limit_exceeded_exception import (
+    QueryLimitExceededException,
+)
+from src.exceptions.session.session_not_found_exception import (
+    SessionNotFoundException,
+)
+from src.exceptions.session.usage_budget_exceeded_exception import (
+    UsageBudgetExceededException,
+)
+from src.services.session_service import SessionService
+
+logger = logging.getLogger(__name__)
+
+# Failures a new attempt would hit again: the item fails without a retry.
+_NOT_RETRIED = (
+    SessionNotFoundException,
+    UsageBudgetExceededException,
+    QueryLimitExceededException,
+)
+
+# Runs one question in a session and returns its answer, tool calls, file URLs
+# and timings.
+AnswerRunner = Callable[[str, str], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class BatchItem:
+    index: int
+    question: str
+    status: str = "queued"  # queued, running, succeeded, failed
+    attempts: int = 0
+    answer: Optional[str] = None
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    file_urls: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    first_token_ms: Optional[float] = None
+    duration_ms: Optional[float] = None
+
+
+@dataclass
+class BatchJob:
+    job_id: str
+    created_at: str
+    items: List[BatchItem]
+    session_id: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        statuses = {item.status for item in self.items}
+        if statuses <= {"queued"}:
+            return "queued"
+        if statuses & {"queued", "running"}:
+            return "running"
+        return "failed" if "failed" in statuses else "succeeded"
+
+
+class BatchService:
+    """Runs batches of questions on a bounded pool of workers.
+
+    Questions of a job run in parallel sessions, or one after the other in
+    the job's session when it has one. A failed run is retried with an
+    exponential delay, unless it went over a usage budget or a query limit. Every job is saved as a JSON file after each change,
+    and unfinished items are queued again when the service starts.
+    """
+
+    def __init__(
+        self,
+        answer: AnswerRunner,
+        session_service: SessionService,
+        path: str = "logs/batches",
+        workers: int = 2,
+        max_retries: int = 2,
+        retry_delay_seconds: float = 1.0,
+    ) -> None:
+        self._answer = answer
+        self._session_service = session_service
+        self._path = Path(path)
+        self._workers = workers
+        self._max_retries = max_retries
+        self._retry_delay_seconds = retry_delay_seconds
+        self._jobs: Dict[str, BatchJob] = {}
+        self._queue: asyncio.Queue[Tuple[str, List[int]]] = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._restore()
+
+    def start(self) -> None:
+        """Start the workers (on the running loop) if they are not running yet."""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"batch-worker-{i}")
+            for i in range(self._workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; interrupted items are resumed on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self) -> None:
+        """Wait until every queued item has been processed (tests, shutdown)."""
+        await self._queue.join()
+
+    def submit(
+        self,
+        questions: List[str],
+        session_id: Optional[str] = None,
+        shared_session: bool = False,
+    ) -> BatchJob:
+        """Create a job; with a session its questions run in order in it.
+
+        Must be called from the event loop the workers run on.
+        """
+        if session_id is not None:
+            self._session_service.get_history(session_id)
+        elif shared_session:
+            session_id = self._session_service.create_session()
+        job = BatchJob(
+            job_id=str(uuid.uuid4()),
+            created_at=_now(),
+            items=[BatchItem(index=i, question=q) for i, q in enumerate(questions)],
+            session_id=session_id,
+        )
+        self._jobs[job.job_id] = job
+        self._save(job)
+        self._enqueue(job)
+        self.start()
+        return job
+
+    def get_job(self, job_id: str) -> BatchJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise BatchNotFoundException(job_id)
+        return job
+
+    def list_jobs(self) -> List[BatchJob]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def _enqueue(self, job: BatchJob) -> None:
+        pending = [item.index for item in job.items if item.status == "queued"]
+        if not pending:
+            return
+        if job.session_id is not None:
+            self._queue.put_nowait((job.job_id, pending))
+        else:
+            for index in pending:
+                self._queue.put_nowait((job.job_id, [index]))
+
+    async def _work(self) -> None:
+        while True:
+            job_id, indices = await self._queue.get()
+            try:
+                job = self._jobs[job_id]
+                for index in indices:
+                    await self._run_item(job, job.items[index])
+            except Exception:
+                logger.exception("Batch %s stopped unexpectedly", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run_item(self, job: BatchJob, item: BatchItem) -> None:
+        session_id = job.session_id or self._session_service.create_session()
+        item.status, item.started_at = "running", _now()
+        self._save(job)
+        started = time.perf_counter()
+        try:
+            while True:
+                item.attempts += 1
+                try:
+                    result = await self._answer(session_id, item.question)
+                except _NOT_RETRIED as e:
+                    item.status, item.error = "failed", str(e)
+                    break
+                except Exception as e:
+                    if item.attempts > self._max_retries:
+                        item.status, item.error = "failed", str(e)
+                        break
+                    logger.warning(
+                        "Batch %s item %s failed (attempt %s): %s",
+                        job.job_id,
+                        item.index,
+                        item.attempts,
+                        e,
+                    )
+                    await asyncio.sleep(
+                        self._retry_delay_seconds * 2 ** (item.attempts - 1)
+                    )
+                else:
+                    item.status, item.error = "succeeded", None
+                    item.answer = result["answer"]
+                    item.tool_calls = result["tool_calls"]
+                    item.file_urls = result["file_urls"]
+                    item.first_token_ms = result["first_token_ms"]
+                    break
+        finally:
+            if job.session_id is None:
+                self._session_service.delete_session(session_id)
+        item.finished_at = _now()
+        item.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self._save(job)
+
+    def _save(self, job: BatchJob) -> None:
+        path = self._path / f"{job.job_id}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(asdict(job), default=str), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _restore(self) -> None:
+        for path in sorted(self._path.glob("*.json")):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                items = [BatchItem(**item) for item in data.pop("items")]
+                job = BatchJob(items=items, **data)
+            except (json.JSONDecodeError, TypeError, KeyError):
+                logger.warning("Skipping unreadable batch file %s", path)
+                continue
+            for item in job.items:
+                if item.status == "running":
+                    item.status = "queued"  # interrupted by the restart
+            pending = any(item.status == "queued" for item in job.items)
+            if pending and job.session_id is not None:
+                try:
+                    self._session_service.get_history(job.session_id)
+                except SessionNotFoundException:
+                    # Sessions live in memory: resume the job in a fresh one.
+                    job.session_id = self._session_service.create_session()
+            self._jobs[job.job_id] = job
+            self._enqueue(job)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
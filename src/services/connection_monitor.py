@@ -0,0 +1,59 @@
+import threading
+from dataclasses import dataclass
+
+
+@dataclass
+class ConnectionStats:
+    open_connections: int = 0
+    queued_events: int = 0
+    max_queue_depth: int = 0
+    merged_events: int = 0
+    slow_disconnects: int = 0
+
+
+class ConnectionMonitor:
+    """Send queue limits of the chat WebSockets, and their live metrics.
+
+    Every connection queues its outgoing events in a bounded `SendQueue`;
+    the queues report here how deep they are, how many streamed deltas they
+    merged and which clients were disconnected for not reading.
+    """
+
+    def __init__(
+        self, max_queued_events: int = 256, stall_timeout_seconds: float = 10.0
+    ) -> None:
+        self.max_queued_events = max_queued_events
+        self.stall_timeout_seconds = stall_timeout_seconds
+        self._stats = ConnectionStats()
+        self._lock = threading.Lock()
+
+    def opened(self) -> None:
+        with self._lock:
+            self._stats.open_connections += 1
+
+    def closed(self, pending_events: int) -> None:
+        with self._lock:
+            self._stats.open_connections -= 1
+            self._stats.queued_events -= pending_events
+
+    def queued(self, depth: int) -> None:
+        """One event was queued on a connection that now holds `depth` events."""
+        with self._lock:
+            self._stats.queued_events += 1
+            self._stats.max_queue_depth = max(self._stats.max_queue_depth, depth)
+
+    def sent(self) -> None:
+        with self._lock:
+            self._stats.queued_events -= 1
+
+    def merged(self) -> None:
+        with self._lock:
+            self._stats.merged_events += 1
+
+    def slow_client(self) -> None:
+        with self._lock:
+            self._stats.slow_disconnects += 1
+
+    def stats(self) -> ConnectionStats:
+        with self._lock:
+            return ConnectionStats(**vars(self._stats))
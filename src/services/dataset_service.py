@@ -1,64 +1,588 @@
+import hashlib
+import json
+import logging
+import os
 import re
+import tempfile
+import threading
+from collections.abc import Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, Iterable, List, Dict, Optional, Tuple
 
+import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.exceptions.dataset.dataset_not_found_exception import (
+    DatasetNotFoundException,
+)
+from src.exceptions.dataset.invalid_dataset_query_exception import (
+    InvalidDatasetQueryException,
+)
+from src.services.infrastructure.csv_ingestor import (
+    CsvIngestState,
+    append_csv,
+    ingest_csv,
+)
+from src.services.infrastructure.key_detector import (
+    KeyColumn,
+    detect_keys,
+    index_name,
+)
+from src.services.infrastructure.parquet_ingestor import (
+    PARQUET_ROW_IDENTITY,
+    is_parquet_directory,
+    parquet_scan,
+    register_parquet,
+)
+from src.services.infrastructure.rows_query_builder import (
+    RowFilter,
+    RowsQuery,
+    SortKey,
+    quote_identifier,
+    quote_literal,
+)
+from src.services.infrastructure.scalar_query import fetch_scalar
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DATABASE = "datasets"
+STAGING_DATABASE = "memory"
+
+# String columns with at most this share of distinct values become categoricals.
+_DICTIONARY_MAX_RATIO = 0.5
+# Parquet views above this many rows are not copied into a DataFrame.
+_MAX_VIEW_FRAME_ROWS = 1_000_000
+
+
+@dataclass
+class DatasetMetadata:
+    name: str
+    source: Path
+    version: str
+    rows: int
+    column_types: Dict[str, str]
+    format: str = "csv"
+    memory_bytes: int = 0
+    keys: Tuple[KeyColumn, ...] = ()
+
+    @property
+    def is_view(self) -> bool:
+        """Parquet datasets are views queried in place, not copied tables."""
+        return self.format == "parquet"
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.column_types)
+
+
+def to_compact_frame(table: pa.Table) -> pd.DataFrame:
+    """Convert an Arrow table to an Arrow-backed DataFrame.
+
+    Low-cardinality string columns are dictionary encoded and come out as
+    pandas categoricals; everything else keeps its Arrow buffers.
+    """
+    for i, field in enumerate(table.schema):
+        column = table.column(i)
+        if (
+            pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+        ) and pc.count_distinct(column).as_py() <= len(column) * _DICTIONARY_MAX_RATIO:
+            table = table.set_column(i, field.name, pc.dictionary_encode(column))
+    return table.to_pandas(
+        types_mapper=lambda t: None if pa.types.is_dictionary(t) else pd.ArrowDtype(t)
+    )
+
+
+class CatalogFrames(Mapping[str, pd.DataFrame]):
+    """Read-only mapping of dataset name to compact DataFrame, materialized on access.
+
+    Parquet views are read from disk on access: those above `max_view_rows`
+    are refused rather than loaded whole into memory.
+    """
+
+    def __init__(
+        self,
+        dataset_service: "DatasetService",
+        max_view_rows: int = _MAX_VIEW_FRAME_ROWS,
+    ) -> None:
+        self._dataset_service = dataset_service
+        self._max_view_rows = max_view_rows
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        metadata = self._dataset_service.metadata.get(name)
+        if metadata is None:
+            raise KeyError(name)
+        if metadata.is_view and metadata.rows > self._max_view_rows:
+            raise InvalidDatasetQueryException(
+                f"'{name}' is a Parquet view of {metadata.rows:,} rows, too large "
+                "to load into memory: query it with SQL instead"
+            )
+        with self._dataset_service.cursor() as conn:
+            return to_compact_frame(conn.table(name).fetch_arrow_table())
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._dataset_service.metadata
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._dataset_service.metadata)
+
+    def __len__(self) -> int:
+        return len(self._dataset_service.metadata)
 
 
 class DatasetService:
-    """Loads CSV files and store in datasets + metadata."""
+    """Loads CSV and Parquet datasets and store in datasets + metadata.
+
+    CSV files are ingested straight into tables of a shared in-memory DuckDB
+    catalog, several files at a time. Parquet files and (hive-partitioned)
+    directories of Parquet files become views read in place. Reads are pushed
+    down to DuckDB instead of pandas.
+
+    Tables live in a compressed in-memory database: each CSV is staged
+    uncompressed, then copied and checkpointed into the catalog, which
+    applies DuckDB's lightweight compression (dictionary, FSST, bit packing).
 
-    def __init__(self, data_dir: str = "data") -> None:
-        self._datasets: Dict[str, pd.DataFrame] = {}
+    Identifier columns whose values are (nearly) all distinct, such as
+    `customerID`, are detected when a CSV table is built and get an ART index
+    for point lookups and selective joins; `dataset_info` lists them.
+
+    Loading again only reads what changed: unchanged sources are kept, and a
+    CSV file that was only appended to gets its new lines inserted into its
+    table. Any other change reloads the file.
+    """
+
+    def __init__(self, data_dir: str = "data", max_workers: int = 4) -> None:
+        self._metadata: Dict[str, DatasetMetadata] = {}
+        self._csv_states: Dict[str, Optional[CsvIngestState]] = {}
         self._dataset_info: str = ""
         self._data_dir = data_dir
+        self._max_workers = max_workers
+        self._catalog = duckdb.connect(database=":memory:")
+        self._catalog.execute(f"ATTACH ':memory:' AS {CATALOG_DATABASE} (COMPRESS)")
+        self._catalog.execute(f"USE {CATALOG_DATABASE}")
+        self._compaction_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._loaded = False
+        self._load_error: Optional[Exception] = None
+        # Appended CSV lines are parsed from here, readable once access is restricted.
+        self._scratch_dir = tempfile.mkdtemp(prefix="dataset-appends-")
+        self._restricted = False
+        self._config_lock = threading.Lock()
 
     @property
-    def datasets(self) -> Dict[str, pd.DataFrame]:
-        return self._datasets
+    def datasets(self) -> Mapping[str, pd.DataFrame]:
+        return CatalogFrames(self)
+
+    @property
+    def metadata(self) -> Dict[str, DatasetMetadata]:
+        return self._metadata
 
     @property
     def dataset_info(self) -> str:
         return self._dataset_info
 
+    @property
+    def is_ready(self) -> bool:
+        """True once a `load()` finished without error.
+
+        Reloads don't change it: the datasets loaded before stay queryable
+        while the catalog refreshes, and when the refresh fails.
+        """
+        return self._idle.is_set() and self._loaded
+
+    @property
+    def load_error(self) -> Optional[Exception]:
+        return self._load_error
+
+    @property
+    def catalog_version(self) -> str:
+        """Fingerprint of every loaded dataset version."""
+        payload = json.dumps(
+            {name: meta.version for name, meta in self._metadata.items()},
+            sort_keys=True,
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def restrict_file_access(self) -> None:
+        """Limit file access of the catalog to the data directory, then lock its
+        configuration so no query can lift the restriction.
+
+        The settings are global to the DuckDB instance: configure it (memory,
+        threads) before calling this. Calling it again does nothing.
+        """
+        with self._config_lock:
+            if self._restricted:
+                return
+            directories = [Path(self._data_dir).resolve(), Path(self._scratch_dir)]
+            with self.cursor() as conn:
+                spill_dir = fetch_scalar(
+                    conn, "SELECT current_setting('temp_directory')"
+                )
+                if spill_dir:
+                    directories.append(Path(spill_dir).resolve())
+                allowed = ", ".join(quote_literal(f"{d}{os.sep}") for d in directories)
+                conn.execute(f"SET allowed_directories = [{allowed}]")
+                conn.execute("SET enable_external_access = false")
+                conn.execute("SET lock_configuration = true")
+            self._restricted = True
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """Return a new cursor on the shared catalog, one per thread/request."""
+        conn = self._catalog.cursor()
+        conn.execute(f"USE {CATALOG_DATABASE}")
+        return conn
+
+    def get_version(self, name: str) -> str:
+        """Return the version of a dataset, derived from its source file."""
+        if name not in self._metadata:
+            raise DatasetNotFoundException(name)
+        return self._metadata[name].version
+
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Block while the first load is in progress, False on timeout."""
+        return self._idle.wait(timeout)
+
+    def load_in_background(self) -> Future:
+        """Run `load()` on a dedicated thread; readers wait or see `is_ready`."""
+        if not self._loaded:
+            self._idle.clear()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dataset-load")
+        future = executor.submit(self.load)
+        executor.shutdown(wait=False)
+        return future
+
     def load(self) -> None:
-        """Load all CSV files from the data directory."""
+        """Load all CSV files, Parquet files and Parquet directories from the data directory.
+
+        `is_ready` and `wait_until_loaded` report the progress of the first load.
+        Calling it again refreshes the catalog with what changed in the
+        directory, without blocking readers; the metadata and the description
+        of the datasets are only replaced when the refresh succeeds.
+        """
+        if not self._loaded:
+            self._idle.clear()
+        self._load_error = None
+        try:
+            with self._load_lock:
+                self._load()
+            self._loaded = True
+        except Exception as e:
+            self._load_error = e
+            if not self._loaded:
+                self._dataset_info = "No datasets available."
+            raise
+        finally:
+            self._idle.set()
+
+    def _load(self) -> None:
         data_path = Path(self._data_dir)
         if not data_path.exists():
             data_path.mkdir(parents=True, exist_ok=True)
+            for name in list(self._metadata):
+                self._drop_source(name)
             self._dataset_info = "No datasets available."
             return
 
-        info_lines: List[str] = []
-
-        for csv_file in sorted(data_path.glob("*.csv")):
-            name = re.sub(r"[^a-zA-Z0-9_]", "_", csv_file.stem).strip("_").lower()
-            df = pd.read_csv(csv_file, sep=None, engine="python")
-            df = df.loc[:, df.columns.notna() & (df.columns.str.strip() != "")]
-            self._datasets[name] = df
-
-            cols = ", ".join(df.columns.tolist())
-            info_lines.append(
-                f"- **{name}** ({df.shape[0]} rows, {df.shape[1]} columns)\n"
-                f"  Columns: {cols}"
+        sources = self._source_names(
+            path
+            for path in sorted(data_path.iterdir())
+            if path.suffix in (".csv", ".parquet") or is_parquet_directory(path)
+        )
+        for name, metadata in list(self._metadata.items()):
+            # A table can't be replaced by a view of the same name, or the reverse.
+            if name not in sources or _format(sources[name]) != metadata.format:
+                self._drop_source(name)
+        workers = max(1, min(self._max_workers, len(sources), os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            refreshed = list(
+                executor.map(self._refresh_source, sources.keys(), sources.values())
             )
+        # Compaction runs one table at a time so each size delta is its own.
+        loaded = []
+        for metadata, staged in refreshed:
+            if staged and not metadata.is_view:
+                metadata.memory_bytes, metadata.keys = self._compact(metadata)
+            loaded.append(metadata)
 
+        info_lines: List[str] = [self._describe(meta, loaded) for meta in loaded]
+        self._metadata = {meta.name: meta for meta in loaded}
         if not info_lines:
-            self._dataset_info = (
-                "No datasets available. Add CSV files to the data/ directory."
-            )
+            self._dataset_info = "No datasets available. Add CSV or Parquet files to the data/ directory."
             return
 
         self._dataset_info = "\n".join(info_lines)
 
-    def get_dataset_summaries(self) -> List[Dict[str, pd.DataFrame]]:
+    def get_dataset_summaries(self) -> List[Dict[str, Any]]:
         """Return a summary of each loaded dataset"""
         return [
             {
                 "name": name,
-                "rows": df.shape[0],
-                "columns": df.shape[1],
-                "column_names": df.columns.tolist(),
+                "rows": meta.rows,
+                "columns": len(meta.column_types),
+                "column_names": meta.column_names,
+                "memory_bytes": meta.memory_bytes,
             }
-            for name, df in self._datasets.items()
+            for name, meta in self._metadata.items()
         ]
+
+    def get_rows(
+        self,
+        name: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[List[RowFilter]] = None,
+        sort: Optional[List[SortKey]] = None,
+        offset: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Read one page of a dataset, with projection, filters and sort run by DuckDB.
+
+        `cursor` (keyset pagination) takes precedence over `offset`.
+        """
+        if name not in self._metadata:
+            raise DatasetNotFoundException(name)
+
+        meta = self._metadata[name]
+        query = RowsQuery(
+            table=name,
+            column_types=meta.column_types,
+            source=(
+                parquet_scan(meta.source, with_row_identity=True)
+                if meta.is_view
+                else None
+            ),
+            row_identity=PARQUET_ROW_IDENTITY if meta.is_view else ["rowid"],
+            columns=columns or [],
+            filters=filters or [],
+            sort=sort or [],
+            offset=offset,
+            limit=limit,
+            cursor=cursor,
+        )
+        with self.cursor() as conn:
+            return {"name": name, **query.fetch_page(conn)}
+
+    def _refresh_source(self, name: str, path: Path) -> Tuple[DatasetMetadata, bool]:
+        """Keep, append to or (re)load one source; True when it was staged."""
+        previous = self._metadata.get(name)
+        if previous is not None and previous.source == path:
+            version = self._file_version(path)
+            if version == previous.version:
+                return previous, False
+            if previous.format == "csv":
+                appended = self._append_source(previous, version)
+                if appended is not None:
+                    return appended, False
+            logger.info("Reloading dataset %s", name)
+        return self._load_source(name, path), True
+
+    def _source_names(self, paths: Iterable[Path]) -> Dict[str, Path]:
+        """Dataset name of each source, derived from its file name.
+
+        When several sources map to one name (`sales.csv`, `sales.parquet`,
+        `sales/`), the one already loaded under it, or else the first, keeps
+        it and the others get their format as suffix (`sales_parquet`).
+        """
+        by_name: Dict[str, List[Path]] = {}
+        for path in paths:
+            name = re.sub(r"[^a-zA-Z0-9_]", "_", path.stem).strip("_").lower()
+            by_name.setdefault(name, []).append(path)
+
+        sources: Dict[str, Path] = {}
+        collisions: List[Tuple[str, Path]] = []
+        for name, candidates in by_name.items():
+            current = self._metadata.get(name)
+            owner = next(
+                (p for p in candidates if current and p == current.source),
+                candidates[0],
+            )
+            sources[name] = owner
+            collisions += [(name, p) for p in candidates if p != owner]
+        for name, path in collisions:
+            suffixed = f"{name}_{path.suffix.lstrip('.') or 'dir'}"
+            unique, n = suffixed, 2
+            while unique in sources or unique in by_name:
+                unique, n = f"{suffixed}_{n}", n + 1
+            logger.warning(
+                "Dataset %s is already %s: %s is loaded as %s",
+                name,
+                sources[name].name,
+                path.name,
+                unique,
+            )
+            sources[unique] = path
+        return sources
+
+    def _drop_source(self, name: str) -> None:
+        """Forget a dataset whose source was removed or changed format."""
+        metadata = self._metadata.pop(name)
+        self._csv_states.pop(name, None)
+        kind = "VIEW" if metadata.is_view else "TABLE"
+        with self._compaction_lock, self.cursor() as conn:
+            conn.execute(f"DROP {kind} IF EXISTS {quote_identifier(name)}")
+        logger.info("Dropped dataset %s, its source was removed", name)
+
+    def _append_source(
+        self, previous: DatasetMetadata, version: str
+    ) -> Optional[DatasetMetadata]:
+        """Insert the lines appended to a CSV file, None if it must be reloaded."""
+        state = self._csv_states.get(previous.name)
+        if state is None:
+            return None
+        with self._compaction_lock, self.cursor() as conn:
+            before = self._in_memory_table_bytes(conn)
+            appended = append_csv(
+                conn,
+                quote_identifier(previous.name),
+                previous.source,
+                state,
+                self._scratch_dir,
+            )
+            if appended is None:
+                return None
+            state, rows = appended
+            metadata = replace(previous, version=version, rows=previous.rows + rows)
+            # New rows may repeat a key: uniqueness is counted again.
+            keys = self._index_keys(conn, metadata) if rows else previous.keys
+            self._checkpoint(conn)
+            memory_bytes = self._in_memory_table_bytes(conn) - before
+        self._csv_states[previous.name] = state
+        logger.info("Appended %s rows to dataset %s", rows, previous.name)
+        return replace(
+            metadata,
+            keys=keys,
+            memory_bytes=max(previous.memory_bytes + memory_bytes, 0),
+        )
+
+    def _load_source(self, name: str, path: Path) -> DatasetMetadata:
+        """Stage one CSV file or expose one Parquet source, on its own cursor."""
+        data_format = _format(path)
+        with self.cursor() as conn:
+            if data_format == "csv":
+                table = self._staging_table(name)
+                self._csv_states[name] = ingest_csv(conn, table, path)
+            else:
+                register_parquet(conn, name, path)
+                table = quote_identifier(name)
+            rows = fetch_scalar(conn, f"SELECT COUNT(*) FROM {table}")
+            column_types = {
+                column: column_type
+                for column, column_type, *_ in conn.execute(
+                    f"DESCRIBE {table}"
+                ).fetchall()
+            }
+        return DatasetMetadata(
+            name=name,
+            source=path,
+            version=self._file_version(path),
+            rows=rows,
+            column_types=column_types,
+            format=data_format,
+        )
+
+    def _compact(self, metadata: DatasetMetadata) -> Tuple[int, Tuple[KeyColumn, ...]]:
+        """Move a staged table into the compressed catalog and index its keys.
+
+        Returns the size of the table in bytes, indexes excluded, and its keys.
+        """
+        name, table = metadata.name, quote_identifier(metadata.name)
+        with self._compaction_lock, self.cursor() as conn:
+            before = self._in_memory_table_bytes(conn)
+            conn.execute(
+                f"CREATE OR REPLACE TABLE {table} AS "
+                f"SELECT * FROM {self._staging_table(name)}"
+            )
+            keys = self._index_keys(conn, metadata)
+            self._checkpoint(conn)
+            memory_bytes = self._in_memory_table_bytes(conn) - before
+            conn.execute(f"DROP TABLE {self._staging_table(name)}")
+        return max(memory_bytes, 0), keys
+
+    @staticmethod
+    def _index_keys(
+        conn: duckdb.DuckDBPyConnection, metadata: DatasetMetadata
+    ) -> Tuple[KeyColumn, ...]:
+        """Detect the keys of a dataset table and index them.
+
+        Indexes of `metadata.keys` that are no longer keys are dropped.
+        """
+        name, table = metadata.name, quote_identifier(metadata.name)
+        keys = detect_keys(conn, table, metadata.column_types, metadata.rows)
+        indexed = {key.column for key in metadata.keys}
+        for key in keys:
+            if key.column not in indexed:
+                conn.execute(
+                    f"CREATE INDEX {index_name(name, key.column)} "
+                    f"ON {table} ({quote_identifier(key.column)})"
+                )
+        for column in indexed - {key.column for key in keys}:
+            conn.execute(f"DROP INDEX IF EXISTS {index_name(name, column)}")
+        return tuple(keys)
+
+    @staticmethod
+    def _describe(meta: DatasetMetadata, loaded: List[DatasetMetadata]) -> str:
+        """Lines of `dataset_info` for one dataset."""
+        lines = [
+            f"- **{meta.name}** ({meta.rows} rows, {len(meta.column_types)} columns)",
+            f"  Columns: {', '.join(meta.column_names)}",
+        ]
+        keys = []
+        for key in meta.keys:
+            matches = [
+                f"{other.name}.{column}"
+                for other in loaded
+                if other is not meta
+                for column in other.column_names
+                if _comparable(column) == _comparable(key.column)
+            ]
+            details = ["unique" if key.unique else f"{key.distinct_ratio:.0%} distinct"]
+            if matches:
+                details.append(f"joins {', '.join(matches)}")
+            keys.append(f"{key.column} ({'; '.join(details)})")
+        if keys:
+            lines.append(f"  Indexed keys (fast lookups and joins): {', '.join(keys)}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _checkpoint(conn: duckdb.DuckDBPyConnection) -> None:
+        try:
+            conn.execute(f"CHECKPOINT {CATALOG_DATABASE}")
+        except duckdb.TransactionException:
+            # Another write is in flight: the table stays uncompressed until
+            # the next checkpoint and is reported at its uncompressed size.
+            pass
+
+    @staticmethod
+    def _staging_table(name: str) -> str:
+        return f"{STAGING_DATABASE}.main.{quote_identifier(name)}"
+
+    @staticmethod
+    def _in_memory_table_bytes(conn: duckdb.DuckDBPyConnection) -> int:
+        return fetch_scalar(
+            conn,
+            "SELECT COALESCE(SUM(memory_usage_bytes), 0) FROM duckdb_memory() "
+            "WHERE tag = 'IN_MEMORY_TABLE'",
+        )
+
+    @staticmethod
+    def _file_version(path: Path) -> str:
+        files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+        payload = ";".join(
+            f"{f.relative_to(path.parent)}:{f.stat().st_size}:{f.stat().st_mtime_ns}"
+            for f in files
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def _comparable(column: str) -> str:
+    """Column name ignoring case and separators: `customer_id` is `customerID`."""
+    return re.sub(r"[^a-z0-9]", "", column.lower())
+
+
+def _format(path: Path) -> str:
+    return "csv" if path.suffix == ".csv" else "parquet"
@@ -0,0 +1,48 @@
+import gzip
+import os
+import threading
+from pathlib import Path
+from typing import Dict
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+# Precompressed variants written next to each artifact, by content-encoding.
+PRECOMPRESSED_SUFFIXES: Dict[str, str] = {"br": ".br", "gzip": ".gz"}
+VENDOR_DIRECTORY = "vendor"
+
+_plotly_js_lock = threading.Lock()
+
+
+def precompress(path: str) -> None:
+    """Write the gzip (and brotli, when available) variants of a file."""
+    data = Path(path).read_bytes()
+    _write_atomically(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_atomically(path + ".br", brotli.compress(data))
+    elif os.path.exists(path + ".br"):
+        os.remove(path + ".br")  # stale variant from an environment with brotli
+
+
+def ensure_plotly_js(directory: str) -> str:
+    """Write the versioned plotly.js bundle once and return its path relative
+    to `directory`, for figures to reference instead of embedding it."""
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    name = f"{VENDOR_DIRECTORY}/plotly-{get_plotlyjs_version()}.min.js"
+    path = os.path.join(directory, name)
+    with _plotly_js_lock:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomically(path, get_plotlyjs().encode())
+            precompress(path)
+    return name
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,50 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+from src.exceptions.session.run_cancelled_exception import RunCancelledException
+
+
+class Cancellation:
+    """Cancellation of one agent run, shared with the threads doing its work.
+
+    Asyncio cancellation stops the run's coroutines but not a DuckDB query or
+    a render running in a worker thread. Such work registers how to abort
+    itself for as long as it runs, and `cancel()` calls it.
+    """
+
+    def __init__(self) -> None:
+        self._cancelled = threading.Event()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled.set()
+            callbacks = list(self._callbacks.values())
+        for callback in callbacks:
+            callback()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise RunCancelledException("the question was cancelled")
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        """Call `callback` if the run is cancelled while the block runs."""
+        with self._lock:
+            callback_id = self._next_id
+            self._next_id += 1
+            self._callbacks[callback_id] = callback
+        try:
+            if self.cancelled:
+                callback()
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.pop(callback_id, None)
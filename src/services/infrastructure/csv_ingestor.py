@@ -0,0 +1,232 @@
+import csv
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import duckdb
+
+from src.services.infrastructure.rows_query_builder import (
+    quote_identifier,
+    quote_literal,
+)
+from src.services.infrastructure.scalar_query import fetch_scalar
+
+# BOOLEAN is left out on purpose: Yes/No columns (telcoclient) must stay text.
+_TYPE_CANDIDATES = ["BIGINT", "DOUBLE", "DATE", "TIMESTAMP", "VARCHAR"]
+# Bytes checksummed at the start of the file (header included) and right
+# before the ingested offset, to tell an append from a rewrite.
+_HEAD_BYTES = 64 * 1024
+_BOUNDARY_BYTES = 4 * 1024
+
+
+@dataclass(frozen=True)
+class CsvIngestState:
+    """How a CSV file was read and up to which byte, to ingest only what is appended."""
+
+    offset: int
+    head_length: int
+    head_checksum: str
+    boundary_checksum: str
+    delimiter: str
+    quote: str
+    decimal_separator: str
+    file_columns: Tuple[Tuple[str, str], ...]
+    kept_columns: Tuple[str, ...]
+
+
+def ingest_csv(
+    conn: duckdb.DuckDBPyConnection, table: str, path: Path
+) -> Optional[CsvIngestState]:
+    """(Re)create table `table` (quoted relation) from a CSV file with DuckDB's parallel reader.
+
+    The dialect is sniffed by DuckDB. Files using another delimiter than ','
+    (e.g. titanic.csv with ';') may use ',' as decimal separator: it is kept
+    when it types more columns as numbers than '.', and columns with an empty
+    header (trailing delimiters) are dropped.
+
+    Returns where the read stopped for `append_csv`, or None when the file
+    can't be appended to safely (it changed during the read or its last line
+    is incomplete).
+
+    DuckDB gets the absolute path: file access is limited to the absolute
+    data directory once the catalog is restricted.
+    """
+    path = path.resolve()
+    size = path.stat().st_size
+    dialect = conn.execute(
+        "SELECT Delimiter, Quote FROM sniff_csv(?)", [str(path)]
+    ).fetchone()
+    if dialect is None:
+        raise duckdb.InvalidInputException(f"could not sniff the dialect of {path}")
+    delimiter, quote = dialect
+
+    decimal_separator = _decimal_separator(conn, path, delimiter)
+    options = [
+        "?",
+        f"auto_type_candidates = {_TYPE_CANDIDATES!r}",
+        "parallel = true",
+        f"decimal_separator = {quote_literal(decimal_separator)}",
+    ]
+
+    conn.execute(
+        f"CREATE OR REPLACE TABLE {table} AS "
+        f"SELECT * FROM read_csv({', '.join(options)})",
+        [str(path)],
+    )
+
+    file_columns = tuple(
+        (row[0], row[1]) for row in conn.execute(f"DESCRIBE {table}").fetchall()
+    )
+    kept = _non_empty_header_positions(path, delimiter, quote)
+    if kept is not None:
+        for position, (column, _) in enumerate(file_columns):
+            if position not in kept:
+                conn.execute(
+                    f"ALTER TABLE {table} DROP COLUMN {quote_identifier(column)}"
+                )
+
+    if path.stat().st_size != size or not _ends_with_newline(path, size):
+        return None
+    return CsvIngestState(
+        offset=size,
+        head_length=min(size, _HEAD_BYTES),
+        head_checksum=_checksum(path, 0, min(size, _HEAD_BYTES)),
+        boundary_checksum=_boundary_checksum(path, size),
+        delimiter=delimiter,
+        quote=quote if len(quote) == 1 else "",
+        decimal_separator=decimal_separator,
+        file_columns=file_columns,
+        kept_columns=tuple(
+            column
+            for position, (column, _) in enumerate(file_columns)
+            if kept is None or position in kept
+        ),
+    )
+
+
+def append_csv(
+    conn: duckdb.DuckDBPyConnection,
+    table: str,
+    path: Path,
+    state: CsvIngestState,
+    scratch_dir: Optional[str] = None,
+) -> Optional[Tuple[CsvIngestState, int]]:
+    """Insert into `table` the complete lines appended to the file since `state`.
+
+    Only the new bytes are parsed, with the dialect and column types of the
+    first read. Returns the new state and the number of rows inserted, or
+    None when the file was not only appended to (it shrank, its start or the
+    bytes before the offset changed) or when the new rows don't fit the
+    table's types: the file must then be ingested again. The new lines are
+    parsed from a temporary file in `scratch_dir`.
+    """
+    size = path.stat().st_size
+    if size < state.offset:
+        return None
+    if _checksum(path, 0, state.head_length) != state.head_checksum:
+        return None
+    if _boundary_checksum(path, state.offset) != state.boundary_checksum:
+        return None
+
+    with open(path, "rb") as f:
+        f.seek(state.offset)
+        tail = f.read(size - state.offset)
+    tail = tail[
+        : tail.rfind(b"\n") + 1
+    ]  # a partial last line waits for the next append
+    if not tail:
+        return state, 0
+
+    offset = state.offset + len(tail)
+    state = replace(
+        state, offset=offset, boundary_checksum=_boundary_checksum(path, offset)
+    )
+    if not tail.strip():
+        return state, 0
+
+    fd, tail_path = tempfile.mkstemp(suffix=".csv", dir=scratch_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(tail)
+        columns = ", ".join(
+            f"{quote_literal(name)}: {quote_literal(column_type)}"
+            for name, column_type in state.file_columns
+        )
+        options = [
+            "?",
+            "header = false",
+            f"delim = {quote_literal(state.delimiter)}",
+            f"quote = {quote_literal(state.quote)}",
+            f"columns = {{{columns}}}",
+            f"decimal_separator = {quote_literal(state.decimal_separator)}",
+        ]
+        selected = ", ".join(quote_identifier(c) for c in state.kept_columns)
+        rows = fetch_scalar(
+            conn,
+            f"INSERT INTO {table} SELECT {selected} FROM read_csv({', '.join(options)})",
+            [tail_path],
+        )
+    except duckdb.Error:
+        return None
+    finally:
+        os.unlink(tail_path)
+    return state, rows
+
+
+def _decimal_separator(
+    conn: duckdb.DuckDBPyConnection, path: Path, delimiter: str
+) -> str:
+    """'.' or ',', whichever lets the sniffer type more columns as DOUBLE."""
+    if delimiter == ",":
+        return "."
+
+    def doubles(separator: str) -> int:
+        return fetch_scalar(
+            conn,
+            "SELECT COUNT(*) FROM (DESCRIBE SELECT * FROM read_csv(?, "
+            f"auto_type_candidates = {_TYPE_CANDIDATES!r}, "
+            f"decimal_separator = {quote_literal(separator)})) "
+            "WHERE column_type = 'DOUBLE'",
+            [str(path)],
+        )
+
+    return "," if doubles(",") > doubles(".") else "."
+
+
+def _non_empty_header_positions(
+    path: Path, delimiter: str, quote: str
+) -> set[int] | None:
+    """Return the positions of header fields that are not blank.
+
+    DuckDB reports a missing quote character as '(empty)'.
+    """
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        quotechar = quote if len(quote) == 1 else '"'
+        header: List[str] = next(
+            csv.reader(f, delimiter=delimiter, quotechar=quotechar), []
+        )
+    if not header:
+        return None
+    return {i for i, field in enumerate(header) if field.strip()}
+
+
+def _ends_with_newline(path: Path, size: int) -> bool:
+    if size == 0:
+        return False
+    with open(path, "rb") as f:
+        f.seek(size - 1)
+        return f.read(1) == b"\n"
+
+
+def _boundary_checksum(path: Path, offset: int) -> str:
+    start = max(0, offset - _BOUNDARY_BYTES)
+    return _checksum(path, start, offset - start)
+
+
+def _checksum(path: Path, start: int, length: int) -> str:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return hashlib.sha1(f.read(length)).hexdigest()
@@ -0,0 +1,77 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+import duckdb
+
+from src.services.infrastructure.rows_query_builder import quote_identifier
+
+# Identifier-like names: `id`, `CUST_ID`, `order_key`, `invoice_no`, and
+# camel case ones such as `customerID` or `orderId`.
+_KEY_SUFFIX = re.compile(
+    r"(?:^|_)(?:id|key|code|uuid|guid|no|num|number)$", re.IGNORECASE
+)
+_CAMEL_KEY_SUFFIX = re.compile(r"[a-z0-9](?:ID|Id|Key|Code|Uuid|No|Num|Number)$")
+_KEY_TYPES = re.compile(r"^(?:VARCHAR|U?(?:TINY|SMALL|BIG|HUGE)?INT(?:EGER)?|UUID)$")
+# Share of distinct values from which an identifier column is treated as a key.
+_MIN_DISTINCT_RATIO = 0.95
+
+
+@dataclass(frozen=True)
+class KeyColumn:
+    column: str
+    distinct_ratio: float
+    unique: bool
+
+
+def is_key_name(column: str) -> bool:
+    """True for column names that look like identifiers."""
+    return bool(_KEY_SUFFIX.search(column) or _CAMEL_KEY_SUFFIX.search(column))
+
+
+def detect_keys(
+    conn: duckdb.DuckDBPyConnection,
+    table: str,
+    column_types: Dict[str, str],
+    rows: int,
+) -> List[KeyColumn]:
+    """Identifier columns of `table` whose values are (nearly) all distinct.
+
+    Only columns with an identifier-like name and an integer, string or UUID
+    type are counted, in a single scan.
+    """
+    candidates = [
+        column
+        for column, column_type in column_types.items()
+        if is_key_name(column) and _KEY_TYPES.match(column_type)
+    ]
+    if not candidates or rows == 0:
+        return []
+    counts = conn.execute(
+        "SELECT "
+        + ", ".join(
+            f"COUNT(DISTINCT {quote_identifier(c)}), COUNT({quote_identifier(c)})"
+            for c in candidates
+        )
+        + f" FROM {table}"
+    ).fetchone()
+    if counts is None:
+        return []
+    keys = []
+    for i, column in enumerate(candidates):
+        distinct, non_null = counts[2 * i], counts[2 * i + 1]
+        ratio = distinct / rows
+        if ratio >= _MIN_DISTINCT_RATIO:
+            keys.append(
+                KeyColumn(
+                    column=column,
+                    distinct_ratio=round(ratio, 4),
+                    unique=distinct == non_null == rows,
+                )
+            )
+    return keys
+
+
+def index_name(table: str, column: str) -> str:
+    """Catalog-wide name of the index on one key column of a dataset."""
+    return quote_identifier(f"{table}__{column}__key")
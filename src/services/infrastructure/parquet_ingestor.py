@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import duckdb
+
+from src.services.infrastructure.rows_query_builder import (
+    quote_identifier,
+    quote_literal,
+)
+
+PARQUET_ROW_IDENTITY = ["filename", "file_row_number"]
+
+
+def parquet_scan(path: Path, with_row_identity: bool = False) -> str:
+    """Return the `read_parquet(...)` expression scanning a file or a directory.
+
+    Directories are read recursively as one table, with hive partitioning
+    (`year=2024/month=01/`) turned into columns that DuckDB prunes on.
+    """
+    options = []
+    if path.is_dir():
+        target = str(path.resolve() / "**" / "*.parquet")
+        options += ["hive_partitioning = true", "union_by_name = true"]
+    else:
+        target = str(path.resolve())
+    if with_row_identity:
+        options += ["filename = true", "file_row_number = true"]
+    return f"read_parquet({', '.join([quote_literal(target)] + options)})"
+
+
+def register_parquet(conn: duckdb.DuckDBPyConnection, name: str, path: Path) -> None:
+    """(Re)create catalog view `name` over Parquet data, queried in place.
+
+    Nothing is copied: projection, filter pushdown and partition pruning are
+    applied by DuckDB's Parquet reader on every query against the view.
+    """
+    conn.execute(
+        f"CREATE OR REPLACE VIEW {quote_identifier(name)} AS "
+        f"SELECT * FROM {parquet_scan(path)}"
+    )
+
+
+def is_parquet_directory(path: Path) -> bool:
+    return path.is_dir() and any(path.rglob("*.parquet"))
@@ -0,0 +1,304 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src.exceptions.dataset.invalid_dataset_query_exception import (
+    InvalidDatasetQueryException,
+)
+from src.services.infrastructure.scalar_query import fetch_scalar
+
+_COMPARISON_OPERATORS = {
+    "eq": "=",
+    "ne": "<>",
+    "lt": "<",
+    "le": "<=",
+    "gt": ">",
+    "ge": ">=",
+}
+_FILTER_OPERATORS = set(_COMPARISON_OPERATORS) | {"contains", "in", "isnull", "notnull"}
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a column or table name for DuckDB."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quote_literal(value: str) -> str:
+    """Quote a string literal for DuckDB, where parameters are not allowed."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+@dataclass
+class RowFilter:
+    column: str
+    operator: str
+    value: Optional[str] = None
+
+
+@dataclass
+class SortKey:
+    column: str
+    descending: bool = False
+
+
+@dataclass
+class RowsQuery:
+    """A paged read over one catalog table, built from the rows endpoint parameters.
+
+    Rows are always ordered by `row_identity` last, non-null expressions that
+    make the order total (the rowid for tables, file name and row number for
+    views over Parquet files, which are scanned through `source` instead).
+    """
+
+    table: str
+    column_types: dict[str, str]
+    schema: Optional[str] = None
+    source: Optional[str] = None
+    row_identity: List[str] = field(default_factory=lambda: ["rowid"])
+    columns: List[str] = field(default_factory=list)
+    filters: List[RowFilter] = field(default_factory=list)
+    sort: List[SortKey] = field(default_factory=list)
+    offset: int = 0
+    limit: int = 100
+    cursor: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        for column in self.columns:
+            self._check_column(column)
+        for row_filter in self.filters:
+            self._check_column(row_filter.column)
+        for key in self.sort:
+            self._check_column(key.column)
+
+    def _check_column(self, column: str) -> None:
+        if column not in self.column_types:
+            raise InvalidDatasetQueryException(f"unknown column '{column}'")
+
+    @property
+    def selected_columns(self) -> List[str]:
+        return self.columns or list(self.column_types)
+
+    @property
+    def relation(self) -> str:
+        if self.source:
+            return self.source
+        table = quote_identifier(self.table)
+        return f"{quote_identifier(self.schema)}.{table}" if self.schema else table
+
+    @property
+    def sort_signature(self) -> str:
+        return ",".join(("-" if k.descending else "") + k.column for k in self.sort)
+
+    def build_page_sql(self) -> tuple[str, List[Any]]:
+        """Return (sql, params) selecting one page, with the row identity as tie-breaker."""
+        select_list = [quote_identifier(c) for c in self.selected_columns]
+        select_list += [
+            f"{quote_identifier(k.column)} AS {quote_identifier(f'__sort_{i}')}"
+            for i, k in enumerate(self.sort)
+        ]
+        select_list += [
+            f"{expression} AS __row_{i}"
+            for i, expression in enumerate(self.row_identity)
+        ]
+
+        where, params = self._build_where()
+        if self.cursor:
+            cursor_sql, cursor_params = self._build_cursor_condition()
+            where.append(cursor_sql)
+            params += cursor_params
+
+        order_by = [
+            f"{quote_identifier(k.column)} {'DESC' if k.descending else 'ASC'} NULLS LAST"
+            for k in self.sort
+        ]
+        order_by += [f"{expression} ASC" for expression in self.row_identity]
+
+        sql = f"SELECT {', '.join(select_list)} FROM {self.relation}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {', '.join(order_by)} LIMIT ?"
+        params.append(self.limit)
+        if not self.cursor:
+            sql += " OFFSET ?"
+            params.append(self.offset)
+        return sql, params
+
+    def build_count_sql(self) -> tuple[str, List[Any]]:
+        """Return (sql, params) counting the rows matching the filters."""
+        where, params = self._build_where()
+        sql = f"SELECT COUNT(*) FROM {self.relation}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params
+
+    def fetch_page(self, conn: duckdb.DuckDBPyConnection) -> Dict[str, Any]:
+        """Run the page and count queries on `conn` and build the page payload.
+
+        Each full page returns a `next_cursor` pointing right after its last row.
+        """
+        page_sql, page_params = self.build_page_sql()
+        count_sql, count_params = self.build_count_sql()
+        try:
+            page = conn.execute(page_sql, page_params).fetchdf()
+            total_rows = fetch_scalar(conn, count_sql, count_params)
+        except duckdb.ConversionException as e:
+            raise InvalidDatasetQueryException(str(e).splitlines()[0])
+
+        sort_columns = [f"__sort_{i}" for i in range(len(self.sort))]
+        identity_columns = [f"__row_{i}" for i in range(len(self.row_identity))]
+        next_cursor = None
+        if len(page) == self.limit:
+            last = [
+                _cursor_value(value)
+                for value in page.iloc[-1][sort_columns + identity_columns]
+            ]
+            next_cursor = self.encode_cursor(
+                last[: len(sort_columns)], last[len(sort_columns) :]
+            )
+
+        page = page[self.selected_columns]
+        return {
+            "columns": self.selected_columns,
+            "rows": json.loads(page.to_json(orient="records", date_format="iso")),
+            "offset": 0 if self.cursor else self.offset,
+            "limit": self.limit,
+            "total_rows": total_rows,
+            "next_cursor": next_cursor,
+        }
+
+    def encode_cursor(self, sort_values: List[Any], identity: List[Any]) -> str:
+        payload = json.dumps(
+            {"s": self.sort_signature, "k": sort_values, "r": identity}, default=str
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def _decode_cursor(self) -> tuple[List[Any], List[Any]]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(self.cursor or ""))
+            values, identity = list(payload["k"]), list(payload["r"])
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise InvalidDatasetQueryException("malformed cursor")
+        if (
+            payload.get("s") != self.sort_signature
+            or len(values) != len(self.sort)
+            or len(identity) != len(self.row_identity)
+        ):
+            raise InvalidDatasetQueryException("cursor does not match the sort order")
+        return values, identity
+
+    def _cast(self, column: str) -> str:
+        return f"CAST(? AS {self.column_types[column]})"
+
+    def _build_where(self) -> tuple[List[str], List[Any]]:
+        conditions: List[str] = []
+        params: List[Any] = []
+        for row_filter in self.filters:
+            column = quote_identifier(row_filter.column)
+            op = row_filter.operator
+            if op == "isnull":
+                conditions.append(f"{column} IS NULL")
+            elif op == "notnull":
+                conditions.append(f"{column} IS NOT NULL")
+            elif op == "contains":
+                conditions.append(f"CAST({column} AS VARCHAR) ILIKE ? ESCAPE '\\'")
+                escaped = (
+                    (row_filter.value or "")
+                    .replace("\\", "\\\\")
+                    .replace("%", "\\%")
+                    .replace("_", "\\_")
+                )
+                params.append(f"%{escaped}%")
+            elif op == "in":
+                values = (row_filter.value or "").split(",")
+                placeholders = ", ".join(self._cast(row_filter.column) for _ in values)
+                conditions.append(f"{column} IN ({placeholders})")
+                params += values
+            else:
+                conditions.append(
+                    f"{column} {_COMPARISON_OPERATORS[op]} {self._cast(row_filter.column)}"
+                )
+                params.append(row_filter.value)
+        return conditions, params
+
+    def _build_cursor_condition(self) -> tuple[str, List[Any]]:
+        """Keyset condition "row comes after the cursor" for ORDER BY keys NULLS LAST, row identity."""
+        values, identity = self._decode_cursor()
+        branches: List[str] = []
+        params: List[Any] = []
+        prefix: List[str] = []
+        prefix_params: List[Any] = []
+
+        for key, value in zip(self.sort, values):
+            column = quote_identifier(key.column)
+            if value is not None:
+                op = "<" if key.descending else ">"
+                branches.append(
+                    " AND ".join(
+                        prefix
+                        + [
+                            f"({column} {op} {self._cast(key.column)} OR {column} IS NULL)"
+                        ]
+                    )
+                )
+                params += prefix_params + [value]
+                prefix.append(f"{column} = {self._cast(key.column)}")
+                prefix_params.append(value)
+            else:
+                prefix.append(f"{column} IS NULL")
+
+        for expression, value in zip(self.row_identity, identity):
+            branches.append(" AND ".join(prefix + [f"{expression} > ?"]))
+            params += prefix_params + [value]
+            prefix.append(f"{expression} = ?")
+            prefix_params.append(value)
+
+        return "(" + " OR ".join(f"({b})" for b in branches) + ")", params
+
+
+def _cursor_value(value: Any) -> Any:
+    """Exact JSON value of one cursor key; floats keep all their digits."""
+    if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def parse_filters(raw_filters: List[str]) -> List[RowFilter]:
+    """Parse `column:operator[:value]` strings into filters."""
+    filters: List[RowFilter] = []
+    for raw in raw_filters:
+        parts = raw.split(":", 2)
+        if len(parts) < 2 or parts[1] not in _FILTER_OPERATORS:
+            raise InvalidDatasetQueryException(
+                f"filter '{raw}' must look like column:operator:value, operators: "
+                + ", ".join(sorted(_FILTER_OPERATORS))
+            )
+        column, operator = parts[0], parts[1]
+        value = parts[2] if len(parts) == 3 else None
+        if value is None and operator not in ("isnull", "notnull"):
+            raise InvalidDatasetQueryException(f"filter '{raw}' is missing a value")
+        filters.append(RowFilter(column=column, operator=operator, value=value))
+    return filters
+
+
+def parse_sort(raw_sort: Optional[str]) -> List[SortKey]:
+    """Parse `col1,-col2` into sort keys, a leading '-' meaning descending."""
+    if not raw_sort:
+        return []
+    keys: List[SortKey] = []
+    for item in raw_sort.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        descending = item.startswith("-")
+        keys.append(SortKey(column=item.lstrip("-"), descending=descending))
+    return keys
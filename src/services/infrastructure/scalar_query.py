@@ -0,0 +1,16 @@
+from typing import Any, Optional, Sequence
+
+import duckdb
+
+
+def fetch_scalar(
+    conn: duckdb.DuckDBPyConnection,
+    sql: str,
+    parameters: Optional[Sequence[Any]] = None,
+) -> Any:
+    """Run `sql`, which returns one row (a count, a setting, a serialized
+    statement...), and return its first column."""
+    row = conn.execute(sql, parameters).fetchone()
+    if row is None:
+        raise duckdb.InvalidInputException(f"expected one row from: {sql}")
+    return row[0]
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import re
+from typing import List
+
+import duckdb
+
+from src.services.infrastructure.scalar_query import fetch_scalar
+
+_CONSTANTS = {duckdb.token_type.numeric_const, duckdb.token_type.string_const}
+_VALUE_LISTS = re.compile(r"\?(?: , \?)+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Return the shape of a query: constants as `?`, keywords upper-cased,
+    unquoted identifiers lower-cased, comments and extra whitespace dropped.
+
+    Queries differing only by their literal values share the same shape.
+    """
+    tokens = duckdb.tokenize(sql)
+    parts: List[str] = []
+    previous = None
+    for i, (start, kind) in enumerate(tokens):
+        end = tokens[i + 1][0] if i + 1 < len(tokens) else len(sql)
+        text = sql[start:end].strip()
+        if kind in _CONSTANTS:
+            text = "?"
+        else:
+            text = re.split(r"--|/\*", text, maxsplit=1)[0].strip()
+        if kind == duckdb.token_type.keyword:
+            text = text.upper()
+        elif kind == duckdb.token_type.identifier and not text.startswith('"'):
+            text = text.lower()
+        if text == "(" and previous == duckdb.token_type.identifier and parts:
+            parts[-1] += text  # function call
+        elif text:
+            parts.append(text)
+        previous = kind
+    shape = _VALUE_LISTS.sub("?, ...", " ".join(parts))
+    return re.sub(r"\( | \)| (?=[,;])", lambda m: m.group().strip(), shape)
+
+
+def fingerprint(shape: str) -> str:
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+def referenced_tables(sql: str) -> List[str]:
+    """Tables and views read by a query, or none when it does not parse."""
+    try:
+        return sorted(duckdb.get_table_names(sql))
+    except duckdb.Error:
+        return []
+
+
+def is_ordered(sql: str) -> bool:
+    """True when the result order of a query is set by its outer ORDER BY."""
+    with duckdb.connect() as conn:
+        parsed = json.loads(fetch_scalar(conn, "SELECT json_serialize_sql(?)", [sql]))
+    if parsed.get("error") or len(parsed["statements"]) != 1:
+        return False
+    modifiers = parsed["statements"][0]["node"].get("modifiers", [])
+    return any(modifier["type"] == "ORDER_MODIFIER" for modifier in modifiers)
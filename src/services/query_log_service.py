@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from src.services.infrastructure.sql_shape import (
+    fingerprint,
+    normalize_sql,
+    referenced_tables,
+)
+
+
+@dataclass
+class QueryShapeStats:
+    fingerprint: str
+    normalized_sql: str
+    tables: List[str]
+    count: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: str = ""
+    last_sql: str = ""
+    plan: Optional[str] = None
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class QueryLogService:
+    """Append-only log of executed queries, aggregated by query shape.
+
+    Every execution is appended as one JSON line (`"kind": "query"`). The
+    first time a shape runs above `slow_query_ms`, its profiled plan is
+    captured in the background with EXPLAIN ANALYZE and appended as a
+    `"kind": "plan"` line. Aggregates are rebuilt from the file on startup.
+    """
+
+    def __init__(self, path: str = "logs/query_log.jsonl", slow_query_ms: float = 1000):
+        self._path = Path(path)
+        self._slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._shapes: Dict[str, QueryShapeStats] = {}
+        self._profiling: Set[str] = set()
+        self._profiler = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="query-profile"
+        )
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._replay()
+
+    def record(
+        self,
+        sql: str,
+        duration_ms: float,
+        rows: Optional[int],
+        session_id: Optional[str] = None,
+        error: Optional[str] = None,
+        profile: Optional[Callable[[str], str]] = None,
+    ) -> None:
+        """Log one execution; `profile(sql)` returns its EXPLAIN ANALYZE plan."""
+        shape = normalize_sql(sql)
+        record = {
+            "kind": "query",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "fingerprint": fingerprint(shape),
+            "normalized_sql": shape,
+            "sql": sql,
+            "tables": referenced_tables(sql),
+            "duration_ms": round(duration_ms, 3),
+            "rows": rows,
+            "session_id": session_id,
+            "error": error,
+        }
+        with self._lock:
+            self._append(record)
+            stats = self._apply(record)
+            capture = (
+                profile is not None
+                and error is None
+                and duration_ms >= self._slow_query_ms
+                and stats.plan is None
+                and stats.fingerprint not in self._profiling
+            )
+            if capture:
+                self._profiling.add(stats.fingerprint)
+        if capture and profile is not None:
+            self._profiler.submit(self._capture_plan, stats.fingerprint, sql, profile)
+
+    def slowest(self, limit: int = 10) -> List[QueryShapeStats]:
+        with self._lock:
+            shapes = list(self._shapes.values())
+        return sorted(shapes, key=lambda s: s.max_ms, reverse=True)[:limit]
+
+    def most_frequent(self, limit: int = 10) -> List[QueryShapeStats]:
+        with self._lock:
+            shapes = list(self._shapes.values())
+        return sorted(shapes, key=lambda s: s.count, reverse=True)[:limit]
+
+    def wait_for_profiles(self) -> None:
+        """Block until pending plan captures are written (tests, shutdown)."""
+        self._profiler.submit(lambda: None).result()
+
+    def _capture_plan(
+        self, shape_id: str, sql: str, profile: Callable[[str], str]
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            plan = profile(sql)
+        except Exception as e:
+            plan = f"Profiling failed: {e}"
+        record = {
+            "kind": "plan",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "fingerprint": shape_id,
+            "profile_ms": round((time.perf_counter() - started) * 1000, 3),
+            "plan": plan,
+        }
+        with self._lock:
+            self._append(record)
+            self._apply(record)
+            self._profiling.discard(shape_id)
+
+    def _apply(self, record: Dict[str, Any]) -> QueryShapeStats:
+        shapes = self._shapes
+        if record["kind"] == "plan":
+            stats = shapes[record["fingerprint"]]
+            stats.plan = record["plan"]
+            return stats
+        stats = shapes.setdefault(
+            record["fingerprint"],
+            QueryShapeStats(
+                fingerprint=record["fingerprint"],
+                normalized_sql=record["normalized_sql"],
+                tables=record["tables"],
+            ),
+        )
+        stats.count += 1
+        stats.errors += record["error"] is not None
+        stats.total_ms += record["duration_ms"]
+        stats.max_ms = max(stats.max_ms, record["duration_ms"])
+        stats.last_seen = record["timestamp"]
+        stats.last_sql = record["sql"]
+        return stats
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def _replay(self) -> None:
+        if not self._path.exists():
+            return
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if (
+                        record["kind"] == "plan"
+                        and record["fingerprint"] not in self._shapes
+                    ):
+                        continue
+                    self._apply(record)
+                except (json.JSONDecodeError, KeyError):
+                    continue  # torn last line after a crash
@@ -0,0 +1,421 @@
+import io
+import json
+import math
+import threading
+import time
+from contextlib import ExitStack, closing, contextmanager, nullcontext
+from functools import partial
+from typing import Any, Iterator, Optional, Tuple
+
+import duckdb
+import pandas as pd
+
+from src.exceptions.query.invalid_query_exception import InvalidQueryException
+from src.exceptions.query.query_limit_exceeded_exception import (
+    QueryLimitExceededException,
+)
+from src.exceptions.session.run_cancelled_exception import RunCancelledException
+from src.services.dataset_service import CATALOG_DATABASE, DatasetService
+from src.services.infrastructure.cancellation import Cancellation
+from src.services.infrastructure.rows_query_builder import quote_literal
+from src.services.infrastructure.scalar_query import fetch_scalar
+from src.services.query_log_service import QueryLogService
+from src.services.sample_service import SAMPLE_SCHEMA
+from src.services.session_table_service import SessionTableService
+
+# Table functions queries may call; file readers and catalog listings are not.
+_ALLOWED_TABLE_FUNCTIONS = {"range", "generate_series", "unnest"}
+# FROM clause items queries may use. Anything else, such as the SHOW_REF of
+# `(SHOW ALL TABLES)`, `(DESCRIBE t)` or `(SUMMARIZE t)`, is refused.
+_ALLOWED_TABLE_REFS = {
+    "BASE_TABLE",
+    "TABLE_FUNCTION",
+    "SUBQUERY",
+    "JOIN",
+    "EXPRESSION_LIST",
+    "PIVOT",
+    "EMPTY",
+}
+
+
+class QueryService:
+    """Runs read-only SQL against the shared dataset catalog.
+
+    Single entry point for both the agent `query_data` tool and the direct
+    query API, so every limit applied here applies to both paths:
+
+    - a pre-flight EXPLAIN rejects plans estimated above `max_estimated_rows`;
+    - execution is interrupted after `timeout_seconds`;
+    - `memory_limit` and `threads` cap the DuckDB instance as a whole;
+    - queries only read the datasets and the tables saved by their session:
+      file access is limited to the data directory and other schemas, catalog
+      listings and file readers are refused.
+    """
+
+    def __init__(
+        self,
+        dataset_service: DatasetService,
+        rows_per_batch: int = 2048,
+        timeout_seconds: float = 30.0,
+        max_estimated_rows: int = 50_000_000,
+        memory_limit: Optional[str] = None,
+        threads: Optional[int] = None,
+        query_log: Optional[QueryLogService] = None,
+        session_tables: Optional[SessionTableService] = None,
+    ):
+        self._dataset_service = dataset_service
+        self._rows_per_batch = rows_per_batch
+        self._timeout_seconds = timeout_seconds
+        self._max_estimated_rows = max_estimated_rows
+        self._query_log = query_log
+        self._session_tables = session_tables
+        with self._dataset_service.cursor() as conn:
+            if memory_limit:
+                conn.execute(f"SET memory_limit = {quote_literal(memory_limit)}")
+            if threads:
+                conn.execute(f"SET threads = {int(threads)}")
+        self._dataset_service.restrict_file_access()
+
+    @staticmethod
+    def validate(sql: str) -> str:
+        """Ensure `sql` is exactly one SELECT statement and return it."""
+        try:
+            statements = duckdb.extract_statements(sql)
+        except duckdb.Error as e:
+            raise InvalidQueryException(str(e).splitlines()[0])
+        if len(statements) != 1:
+            raise InvalidQueryException("expected exactly one SQL statement")
+        if statements[0].type.name != "SELECT":
+            raise InvalidQueryException("only SELECT statements are allowed")
+        return statements[0].query
+
+    def execute(
+        self,
+        sql: str,
+        session_id: Optional[str] = None,
+        cancellation: Optional[Cancellation] = None,
+        sampled: bool = False,
+        rewritten: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Run a read-only query and return the full result.
+
+        Tables saved by the session are visible to the query, and the execution
+        is recorded in the query log, when one is configured. Cancelling
+        `cancellation` interrupts the query. With `sampled`, datasets that
+        have a sample are read from it (see `SampleService`). `rewritten` is
+        an equivalent query to run instead (see `RollupService`); the log
+        records `sql`.
+        """
+        started = time.perf_counter()
+        df, error = None, None
+        try:
+            statement = self.validate(sql)
+            with self._cursor(session_id, sampled) as conn, self._deadline(
+                conn, cancellation
+            ):
+                self._authorize(conn, statement, session_id)
+                self._run_rewritten(conn, statement, rewritten)
+                df = conn.fetchdf()
+            return df
+        except (
+            InvalidQueryException,
+            QueryLimitExceededException,
+            RunCancelledException,
+        ) as e:
+            error = str(e)  # not a completed run: no slow query profile
+            raise
+        finally:
+            if self._query_log is not None:
+                self._query_log.record(
+                    sql,
+                    duration_ms=(time.perf_counter() - started) * 1000,
+                    rows=len(df) if df is not None else None,
+                    session_id=session_id,
+                    error=error,
+                    profile=partial(self.explain_analyze, session_id=session_id),
+                )
+
+    def explain_analyze(self, sql: str, session_id: Optional[str] = None) -> str:
+        """Run `sql` with profiling and return its annotated plan."""
+        statement = self.validate(sql)
+        with self._cursor(session_id) as conn, self._deadline(conn):
+            self._authorize(conn, statement, session_id)
+            return conn.execute(f"EXPLAIN ANALYZE {statement}").fetchall()[0][1]
+
+    def _cursor(
+        self, session_id: Optional[str] = None, sampled: bool = False
+    ) -> duckdb.DuckDBPyConnection:
+        conn = self._dataset_service.cursor()
+        search_path = None
+        if self._session_tables is not None:
+            search_path = self._session_tables.search_path(session_id)
+        if sampled:
+            # Sample tables shadow the datasets they were drawn from.
+            search_path = f"{CATALOG_DATABASE}.{SAMPLE_SCHEMA}," + (
+                search_path or f"{CATALOG_DATABASE}.main"
+            )
+        if search_path:
+            conn.execute(f"SET search_path = {quote_literal(search_path)}")
+        return conn
+
+    def stream_ndjson(self, sql: str) -> Iterator[bytes]:
+        """Validate and start `sql`, then lazily yield its rows as NDJSON chunks."""
+        relation, scope = self._open(sql)
+        return self._iter_ndjson(relation, scope)
+
+    def stream_arrow(self, sql: str) -> Iterator[bytes]:
+        """Validate and start `sql`, then lazily yield an Arrow IPC stream."""
+        relation, scope = self._open(sql)
+        return self._iter_arrow(relation, scope)
+
+    def _open(self, sql: str) -> Tuple[duckdb.DuckDBPyRelation, ExitStack]:
+        """Start streaming `sql`.
+
+        The query executes while its rows are fetched: the returned scope keeps
+        the deadline running and closes the cursor once the stream ends.
+        """
+        statement = self.validate(sql)
+        conn = self._dataset_service.cursor()
+        with ExitStack() as scope:
+            scope.enter_context(closing(conn))
+            scope.enter_context(self._deadline(conn))
+            self._authorize(conn, statement)
+            try:
+                self._check_plan(conn, statement)
+                relation = conn.sql(statement)
+            except duckdb.InterruptException:
+                raise
+            except duckdb.Error as e:
+                raise InvalidQueryException(str(e).splitlines()[0])
+            stream_scope = scope.pop_all()
+        return relation, stream_scope
+
+    def _authorize(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        statement: str,
+        session_id: Optional[str] = None,
+    ) -> None:
+        """Refuse tables other than the datasets, the session's saved tables and
+        the query's own CTEs, table functions other than generators and any
+        other kind of FROM item. A query that can't be inspected is refused."""
+        try:
+            parsed = json.loads(
+                fetch_scalar(conn, "SELECT json_serialize_sql(?)", [statement])
+            )
+        except duckdb.Error as e:
+            raise InvalidQueryException(str(e).splitlines()[0])
+        if parsed.get("error"):
+            raise InvalidQueryException(
+                parsed.get("error_message") or "the query could not be inspected"
+            )
+        datasets = {name.lower() for name in self._dataset_service.metadata}
+        schema, saved = None, set()
+        if self._session_tables is not None and session_id:
+            schema = self._session_tables.schema_for(session_id)
+            saved = {t.name for t in self._session_tables.list_tables(session_id)}
+        ctes = set(_cte_names(parsed))
+        for node in _table_refs(parsed):
+            if node["type"] not in _ALLOWED_TABLE_REFS:
+                raise InvalidQueryException(
+                    "only tables, subqueries and generators can be queried: "
+                    "catalog listings (SHOW, DESCRIBE, SUMMARIZE) are not allowed"
+                )
+            if node["type"] == "TABLE_FUNCTION":
+                function = node["function"].get("function_name", "").lower()
+                if function not in _ALLOWED_TABLE_FUNCTIONS:
+                    raise InvalidQueryException(
+                        f"the table function '{function}' is not allowed, "
+                        "query the datasets by name"
+                    )
+                continue
+            if node["type"] != "BASE_TABLE":
+                continue  # subqueries, joins and pivots: their items are walked
+            catalog = node["catalog_name"].lower()
+            table_schema = node["schema_name"].lower()
+            name = node["table_name"].lower()
+            if catalog not in ("", CATALOG_DATABASE):
+                allowed = False
+            elif table_schema == "":
+                allowed = name in datasets or name in saved or name in ctes
+            elif table_schema == "main":
+                allowed = name in datasets
+            else:
+                allowed = table_schema == schema and name in saved
+            if not allowed:
+                raise InvalidQueryException(
+                    f"unknown table '{node['table_name']}': only the datasets and "
+                    "the tables saved in this session can be queried"
+                )
+
+    def _run_rewritten(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        statement: str,
+        rewritten: Optional[str],
+    ) -> None:
+        if rewritten is not None:
+            try:
+                self._run(conn, rewritten)
+                return
+            except InvalidQueryException:
+                pass  # the rollup was dropped meanwhile: run the query as written
+        self._run(conn, statement)
+
+    def _run(self, conn: duckdb.DuckDBPyConnection, statement: str) -> None:
+        try:
+            self._check_plan(conn, statement)
+            conn.execute(statement)
+        except duckdb.InterruptException:
+            raise
+        except duckdb.Error as e:
+            raise InvalidQueryException(str(e).splitlines()[0])
+
+    @contextmanager
+    def _deadline(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        cancellation: Optional[Cancellation] = None,
+    ) -> Iterator[None]:
+        """Interrupt `conn` once the wall-clock timeout is reached, or when
+        `cancellation` is cancelled."""
+        if cancellation is not None:
+            cancellation.raise_if_cancelled()
+        timer = threading.Timer(self._timeout_seconds, conn.interrupt)
+        timer.start()
+        try:
+            with (
+                cancellation.on_cancel(conn.interrupt)
+                if cancellation
+                else nullcontext()
+            ):
+                yield
+        except duckdb.InterruptException:
+            if cancellation is not None and cancellation.cancelled:
+                raise RunCancelledException("the query was interrupted")
+            raise QueryLimitExceededException(
+                f"the query ran longer than {self._timeout_seconds:g}s and was "
+                "cancelled. Rewrite it to scan less data: filter early, "
+                "aggregate, avoid recursive CTEs and self joins on large tables"
+            )
+        finally:
+            timer.cancel()
+
+    def _check_plan(self, conn: duckdb.DuckDBPyConnection, statement: str) -> None:
+        """Reject the query when any operator is estimated above the row budget."""
+        plan = conn.execute(f"EXPLAIN (FORMAT json) {statement}").fetchall()[0][1]
+        estimated = max(_estimated_cardinalities(json.loads(plan)), default=0)
+        if estimated > self._max_estimated_rows:
+            raise QueryLimitExceededException(
+                f"the plan is estimated to produce ~{estimated:,} rows "
+                f"(limit {self._max_estimated_rows:,}). Rewrite it: add WHERE "
+                "filters, aggregate with GROUP BY, or check join conditions "
+                "for an accidental cross join"
+            )
+
+    def _iter_ndjson(
+        self, relation: duckdb.DuckDBPyRelation, scope: ExitStack
+    ) -> Iterator[bytes]:
+        with scope:
+            while True:
+                chunk = relation.fetch_df_chunk()
+                if chunk.empty:
+                    break
+                yield chunk.to_json(
+                    orient="records", lines=True, date_format="iso"
+                ).encode()
+
+    def _iter_arrow(
+        self, relation: duckdb.DuckDBPyRelation, scope: ExitStack
+    ) -> Iterator[bytes]:
+        import pyarrow as pa
+
+        with scope:
+            reader = relation.fetch_arrow_reader(self._rows_per_batch)
+            sink = io.BytesIO()
+            with pa.ipc.new_stream(sink, reader.schema) as writer:
+                for batch in _batches(reader):
+                    writer.write_batch(batch)
+                    yield self._drain(sink)
+            yield self._drain(sink)
+
+    @staticmethod
+    def _drain(sink: io.BytesIO) -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+
+def _batches(reader: Any) -> Iterator[Any]:
+    """Iterate an Arrow reader over a DuckDB stream.
+
+    Arrow reports an interrupted stream as an OSError: raise it as the DuckDB
+    interrupt instead, so the deadline turns it into a timeout.
+    """
+    try:
+        yield from reader
+    except OSError as e:
+        if "INTERRUPT" not in str(e):
+            raise
+        raise duckdb.InterruptException(str(e)) from e
+
+
+def _table_refs(value: Any) -> Iterator[dict]:
+    """Yield every FROM item of a serialized query, subqueries included.
+
+    FROM items are the `from_table` of query nodes, the sides of a join and
+    the source of a pivot.
+    """
+    if isinstance(value, list):
+        for item in value:
+            yield from _table_refs(item)
+    elif isinstance(value, dict):
+        refs = [value.get("from_table")]
+        if "class" not in value and value.get("type") == "JOIN":
+            refs += [value.get("left"), value.get("right")]
+        if "class" not in value and value.get("type") == "PIVOT":
+            refs.append(value.get("source"))
+        for ref in refs:
+            if isinstance(ref, dict):
+                yield ref
+        for item in value.values():
+            yield from _table_refs(item)
+
+
+def _cte_names(value: Any) -> Iterator[str]:
+    if isinstance(value, list):
+        for item in value:
+            yield from _cte_names(item)
+    elif isinstance(value, dict):
+        for entry in value.get("cte_map", {}).get("map", []):
+            yield entry["key"].lower()
+        for item in value.values():
+            yield from _cte_names(item)
+
+
+def _estimated_cardinalities(nodes: list) -> Iterator[int]:
+    """Yield the estimated output rows of every operator of an EXPLAIN plan."""
+    for node in nodes:
+        yield from _estimate(node)
+
+
+def _estimate(node: dict) -> Iterator[int]:
+    """Yield the estimates of a subtree, the node's own estimate last.
+
+    DuckDB leaves cross products without an estimate: use the product of
+    their inputs instead.
+    """
+    children = []
+    for child in node.get("children", []):
+        estimates = list(_estimate(child))
+        yield from estimates
+        children.append(estimates[-1] if estimates else 0)
+
+    estimate = str(node.get("extra_info", {}).get("Estimated Cardinality", ""))
+    if estimate.lstrip("~").isdigit():
+        yield int(estimate.lstrip("~"))
+    elif node.get("name", "").strip() == "CROSS_PRODUCT" and children:
+        yield math.prod(children)
+    elif children:
+        yield max(children)
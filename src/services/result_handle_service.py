@@ -0,0 +1,212 @@
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.exceptions.session.result_handle_not_found_exception import (
+    ResultHandleNotFoundException,
+)
+from src.services.dataset_service import DatasetService
+from src.services.infrastructure.rows_query_builder import (
+    RowFilter,
+    RowsQuery,
+    SortKey,
+    quote_identifier,
+)
+from src.services.infrastructure.sql_shape import is_ordered
+from src.services.query_service import QueryService
+
+RESULTS_SCHEMA = "results"
+
+
+@dataclass
+class ResultHandle:
+    handle_id: str
+    sql: str
+    columns: List[str]
+    rows: int
+    nbytes: int
+    column_types: Dict[str, str]
+    materialized: bool = True
+    # Re-executing the SQL gives the same rows in the same order.
+    replayable: bool = True
+
+
+class ResultHandleService:
+    """Keeps agent query results addressable by handle id, per session.
+
+    Results are materialized as tables in a dedicated schema of the catalog.
+    When a session, or all sessions together, go over their memory budget
+    the least recently used results are dropped. Results of queries with an
+    outer ORDER BY are transparently re-executed from their SQL when they are
+    read again; the others could come back in another order and are
+    forgotten instead.
+    """
+
+    def __init__(
+        self,
+        dataset_service: DatasetService,
+        query_service: QueryService,
+        max_bytes_per_session: int = 256 * 1024 * 1024,
+        max_bytes_total: int = 1024 * 1024 * 1024,
+    ) -> None:
+        self._dataset_service = dataset_service
+        self._query_service = query_service
+        self._max_bytes_per_session = max_bytes_per_session
+        self._max_bytes_total = max_bytes_total
+        self._handles: Dict[str, OrderedDict[str, ResultHandle]] = {}
+        # Session of every handle, least recently used first.
+        self._recent: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        with self._dataset_service.cursor() as conn:
+            conn.execute(f"CREATE SCHEMA IF NOT EXISTS {RESULTS_SCHEMA}")
+
+    def register(self, session_id: str, sql: str, df: pd.DataFrame) -> ResultHandle:
+        """Store a query result for a session and return its handle."""
+        handle_id = uuid.uuid4().hex
+        column_types = self._materialize(handle_id, df)
+        handle = ResultHandle(
+            handle_id=handle_id,
+            sql=sql,
+            columns=df.columns.tolist(),
+            rows=len(df),
+            nbytes=int(df.memory_usage(deep=True).sum()),
+            column_types=column_types,
+            replayable=is_ordered(sql),
+        )
+        with self._lock:
+            self._handles.setdefault(session_id, OrderedDict())[handle_id] = handle
+            self._recent[handle_id] = session_id
+            self._evict(session_id)
+        return handle
+
+    def adopt(self, session_id: str, handle: ResultHandle) -> ResultHandle:
+        """Register another session's result under a new id, re-executed on first read."""
+        adopted = ResultHandle(
+            handle_id=uuid.uuid4().hex,
+            sql=handle.sql,
+            columns=handle.columns,
+            rows=handle.rows,
+            nbytes=handle.nbytes,
+            column_types=handle.column_types,
+            materialized=False,
+            replayable=handle.replayable,
+        )
+        with self._lock:
+            self._handles.setdefault(session_id, OrderedDict())[
+                adopted.handle_id
+            ] = adopted
+            self._recent[adopted.handle_id] = session_id
+        return adopted
+
+    def get_handle(self, session_id: str, handle_id: str) -> ResultHandle:
+        with self._lock:
+            handles = self._handles.get(session_id)
+            handle = handles.get(handle_id) if handles is not None else None
+        if handle is None:
+            raise ResultHandleNotFoundException(handle_id)
+        return handle
+
+    def get_rows(
+        self,
+        session_id: str,
+        handle_id: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[List[RowFilter]] = None,
+        sort: Optional[List[SortKey]] = None,
+        offset: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Read one page of a stored result, re-executing it if it was evicted."""
+        handle = self.get_handle(session_id, handle_id)
+        if not handle.materialized:
+            df = self._query_service.execute(handle.sql, session_id)
+            handle.column_types = self._materialize(handle_id, df)
+            handle.materialized = True
+        with self._lock:
+            handles = self._handles.get(session_id)
+            if handles is None or handle_id not in handles:
+                # The session was deleted, or the result forgotten, meanwhile.
+                self._drop_table(handle_id)
+                raise ResultHandleNotFoundException(handle_id)
+            handles.move_to_end(handle_id)
+            self._recent.move_to_end(handle_id)
+            self._evict(session_id)
+
+        query = RowsQuery(
+            table=handle_id,
+            schema=RESULTS_SCHEMA,
+            column_types=handle.column_types,
+            columns=columns or [],
+            filters=filters or [],
+            sort=sort or [],
+            offset=offset,
+            limit=limit,
+            cursor=cursor,
+        )
+        with self._dataset_service.cursor() as conn:
+            return {"handle_id": handle_id, **query.fetch_page(conn)}
+
+    def drop_session(self, session_id: str) -> None:
+        """Forget every result of a session and free its tables."""
+        with self._lock:
+            handles: Dict[str, ResultHandle] = self._handles.pop(session_id, {})
+            for handle_id in handles:
+                self._recent.pop(handle_id, None)
+        for handle in handles.values():
+            if handle.materialized:
+                self._drop_table(handle.handle_id)
+
+    def _evict(self, session_id: str) -> None:
+        """Drop the oldest materialized results until the session, then all
+        sessions together, fit their budget."""
+        self._drop_oldest(
+            [(session_id, h) for h in self._handles[session_id].values()],
+            self._max_bytes_per_session,
+        )
+        self._drop_oldest(
+            [(s, self._handles[s][handle_id]) for handle_id, s in self._recent.items()],
+            self._max_bytes_total,
+        )
+
+    def _drop_oldest(
+        self, handles: List[Tuple[str, ResultHandle]], max_bytes: int
+    ) -> None:
+        """Drop materialized `handles` but the last one, oldest first, until they
+        fit `max_bytes`. Handles that can't be replayed are forgotten."""
+        materialized = [(s, h) for s, h in handles if h.materialized]
+        total = sum(h.nbytes for _, h in materialized)
+        for session_id, handle in materialized[:-1]:
+            if total <= max_bytes:
+                break
+            self._drop_table(handle.handle_id)
+            handle.materialized = False
+            total -= handle.nbytes
+            if not handle.replayable:
+                del self._handles[session_id][handle.handle_id]
+                del self._recent[handle.handle_id]
+
+    def _materialize(self, handle_id: str, df: pd.DataFrame) -> Dict[str, str]:
+        table = f"{RESULTS_SCHEMA}.{quote_identifier(handle_id)}"
+        with self._dataset_service.cursor() as conn:
+            conn.register("_incoming_result", df)
+            conn.execute(
+                f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM _incoming_result"
+            )
+            conn.unregister("_incoming_result")
+            return {
+                column: column_type
+                for column, column_type, *_ in conn.execute(
+                    f"DESCRIBE {table}"
+                ).fetchall()
+            }
+
+    def _drop_table(self, handle_id: str) -> None:
+        with self._dataset_service.cursor() as conn:
+            conn.execute(
+                f"DROP TABLE IF EXISTS {RESULTS_SCHEMA}.{quote_identifier(handle_id)}"
+            )
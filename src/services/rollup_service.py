@@ -0,0 +1,537 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import duckdb
+
+from src.services.dataset_service import CATALOG_DATABASE, DatasetService
+from src.services.infrastructure.rows_query_builder import quote_identifier
+from src.services.infrastructure.scalar_query import fetch_scalar
+from src.services.query_log_service import QueryLogService
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_SCHEMA = "rollups"
+
+# Aggregates a rollup can answer, and how a query aggregate is recomputed
+# from the partial aggregates stored per group.
+_REAGGREGATE = {
+    "count_star": "COALESCE(CAST(sum({count_star}) AS BIGINT), 0)",
+    "count": "COALESCE(CAST(sum({count}) AS BIGINT), 0)",
+    "sum": "sum({sum})",
+    "min": "min({min})",
+    "max": "max({max})",
+    "avg": "CAST(sum({sum}) AS DOUBLE) / sum({count})",
+}
+_PARTIALS = {
+    "count_star": ("count_star",),
+    "count": ("count",),
+    "sum": ("sum",),
+    "min": ("min",),
+    "max": ("max",),
+    "avg": ("sum", "count"),
+}
+_UNSUPPORTED_CLASSES = {"SUBQUERY", "WINDOW", "STAR"}
+
+
+@dataclass(frozen=True)
+class Measure:
+    function: str  # count_star, count, sum, min or max
+    argument: str = ""  # SQL of the aggregated expression
+
+    @property
+    def sql(self) -> str:
+        return "count(*)" if self.function == "count_star" else f"{self}"
+
+    @property
+    def column(self) -> str:
+        return "m_" + hashlib.sha1(str(self).encode()).hexdigest()[:10]
+
+    def __str__(self) -> str:
+        return f"{self.function}({self.argument})"
+
+
+@dataclass
+class Rollup:
+    name: str
+    dataset: str
+    version: str
+    groups: Tuple[str, ...]
+    measures: FrozenSet[Measure]
+    rows: int
+    source_rows: int
+    built_at: str
+    hits: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **{f.name: getattr(self, f.name) for f in fields(self)},
+            "groups": list(self.groups),
+            "measures": sorted(str(m) for m in self.measures),
+        }
+
+
+@dataclass
+class _Aggregate:
+    node: Dict[str, Any]
+    function: str
+    argument_node: Optional[Dict[str, Any]]
+    argument: str = ""
+
+
+@dataclass
+class _Analysis:
+    dataset: str
+    columns: FrozenSet[str]  # grouped by, filtered on or selected
+    measures: FrozenSet[Measure]
+    statement: Dict[str, Any]
+    aggregates: List[_Aggregate]
+
+
+class RollupService:
+    """Materialized GROUP BY rollups of the hottest aggregate queries.
+
+    An advisor mines the query log for frequent aggregate shapes over a
+    single dataset (plain column groups and filters, count/sum/avg/min/max
+    aggregates) and materializes their partial aggregates per group in the
+    `rollups` schema of the catalog, for the current dataset version.
+    `rewrite` turns a matching query into an equivalent one over a rollup;
+    rollups of an outdated version are never used and are dropped by the
+    next advisor pass.
+    """
+
+    def __init__(
+        self,
+        dataset_service: DatasetService,
+        query_log: QueryLogService,
+        max_rollups: int = 8,
+        min_queries: int = 3,
+        min_rows: int = 100_000,
+        max_rows_ratio: float = 0.5,
+        interval_seconds: float = 60.0,
+    ) -> None:
+        self._dataset_service = dataset_service
+        self._query_log = query_log
+        self._max_rollups = max_rollups
+        self._min_queries = min_queries
+        self._min_rows = min_rows
+        self._max_rows_ratio = max_rows_ratio
+        self._interval_seconds = interval_seconds
+        self._rollups: Dict[Tuple[str, FrozenSet[str]], Rollup] = {}
+        # Candidates not worth a rollup for a dataset version.
+        self._rejected: Set[Tuple[str, FrozenSet[str], str]] = set()
+        self._lookups = 0
+        self._hits = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        with dataset_service.cursor() as conn:
+            conn.execute(
+                f"CREATE SCHEMA IF NOT EXISTS {CATALOG_DATABASE}.{ROLLUP_SCHEMA}"
+            )
+            self._aggregate_functions = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT function_name FROM duckdb_functions() "
+                    "WHERE function_type = 'aggregate'"
+                ).fetchall()
+            }
+            self._template = self._serialize(conn, "SELECT 1")
+
+    def start(self) -> None:
+        """Run the advisor every `interval_seconds` on the running loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._work(), name="rollup-advisor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def advise(self) -> List[Rollup]:
+        """Materialize the hottest aggregate shapes and drop the other rollups."""
+        metadata = self._dataset_service.metadata
+        self._rejected = {
+            r
+            for r in self._rejected
+            if r[0] in metadata and metadata[r[0]].version == r[2]
+        }
+        wanted: Dict[Tuple[str, FrozenSet[str]], Tuple[float, Set[Measure]]] = {}
+        with self._dataset_service.cursor() as conn:
+            for shape in self._query_log.most_frequent(limit=50):
+                if shape.count < self._min_queries or shape.errors == shape.count:
+                    continue
+                analysis = self._analyze(conn, shape.last_sql)
+                if (
+                    analysis is None
+                    or analysis.dataset not in metadata
+                    or metadata[analysis.dataset].rows < self._min_rows
+                ):
+                    continue
+                key = (analysis.dataset, analysis.columns)
+                spent, measures = wanted.get(key, (0.0, set()))
+                wanted[key] = (spent + shape.total_ms, measures | analysis.measures)
+
+        hottest = sorted(wanted, key=lambda k: wanted[k][0], reverse=True)
+        kept: Dict[Tuple[str, FrozenSet[str]], Rollup] = {}
+        for key in hottest:
+            if len(kept) == self._max_rollups:
+                break
+            dataset, columns = key
+            version = metadata[dataset].version
+            current = self._rollups.get(key)
+            if current is not None and current.version == version:
+                if wanted[key][1] <= current.measures:
+                    kept[key] = current
+                    continue
+                wanted[key][1].update(current.measures)
+            if (dataset, columns, version) in self._rejected:
+                continue
+            rollup = self._build(dataset, columns, frozenset(wanted[key][1]), version)
+            if rollup is not None:
+                kept[key] = rollup
+            elif current is not None and current.version == version:
+                kept[key] = current
+
+        with self._lock:
+            dropped = [r for k, r in self._rollups.items() if kept.get(k) is not r]
+            self._rollups = kept
+        with self._dataset_service.cursor() as conn:
+            for rollup in dropped:
+                if rollup.name not in {r.name for r in kept.values()}:
+                    conn.execute(f"DROP TABLE IF EXISTS {self._table(rollup.name)}")
+        return list(kept.values())
+
+    def rewrite(self, sql: str) -> Optional[str]:
+        """An equivalent of `sql` over a rollup of the current dataset version,
+        or None when no rollup answers it."""
+        with self._lock:
+            rollups = list(self._rollups.values())
+        with self._dataset_service.cursor() as conn:
+            analysis = self._analyze(conn, sql)
+            if analysis is None:
+                return None
+            metadata = self._dataset_service.metadata.get(analysis.dataset)
+            candidates = [
+                r
+                for r in rollups
+                if r.dataset == analysis.dataset
+                and metadata is not None
+                and r.version == metadata.version
+                and analysis.columns <= set(r.groups)
+                and analysis.measures <= r.measures
+            ]
+            with self._lock:
+                self._lookups += 1
+                if not candidates:
+                    return None
+                rollup = min(candidates, key=lambda r: r.rows)
+                rollup.hits += 1
+                self._hits += 1
+            return self._rewrite(conn, sql, analysis, rollup)
+
+    def rollups(self) -> List[Rollup]:
+        with self._lock:
+            return sorted(self._rollups.values(), key=lambda r: r.hits, reverse=True)
+
+    def hit_counts(self) -> Tuple[int, int]:
+        """Queries checked against the rollups, and queries rewritten."""
+        with self._lock:
+            return self._lookups, self._hits
+
+    async def _work(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval_seconds)
+            if not self._dataset_service.is_ready:
+                continue
+            try:
+                await asyncio.to_thread(self.advise)
+            except Exception:
+                logger.exception("Rollup advisor pass failed")
+
+    def _build(
+        self,
+        dataset: str,
+        columns: FrozenSet[str],
+        measures: FrozenSet[Measure],
+        version: str,
+    ) -> Optional[Rollup]:
+        groups = tuple(sorted(columns))
+        name = (
+            dataset
+            + "_"
+            + hashlib.sha1(json.dumps([dataset, groups]).encode()).hexdigest()[:8]
+        )
+        select = [quote_identifier(c) for c in groups] + [
+            f"{m.sql} AS {quote_identifier(m.column)}"
+            for m in sorted(measures, key=str)
+        ]
+        group_by = f" GROUP BY {', '.join(select[: len(groups)])}" if groups else ""
+        source_rows = self._dataset_service.metadata[dataset].rows
+        try:
+            with self._dataset_service.cursor() as conn:
+                conn.execute(
+                    f"CREATE OR REPLACE TABLE {self._table(name)} AS "
+                    f"SELECT {', '.join(select)} "
+                    f"FROM {CATALOG_DATABASE}.main.{quote_identifier(dataset)}"
+                    f"{group_by}"
+                )
+                rows = fetch_scalar(conn, f"SELECT COUNT(*) FROM {self._table(name)}")
+                if rows > source_rows * self._max_rows_ratio:
+                    conn.execute(f"DROP TABLE {self._table(name)}")
+                    self._rejected.add((dataset, columns, version))
+                    return None
+        except duckdb.Error as e:
+            logger.warning("Could not build a rollup of %s: %s", dataset, e)
+            self._rejected.add((dataset, columns, version))
+            return None
+        return Rollup(
+            name=name,
+            dataset=dataset,
+            version=version,
+            groups=groups,
+            measures=measures,
+            rows=rows,
+            source_rows=source_rows,
+            built_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def _analyze(
+        self, conn: duckdb.DuckDBPyConnection, sql: str
+    ) -> Optional[_Analysis]:
+        """The dataset, columns and measures of a single-table aggregate query,
+        or None for any other query."""
+        parsed = self._parse(conn, sql)
+        if parsed is None or len(parsed["statements"]) != 1:
+            return None
+        node = parsed["statements"][0]["node"]
+        table = node.get("from_table") or {}
+        if (
+            node["type"] != "SELECT_NODE"
+            or node["cte_map"]["map"]
+            or node["sample"]
+            or node["qualify"]
+            or node["aggregate_handling"] != "STANDARD_HANDLING"
+            or len(node["group_sets"]) > 1
+            or table.get("type") != "BASE_TABLE"
+            or table["sample"]
+            or table["at_clause"]
+            or table["column_name_alias"]
+            or table["schema_name"].lower() not in ("", "main")
+            or table["catalog_name"].lower() not in ("", CATALOG_DATABASE)
+        ):
+            return None
+        dataset = next(
+            (
+                name
+                for name, meta in self._dataset_service.metadata.items()
+                if name.lower() == table["table_name"].lower() and not meta.is_view
+            ),
+            None,
+        )
+        if dataset is None:
+            return None
+        walker = _Walker(
+            {
+                c.lower(): c
+                for c in self._dataset_service.metadata[dataset].column_names
+            },
+            {table["table_name"].lower(), table["alias"].lower()} - {""},
+            {item["alias"].lower() for item in node["select_list"]} - {""},
+            self._aggregate_functions,
+        )
+        for expression in node["group_expressions"]:
+            if expression["class"] != "COLUMN_REF" or not walker.column(expression):
+                return None
+        ok = (
+            walker.walk(node["select_list"])
+            and walker.walk(node["where_clause"], filtering=True)
+            and walker.walk(node["having"], aliases=True)
+            and walker.walk(node["modifiers"], aliases=True)
+        )
+        if not ok or not walker.aggregates:
+            return None
+        for aggregate in walker.aggregates:
+            if aggregate.argument_node is not None:
+                aggregate.argument = self._render(conn, aggregate.argument_node)
+        return _Analysis(
+            dataset=dataset,
+            columns=frozenset(walker.columns),
+            measures=frozenset(
+                Measure(partial, "" if partial == "count_star" else a.argument)
+                for a in walker.aggregates
+                for partial in _PARTIALS[a.function]
+            ),
+            statement=parsed,
+            aggregates=walker.aggregates,
+        )
+
+    def _rewrite(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        sql: str,
+        analysis: _Analysis,
+        rollup: Rollup,
+    ) -> Optional[str]:
+        try:
+            names = [row[0] for row in conn.execute(f"DESCRIBE {sql}").fetchall()]
+        except duckdb.Error:
+            return None
+        columns = {
+            (m.function, m.argument): quote_identifier(m.column)
+            for m in rollup.measures
+        }
+        for aggregate in analysis.aggregates:
+            argument = aggregate.argument
+            expression = _REAGGREGATE[aggregate.function].format(
+                count_star=columns.get(("count_star", "")),
+                count=columns.get(("count", argument)),
+                sum=columns.get(("sum", argument)),
+                min=columns.get(("min", argument)),
+                max=columns.get(("max", argument)),
+            )
+            replacement = self._parse(conn, f"SELECT {expression}")
+            if replacement is None:
+                return None
+            alias = aggregate.node["alias"]
+            aggregate.node.clear()
+            aggregate.node.update(
+                replacement["statements"][0]["node"]["select_list"][0], alias=alias
+            )
+        node = analysis.statement["statements"][0]["node"]
+        for item, name in zip(node["select_list"], names):
+            item["alias"] = name
+        table = node["from_table"]
+        table.update(
+            alias=table["alias"] or table["table_name"],
+            catalog_name=CATALOG_DATABASE,
+            schema_name=ROLLUP_SCHEMA,
+            table_name=rollup.name,
+        )
+        return self._deserialize(conn, analysis.statement)
+
+    def _render(self, conn: duckdb.DuckDBPyConnection, expression: Dict) -> str:
+        """SQL of one expression node."""
+        statement = copy.deepcopy(self._template)
+        statement["statements"][0]["node"]["select_list"] = [dict(expression, alias="")]
+        return self._deserialize(conn, statement).removeprefix("SELECT ")
+
+    @classmethod
+    def _parse(cls, conn: duckdb.DuckDBPyConnection, sql: str) -> Optional[Dict]:
+        try:
+            parsed = cls._serialize(conn, sql)
+        except duckdb.Error:
+            return None
+        return None if parsed.get("error") else parsed
+
+    @staticmethod
+    def _serialize(conn: duckdb.DuckDBPyConnection, sql: str) -> Dict:
+        return json.loads(fetch_scalar(conn, "SELECT json_serialize_sql(?)", [sql]))
+
+    @staticmethod
+    def _deserialize(conn: duckdb.DuckDBPyConnection, statement: Dict) -> str:
+        return fetch_scalar(
+            conn, "SELECT json_deserialize_sql(?)", [json.dumps(statement)]
+        )
+
+    @staticmethod
+    def _table(name: str) -> str:
+        return f"{CATALOG_DATABASE}.{ROLLUP_SCHEMA}.{quote_identifier(name)}"
+
+
+class _Walker:
+    """Checks the expressions of an aggregate query over one dataset, and
+    collects the columns it needs outside aggregates and its aggregates."""
+
+    def __init__(
+        self,
+        columns: Dict[str, str],
+        qualifiers: Set[str],
+        aliases: Set[str],
+        aggregate_functions: Set[str],
+    ) -> None:
+        self._columns = columns  # lower-cased name -> column
+        self._qualifiers = qualifiers
+        self._aliases = aliases
+        self._aggregate_functions = aggregate_functions
+        self.columns: Set[str] = set()
+        self.aggregates: List[_Aggregate] = []
+
+    def column(self, node: Dict[str, Any]) -> Optional[str]:
+        """The dataset column a column reference reads, recorded as needed."""
+        column = self._resolve(node)
+        if column is not None:
+            self.columns.add(column)
+        return column
+
+    def walk(self, value: Any, filtering: bool = False, aliases: bool = False) -> bool:
+        if isinstance(value, list):
+            return all(self.walk(v, filtering, aliases) for v in value)
+        if not isinstance(value, dict):
+            return True
+        kind = value.get("class")
+        if kind in _UNSUPPORTED_CLASSES:
+            return False
+        if kind == "CONSTANT":
+            return True
+        if kind == "COLUMN_REF":
+            if self.column(value) is not None:
+                return True
+            names = value["column_names"]
+            return aliases and len(names) == 1 and names[0].lower() in self._aliases
+        if kind == "FUNCTION" and value["function_name"] in self._aggregate_functions:
+            return not filtering and self._aggregate(value)
+        return all(self.walk(v, filtering, aliases) for v in value.values())
+
+    def _aggregate(self, node: Dict[str, Any]) -> bool:
+        function = node["function_name"]
+        children = node["children"]
+        if (
+            function not in _PARTIALS
+            or node["distinct"]
+            or node["filter"]
+            or node["order_bys"]["orders"]
+            or node["schema"]
+            or node.get("export_state")
+            or len(children) != (0 if function == "count_star" else 1)
+        ):
+            return False
+        argument = copy.deepcopy(children[0]) if children else None
+        if argument is not None and not self._normalize(argument):
+            return False
+        self.aggregates.append(_Aggregate(node, function, argument))
+        return True
+
+    def _normalize(self, value: Any) -> bool:
+        """Check an aggregated expression only reads dataset columns, and
+        refer to them by their unqualified names."""
+        if isinstance(value, list):
+            return all(self._normalize(v) for v in value)
+        if not isinstance(value, dict):
+            return True
+        kind = value.get("class")
+        if kind in _UNSUPPORTED_CLASSES:
+            return False
+        if kind == "CONSTANT":
+            return True
+        if kind == "COLUMN_REF":
+            column = self._resolve(value)
+            value["column_names"] = [column]
+            return column is not None
+        if kind == "FUNCTION" and value["function_name"] in self._aggregate_functions:
+            return False
+        return all(self._normalize(v) for v in value.values())
+
+    def _resolve(self, node: Dict[str, Any]) -> Optional[str]:
+        *qualifier, name = node["column_names"]
+        if len(qualifier) > 1 or (
+            qualifier and qualifier[0].lower() not in self._qualifiers
+        ):
+            return None
+        return self._columns.get(name.lower())
@@ -0,0 +1,146 @@
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.services.dataset_service import CATALOG_DATABASE, DatasetService
+from src.services.infrastructure.rows_query_builder import quote_identifier
+from src.services.infrastructure.sql_shape import referenced_tables
+
+SAMPLE_SCHEMA = "samples"
+# Same rows for the same dataset version, so approximate answers are stable.
+_SAMPLE_SEED = 42
+
+
+@dataclass(frozen=True)
+class DatasetSample:
+    name: str
+    version: str
+    rows: int
+    population: int
+
+    @property
+    def fraction(self) -> float:
+        return self.rows / self.population
+
+    @property
+    def share_margin(self) -> float:
+        """95% margin of error of a share estimated on the sample (worst case)."""
+        return 1.96 * math.sqrt(0.25 / self.rows)
+
+
+class SampleService:
+    """Reservoir samples of the large datasets, for approximate queries.
+
+    Each dataset with more than `sample_rows` rows gets a uniform sample of
+    that size in the `samples` schema of the catalog, rebuilt when its
+    version changes. A query runs on the samples when asked to, or on its own
+    when it reads a dataset of at least `auto_rows` rows.
+    """
+
+    def __init__(
+        self,
+        dataset_service: DatasetService,
+        sample_rows: int = 100_000,
+        auto_rows: Optional[int] = None,
+    ) -> None:
+        self._dataset_service = dataset_service
+        self._sample_rows = sample_rows
+        self._auto_rows = auto_rows
+        self._samples: Dict[str, DatasetSample] = {}
+        self._lock = threading.Lock()
+        with dataset_service.cursor() as conn:
+            conn.execute(
+                f"CREATE SCHEMA IF NOT EXISTS {CATALOG_DATABASE}.{SAMPLE_SCHEMA}"
+            )
+
+    def refresh(self) -> List[DatasetSample]:
+        """Build the missing or outdated samples, drop those of removed datasets."""
+        metadata = self._dataset_service.metadata
+        for name in list(self._samples):
+            if name not in metadata or metadata[name].rows <= self._sample_rows:
+                self._drop(name)
+        return [
+            sample
+            for name in list(metadata)
+            if (sample := self._sample(name)) is not None
+        ]
+
+    def plan(self, sql: str, approximate: Optional[bool] = None) -> List[DatasetSample]:
+        """Samples `sql` should run on: none for an exact run.
+
+        `approximate=None` lets the row threshold decide.
+        """
+        if approximate is False:
+            return []
+        names = [
+            name
+            for name in referenced_tables(sql)
+            if name in self._dataset_service.metadata
+        ]
+        if approximate is None and not any(
+            self._auto_rows is not None
+            and self._dataset_service.metadata[name].rows >= self._auto_rows
+            for name in names
+        ):
+            return []
+        return [sample for name in names if (sample := self._sample(name)) is not None]
+
+    def _sample(self, name: str) -> Optional[DatasetSample]:
+        metadata = self._dataset_service.metadata.get(name)
+        if metadata is None or metadata.rows <= self._sample_rows:
+            return None
+        with self._lock:
+            sample = self._samples.get(name)
+            if sample is not None and sample.version == metadata.version:
+                return sample
+            with self._dataset_service.cursor() as conn:
+                conn.execute(
+                    f"CREATE OR REPLACE TABLE {self._table(name)} AS "
+                    f"SELECT * FROM {CATALOG_DATABASE}.main.{quote_identifier(name)} "
+                    f"USING SAMPLE reservoir({int(self._sample_rows)} ROWS) "
+                    f"REPEATABLE ({_SAMPLE_SEED})"
+                )
+            sample = DatasetSample(
+                name=name,
+                version=metadata.version,
+                rows=self._sample_rows,
+                population=metadata.rows,
+            )
+            self._samples[name] = sample
+            return sample
+
+    def _drop(self, name: str) -> None:
+        with self._lock:
+            self._samples.pop(name, None)
+            with self._dataset_service.cursor() as conn:
+                conn.execute(f"DROP TABLE IF EXISTS {self._table(name)}")
+
+    @staticmethod
+    def _table(name: str) -> str:
+        return f"{CATALOG_DATABASE}.{SAMPLE_SCHEMA}.{quote_identifier(name)}"
+
+
+def describe_approximation(samples: List[DatasetSample]) -> str:
+    """Tell the agent how the approximate result was computed and how far to trust it."""
+    lines = [
+        "APPROXIMATE result, computed on random samples: re-run with "
+        "approximate=false when exact figures matter."
+    ]
+    for sample in samples:
+        lines.append(
+            f"- {sample.name}: {sample.rows:,} of {sample.population:,} rows "
+            f"({sample.fraction:.2%}); multiply COUNT and SUM by "
+            f"{1 / sample.fraction:,.4g} to estimate totals"
+        )
+    margin = max(sample.share_margin for sample in samples)
+    lines.append(
+        f"Means and shares need no scaling; a share is within about "
+        f"±{margin:.1%} (95% confidence), less precise for small groups"
+        + (
+            ", and joins of sampled tables miss most matches."
+            if len(samples) > 1
+            else "."
+        )
+    )
+    return "\n".join(lines)
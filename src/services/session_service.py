@@ -1,5 +1,5 @@
 import uuid
-from typing import List, Any
+from typing import Callable, List, Any
 
 from src.exceptions.session.session_not_found_exception import SessionNotFoundException
 
@@ -9,6 +9,11 @@ class SessionService:
 
     def __init__(self) -> None:
         self._sessions: dict[str, List] = {}
+        self._delete_listeners: List[Callable[[str], None]] = []
+
+    def add_delete_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback run with the session ID whenever a session is deleted."""
+        self._delete_listeners.append(listener)
 
     def create_session(self) -> str:
         """Create a new session and return its ID."""
@@ -21,6 +26,8 @@ class SessionService:
         if session_id not in self._sessions:
             raise SessionNotFoundException(session_id)
         self._sessions.pop(session_id, None)
+        for listener in self._delete_listeners:
+            listener(session_id)
         return
 
     def list_sessions(self) -> List[str]:
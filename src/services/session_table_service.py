@@ -0,0 +1,126 @@
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.exceptions.session.session_table_exception import SessionTableException
+from src.services.dataset_service import CATALOG_DATABASE, DatasetService
+from src.services.infrastructure.rows_query_builder import quote_identifier
+
+_TABLE_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+
+@dataclass
+class SessionTable:
+    name: str
+    sql: str
+    columns: List[str]
+    rows: int
+    nbytes: int
+
+
+class SessionTableService:
+    """Named tables a session saves from query results and reuses in later queries.
+
+    Each session gets its own schema in the catalog; QueryService adds it to
+    the search path of that session's queries. Tables are dropped with the
+    session, and saving is refused past the per-session table and size limits.
+    """
+
+    def __init__(
+        self,
+        dataset_service: DatasetService,
+        max_tables_per_session: int = 20,
+        max_bytes_per_session: int = 256 * 1024 * 1024,
+    ) -> None:
+        self._dataset_service = dataset_service
+        self._max_tables_per_session = max_tables_per_session
+        self._max_bytes_per_session = max_bytes_per_session
+        self._tables: Dict[str, Dict[str, SessionTable]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def schema_for(session_id: str) -> str:
+        return "session_" + re.sub(r"[^a-zA-Z0-9]", "", session_id).lower()
+
+    def search_path(self, session_id: Optional[str]) -> Optional[str]:
+        """DuckDB search path exposing the session's tables after the datasets."""
+        if not session_id or not self._tables.get(session_id):
+            return None
+        return (
+            f"{CATALOG_DATABASE}.main,{CATALOG_DATABASE}.{self.schema_for(session_id)}"
+        )
+
+    def list_tables(self, session_id: str) -> List[SessionTable]:
+        return list(self._tables.get(session_id, {}).values())
+
+    def describe(self, session_id: Optional[str]) -> str:
+        """Markdown listing of the saved tables, for the agent prompt."""
+        tables = self.list_tables(session_id) if session_id else []
+        return "\n".join(
+            f"- **{t.name}** ({t.rows} rows, {len(t.columns)} columns)\n"
+            f"  Columns: {', '.join(t.columns)}"
+            for t in tables
+        )
+
+    def save(
+        self, session_id: str, name: str, sql: str, df: pd.DataFrame
+    ) -> SessionTable:
+        """Persist a query result as table `name` of the session (replacing it)."""
+        name = name.lower()
+        if not _TABLE_NAME_RE.match(name):
+            raise SessionTableException(
+                f"invalid name '{name}', use letters, digits and underscores"
+            )
+        if name in self._dataset_service.metadata:
+            raise SessionTableException(f"'{name}' is already a dataset name")
+
+        table = SessionTable(
+            name=name,
+            sql=sql,
+            columns=df.columns.tolist(),
+            rows=len(df),
+            nbytes=int(df.memory_usage(deep=True).sum()),
+        )
+        with self._lock:
+            tables = {
+                n: t for n, t in self._tables.get(session_id, {}).items() if n != name
+            }
+            if len(tables) >= self._max_tables_per_session:
+                raise SessionTableException(
+                    f"the session already has {len(tables)} saved tables "
+                    f"(limit {self._max_tables_per_session})"
+                )
+            used = sum(t.nbytes for t in tables.values())
+            if used + table.nbytes > self._max_bytes_per_session:
+                raise SessionTableException(
+                    f"the session would use {(used + table.nbytes) // 2**20} MB "
+                    f"of saved tables (limit {self._max_bytes_per_session // 2**20} MB), "
+                    "save an aggregated result instead"
+                )
+            self._materialize(session_id, name, df)
+            self._tables.setdefault(session_id, {})[name] = table
+        return table
+
+    def drop_session(self, session_id: str) -> None:
+        """Drop every saved table of a session."""
+        with self._lock:
+            if self._tables.pop(session_id, None) is None:
+                return
+        with self._dataset_service.cursor() as conn:
+            conn.execute(
+                f"DROP SCHEMA IF EXISTS {quote_identifier(self.schema_for(session_id))} CASCADE"
+            )
+
+    def _materialize(self, session_id: str, name: str, df: pd.DataFrame) -> None:
+        schema = quote_identifier(self.schema_for(session_id))
+        with self._dataset_service.cursor() as conn:
+            conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+            conn.register("_incoming_table", df)
+            conn.execute(
+                f"CREATE OR REPLACE TABLE {schema}.{quote_identifier(name)} AS "
+                "SELECT * FROM _incoming_table"
+            )
+            conn.unregister("_incoming_table")
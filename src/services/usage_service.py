@@ -0,0 +1,124 @@
+import threading
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic_ai.usage import RunUsage, UsageLimits
+
+from src.exceptions.session.usage_budget_exceeded_exception import (
+    UsageBudgetExceededException,
+)
+
+# pydantic-ai's own per-run request limit, kept when no session budget is set.
+DEFAULT_REQUEST_LIMIT = 50
+
+
+@dataclass
+class TokenUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    requests: int = 0
+    tool_calls: int = 0
+    runs: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @classmethod
+    def from_run(cls, usage: RunUsage) -> "TokenUsage":
+        return cls(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=usage.cache_read_tokens,
+            cache_write_tokens=usage.cache_write_tokens,
+            requests=usage.requests,
+            tool_calls=usage.tool_calls,
+            runs=1,
+        )
+
+    def add(self, other: "TokenUsage") -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def to_dict(self) -> Dict[str, int]:
+        return {**asdict(self), "total_tokens": self.total_tokens}
+
+
+class UsageService:
+    """Model usage per session and per dataset, and per-session budgets.
+
+    Every agent run is recorded with the datasets its queries read. When a
+    session budget is set, runs get usage limits for what is left of it, so
+    pydantic-ai stops a runaway tool loop at the next model request.
+    """
+
+    def __init__(
+        self,
+        max_tokens_per_session: Optional[int] = None,
+        max_requests_per_session: Optional[int] = None,
+    ) -> None:
+        self._max_tokens_per_session = max_tokens_per_session
+        self._max_requests_per_session = max_requests_per_session
+        self._sessions: Dict[str, TokenUsage] = {}
+        self._datasets: Dict[str, TokenUsage] = {}
+        self._total = TokenUsage()
+        self._lock = threading.Lock()
+
+    def limits(self, session_id: str) -> UsageLimits:
+        """Usage limits for the next run, or raise when the budget is spent."""
+        used = self.session_usage(session_id)
+        request_limit = DEFAULT_REQUEST_LIMIT
+        if self._max_requests_per_session is not None:
+            remaining = self._max_requests_per_session - used.requests
+            if remaining <= 0:
+                raise UsageBudgetExceededException(
+                    f"the session used its {self._max_requests_per_session} "
+                    "model requests"
+                )
+            request_limit = min(request_limit, remaining)
+        total_tokens_limit = None
+        if self._max_tokens_per_session is not None:
+            total_tokens_limit = self._max_tokens_per_session - used.total_tokens
+            if total_tokens_limit <= 0:
+                raise UsageBudgetExceededException(
+                    f"the session used its {self._max_tokens_per_session} tokens"
+                )
+        return UsageLimits(
+            request_limit=request_limit, total_tokens_limit=total_tokens_limit
+        )
+
+    def record(
+        self, session_id: str, usage: RunUsage, datasets: Iterable[str] = ()
+    ) -> TokenUsage:
+        """Add one run to the session, dataset and global totals."""
+        run = TokenUsage.from_run(usage)
+        with self._lock:
+            self._sessions.setdefault(session_id, TokenUsage()).add(run)
+            for name in set(datasets):
+                self._datasets.setdefault(name, TokenUsage()).add(run)
+            self._total.add(run)
+        return run
+
+    def session_usage(self, session_id: str) -> TokenUsage:
+        with self._lock:
+            return TokenUsage(**asdict(self._sessions.get(session_id, TokenUsage())))
+
+    def totals(self) -> TokenUsage:
+        with self._lock:
+            return TokenUsage(**asdict(self._total))
+
+    def by_dataset(self) -> Dict[str, TokenUsage]:
+        with self._lock:
+            return {name: TokenUsage(**asdict(u)) for name, u in self._datasets.items()}
+
+    def top_sessions(self, limit: int = 10) -> List[Tuple[str, TokenUsage]]:
+        with self._lock:
+            sessions = [(s, TokenUsage(**asdict(u))) for s, u in self._sessions.items()]
+        return sorted(sessions, key=lambda s: s[1].total_tokens, reverse=True)[:limit]
+
+    def drop_session(self, session_id: str) -> None:
+        """Forget a deleted session; its runs stay in the global totals."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
@@ -1,7 +1,12 @@
+import asyncio
 import json
 import re
+import time
+from functools import partial
+from typing import Callable, Optional
 from fastapi import WebSocket
 from pydantic_ai import AgentRunResultEvent
+from pydantic_ai.exceptions import UsageLimitExceeded
 from pydantic_ai.messages import (
     ModelResponse,
     TextPart,
@@ -10,18 +15,42 @@ from pydantic_ai.messages import (
     FunctionToolCallEvent,
     FunctionToolResultEvent,
     PartDeltaEvent,
+    PartStartEvent,
     TextPartDelta,
+    ThinkingPart,
     ThinkingPartDelta,
 )
+from pydantic_ai.usage import RunUsage, UsageLimits
 
-from src.agent.agent import create_agent
+from src.agent.agent import create_agent, get_model_name
 from src.agent.context import AgentContext
+from src.agent.model_router import ModelRouter, RoutingDecision
+from src.exceptions.session.usage_budget_exceeded_exception import (
+    UsageBudgetExceededException,
+)
 from src.schemas.session_schemas.ask_response_model import AskResponseModel
 from src.schemas.session_schemas.tool_calls import ToolCall
+from src.services.answer_cache_service import (
+    AnswerCacheService,
+    CachedAnswer,
+    EventEmitter,
+)
+from src.services.connection_monitor import ConnectionMonitor
 from src.services.dataset_service import DatasetService
+from src.services.query_service import QueryService
+from src.services.result_handle_service import ResultHandle, ResultHandleService
+from src.services.rollup_service import RollupService
+from src.services.sample_service import SampleService
+from src.services.session_table_service import SessionTableService
 from src.services.session_service import SessionService
+from src.services.infrastructure.sql_shape import referenced_tables
+from src.services.usage_service import TokenUsage, UsageService
 from src.usecases.infrastructure.thinking_stream_parser import ThinkingStreamParser
 from src.usecases.infrastructure.plotly_extractor import extract_plotly_json_from_html
+from src.usecases.infrastructure.event_collector import EventCollector
+from src.usecases.infrastructure.event_sink import EventSink
+from src.usecases.infrastructure.recording_sink import RecordingSink
+from src.usecases.infrastructure.send_queue import SendQueue
 
 _FILE_PATH_RE = re.compile(r"Saved to: (output/\S+)")
 
@@ -31,58 +60,348 @@ class ChatUseCase:
         self,
         dataset_service: DatasetService,
         session_service: SessionService,
+        query_service: Optional[QueryService] = None,
+        result_handle_service: Optional[ResultHandleService] = None,
+        answer_cache_service: Optional[AnswerCacheService] = None,
+        session_table_service: Optional[SessionTableService] = None,
+        usage_service: Optional[UsageService] = None,
+        model_router: Optional[ModelRouter] = None,
+        connection_monitor: Optional[ConnectionMonitor] = None,
+        sample_service: Optional[SampleService] = None,
+        rollup_service: Optional[RollupService] = None,
     ) -> None:
         self._dataset_service = dataset_service
         self._session_service = session_service
+        self._query_service = query_service or QueryService(dataset_service)
+        self._result_handle_service = result_handle_service
+        self._answer_cache_service = answer_cache_service
+        self._session_table_service = session_table_service
+        self._usage_service = usage_service
+        self._model_router = model_router
+        self._connection_monitor = connection_monitor or ConnectionMonitor()
+        self._sample_service = sample_service
+        self._rollup_service = rollup_service
 
     async def stream_ask(self, ws: WebSocket, session_id: str) -> None:
-        """Listen for questions on WebSocket and stream agent responses."""
-        while True:
-            data = await ws.receive_json()
-            question = data.get("question")
-            if not question:
-                continue
-
-            try:
-                await self.stream_agent_response(ws, session_id, question)
-            except Exception as e:
-                await ws.send_json({"type": "error", "content": str(e)})
+        """Listen for questions on WebSocket and stream agent responses.
+
+        The socket is read and written by two tasks: the reader starts and
+        cancels questions, the writer sends their events from a bounded queue.
+        """
+        outbox = SendQueue(ws, self._connection_monitor)
+        writer = asyncio.create_task(outbox.run())
+        reader = asyncio.create_task(self._read_questions(ws, outbox, session_id))
+        try:
+            await asyncio.wait({reader, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if reader.done():
+                outbox.close()
+                await asyncio.wait(
+                    {writer}, timeout=self._connection_monitor.stall_timeout_seconds
+                )
+                reader.result()
+            # Otherwise the writer gave up on the client: the reader is cancelled.
+        finally:
+            for task in (reader, writer):
+                task.cancel()
+            await asyncio.gather(reader, writer, return_exceptions=True)
+
+    async def _read_questions(
+        self, ws: WebSocket, outbox: SendQueue, session_id: str
+    ) -> None:
+        """Read client messages while a question runs, so it can be cancelled.
+
+        `{"question": ...}` starts a question, `{"type": "cancel"}` aborts the
+        running one, and a disconnect cancels it the same way.
+        """
+        run: Optional[asyncio.Task] = None
+        try:
+            while True:
+                data = await ws.receive_json()
+                if data.get("type") == "cancel":
+                    if run is not None and not run.done():
+                        await self._cancel_run(run)
+                        outbox.send_control({"type": "cancelled"})
+                    continue
+                question = data.get("question")
+                if not question:
+                    continue
+                if run is not None and not run.done():
+                    outbox.send_control(
+                        {
+                            "type": "error",
+                            "content": "A question is already running, cancel it first",
+                        }
+                    )
+                    continue
+                run = asyncio.create_task(
+                    self._answer_question(outbox, session_id, question)
+                )
+        finally:
+            if run is not None:
+                await self._cancel_run(run)
+
+    async def _answer_question(
+        self, ws: EventSink, session_id: str, question: str
+    ) -> None:
+        try:
+            await self.stream_agent_response(ws, session_id, question)
+        except Exception as e:
+            await ws.send_json({"type": "error", "content": str(e)})
+
+    @staticmethod
+    async def _cancel_run(run: asyncio.Task) -> None:
+        """Cancel a running question and wait until its cleanup is done."""
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
 
     async def stream_agent_response(
-        self, ws: WebSocket, session_id: str, question: str
+        self, ws: EventSink, session_id: str, question: str
     ) -> None:
         history = self._session_service.get_history(session_id)
+        await asyncio.to_thread(self._dataset_service.wait_until_loaded)
+        if self._answer_cache_service is not None and not history:
+            self._usage_limits(session_id)
+            run_usage: dict = {}
+            answer = await self._answer_cache_service.fetch(
+                self._answer_cache_key(question),
+                partial(self._record_agent_stream, session_id, question, run_usage),
+                send=self._usage_reporting_sender(ws.send_json, session_id, run_usage),
+                adopt=self._handle_adopter(session_id),
+            )
+            await asyncio.to_thread(self._restore_tables, session_id, answer)
+            self._session_service.save_history(session_id, answer.messages)
+            return
+        await self._run_agent_stream(ws, session_id, question, history)
+
+    async def collect_agent_response(self, session_id: str, question: str) -> dict:
+        """Run the streamed answer without a client and return its summary."""
+        collector = EventCollector()
+        await self.stream_agent_response(collector, session_id, question)
+        return collector.summary()
+
+    async def _run_agent_stream(
+        self,
+        ws: EventSink,
+        session_id: str,
+        question: str,
+        history: list,
+        save_history: bool = True,
+    ):
+        """Run the agent and send its events, return the run result.
+
+        With `save_history`, the session's history is saved when the run ends.
+        """
         context = AgentContext(
             datasets=self._dataset_service.datasets,
             dataset_info=self._dataset_service.dataset_info,
+            query_service=self._query_service,
+            session_id=session_id,
+            result_handles=self._result_handle_service,
+            session_tables=self._session_table_service,
+            samples=self._sample_service,
+            rollups=self._rollup_service,
         )
         agent = create_agent(self._dataset_service.dataset_info)
         parser = ThinkingStreamParser(ws)
+        result = None
+        usage = RunUsage()
+        decision = self._route(question, history)
+        started = time.perf_counter()
+        error = None
 
-        async for event in agent.run_stream_events(
-            question, deps=context, message_history=history or None
-        ):
-            if isinstance(event, AgentRunResultEvent):
-                await self._handle_agent_run_result_event(event, ws, session_id, parser)
-            elif isinstance(event, FunctionToolCallEvent):
-                await self._handle_tool_call_event(event, ws)
-            elif isinstance(event, FunctionToolResultEvent):
-                await self._handle_tool_result_event(event, ws, context)
-            elif isinstance(event, PartDeltaEvent):
-                await self._handle_part_delta_event(event, ws, parser)
+        try:
+            async for event in agent.run_stream_events(
+                question,
+                deps=context,
+                message_history=history or None,
+                model=self._routed_model(decision),
+                usage=usage,
+                usage_limits=self._usage_limits(session_id),
+            ):
+                if isinstance(event, AgentRunResultEvent):
+                    result = event.result
+                    usage_report = self._record_usage(session_id, usage, context)
+                    await self._handle_agent_run_result_event(
+                        event, ws, session_id, parser, usage_report, save_history
+                    )
+                elif isinstance(event, FunctionToolCallEvent):
+                    await self._handle_tool_call_event(event, ws)
+                elif isinstance(event, FunctionToolResultEvent):
+                    await self._handle_tool_result_event(event, ws, context)
+                elif isinstance(event, PartStartEvent):
+                    await self._handle_part_start_event(event, ws, parser)
+                elif isinstance(event, PartDeltaEvent):
+                    await self._handle_part_delta_event(event, ws, parser)
+        except BaseException as e:
+            error = str(e) or type(e).__name__
+            if isinstance(e, asyncio.CancelledError):
+                context.cancellation.cancel()
+            if result is None:
+                self._record_usage(session_id, usage, context)
+            if isinstance(e, UsageLimitExceeded):
+                raise UsageBudgetExceededException(str(e)) from e
+            raise
+        finally:
+            self._record_route(decision, started, error, question)
+        return result
 
+    async def _record_agent_stream(
+        self,
+        session_id: str,
+        question: str,
+        run_usage: dict,
+        emit: EventEmitter,
+        answer: CachedAnswer,
+    ) -> None:
+        """Run the agent for the answer cache, emitting events through `emit`.
 
-    async def _handle_agent_run_result_event(self, event: AgentRunResultEvent, ws: WebSocket, session_id: str, parser: ThinkingStreamParser) -> None:
-        """Flush the stream parser, save history, and signal completion."""
-        await parser.flush()
-        self._session_service.save_history(
-            session_id, event.result.all_messages()
+        The run's usage report is kept out of the cached events and stored in
+        `run_usage` for the session that ran.
+        """
+        sink = RecordingSink(
+            emit, partial(self._find_handle, session_id), run_usage.update
+        )
+        # Every session, this one included, saves the answer once its own
+        # `fetch` returns: a cancelled session must not get it.
+        result = await self._run_agent_stream(
+            sink, session_id, question, [], save_history=False
+        )
+        answer.messages = result.all_messages()
+        answer.output = result.output
+        if self._session_table_service is not None:
+            answer.tables = self._session_table_service.list_tables(session_id)
+
+    def _restore_tables(self, session_id: str, answer: CachedAnswer) -> None:
+        """Recreate in this session the tables saved by the run of a replayed answer."""
+        if self._session_table_service is None:
+            return
+        existing = {t.name for t in self._session_table_service.list_tables(session_id)}
+        for table in answer.tables:
+            if table.name not in existing:
+                df = self._query_service.execute(table.sql, session_id)
+                self._session_table_service.save(session_id, table.name, table.sql, df)
+
+    def _answer_cache_key(self, question: str) -> str:
+        model_name = self._model_router.name if self._model_router else get_model_name()
+        return AnswerCacheService.make_key(
+            question, self._dataset_service.catalog_version, model_name
         )
-        await ws.send_json({"type": "done"})
 
+    def _route(self, question: str, history: list) -> Optional[RoutingDecision]:
+        if self._model_router is None:
+            return None
+        return self._model_router.route(
+            question, self._dataset_service.metadata, len(history)
+        )
+
+    def _routed_model(self, decision: Optional[RoutingDecision]):
+        """The model chosen for the run, None for the agent's default one."""
+        if decision is None or self._model_router is None:
+            return None
+        return self._model_router.model_for(decision)
+
+    def _record_route(
+        self,
+        decision: Optional[RoutingDecision],
+        started: float,
+        error: Optional[str],
+        question: str,
+    ) -> None:
+        if decision is None or self._model_router is None:
+            return
+        latency_ms = (time.perf_counter() - started) * 1000
+        self._model_router.record(decision, latency_ms, error, question)
+
+    def _find_handle(self, session_id: str, handle_id: str) -> Optional[ResultHandle]:
+        if self._result_handle_service is None:
+            return None
+        return self._result_handle_service.get_handle(session_id, handle_id)
+
+    def _handle_adopter(
+        self, session_id: str
+    ) -> Optional[Callable[[ResultHandle], str]]:
+        """Re-register replayed result handles in this session, once per handle."""
+        result_handle_service = self._result_handle_service
+        if result_handle_service is None:
+            return None
+        adopted: dict[str, str] = {}
+
+        def adopt(handle: ResultHandle) -> str:
+            if handle.handle_id not in adopted:
+                adopted[handle.handle_id] = result_handle_service.adopt(
+                    session_id, handle
+                ).handle_id
+            return adopted[handle.handle_id]
+
+        return adopt
+
+    def _usage_limits(self, session_id: str) -> Optional[UsageLimits]:
+        if self._usage_service is None:
+            return None
+        return self._usage_service.limits(session_id)
+
+    def _record_usage(
+        self, session_id: str, usage: RunUsage, context: AgentContext
+    ) -> Optional[dict]:
+        """Account the run to the session and the datasets it queried."""
+        if self._usage_service is None:
+            return None
+        datasets = {
+            table
+            for slot in context.results.slots
+            for table in referenced_tables(slot.sql)
+            if table in self._dataset_service.metadata
+        }
+        run = self._usage_service.record(session_id, usage, datasets)
+        return self._usage_report(run, self._usage_service.session_usage(session_id))
+
+    def _answer_usage_report(self, session_id: str, run_usage: dict) -> Optional[dict]:
+        """Usage report of a cached answer: the run's own for the session that
+        ran it, otherwise a replay accounted to the session as a run without
+        model usage."""
+        if run_usage or self._usage_service is None:
+            return run_usage or None
+        run = self._usage_service.record(session_id, RunUsage())
+        return self._usage_report(run, self._usage_service.session_usage(session_id))
+
+    def _usage_reporting_sender(
+        self, send: Callable, session_id: str, run_usage: dict
+    ) -> Callable:
+        """Wrap `send` to add the session's usage report to the `done` event."""
+
+        async def send_with_usage(event: dict) -> None:
+            if event.get("type") == "done":
+                event = {
+                    **event,
+                    **(self._answer_usage_report(session_id, run_usage) or {}),
+                }
+            await send(event)
+
+        return send_with_usage
+
+    @staticmethod
+    def _usage_report(run: TokenUsage, session: TokenUsage) -> dict:
+        return {"usage": run.to_dict(), "session_usage": session.to_dict()}
+
+    async def _handle_agent_run_result_event(
+        self,
+        event: AgentRunResultEvent,
+        ws: EventSink,
+        session_id: str,
+        parser: ThinkingStreamParser,
+        usage_report: Optional[dict] = None,
+        save_history: bool = True,
+    ) -> None:
+        """Flush the stream parser, save history, and signal completion."""
+        await parser.flush()
+        if save_history:
+            self._session_service.save_history(session_id, event.result.all_messages())
+        await ws.send_json({"type": "done", **(usage_report or {})})
 
     @staticmethod
-    async def _handle_tool_call_event(event: FunctionToolCallEvent, websocket: WebSocket) -> None:
+    async def _handle_tool_call_event(
+        event: FunctionToolCallEvent, websocket: EventSink
+    ) -> None:
         """Process the tool called by the agent"""
         part = event.part
         args = (
@@ -94,36 +413,51 @@ class ChatUseCase:
             {"type": "tool_call", "name": part.tool_name, "args": args}
         )
 
-
-    async def _handle_tool_result_event(self, event: FunctionToolResultEvent, websocket: WebSocket, context: AgentContext) -> None:
+    async def _handle_tool_result_event(
+        self,
+        event: FunctionToolResultEvent,
+        websocket: EventSink,
+        context: AgentContext,
+    ) -> None:
         """Process the result of a tool called by the agent and send it"""
         result_part = event.result
         if isinstance(result_part, ToolReturnPart):
             content = str(result_part.content)
-            ws_event = self._build_tool_result_event(
-                result_part.tool_name, content
-            )
+            ws_event = self._build_tool_result_event(result_part.tool_name, content)
             await websocket.send_json(ws_event)
             if ws_event.get("plotly_json"):
                 await websocket.send_json(
                     {"type": "plot", "content": ws_event["plotly_json"]}
                 )
-            if (
-                    result_part.tool_name == "query_data"
-                    and context.current_dataframe is not None
-            ):
-                df = context.current_dataframe.head(200)
+            slot = context.results.for_tool_call(result_part.tool_call_id)
+            if result_part.tool_name == "query_data" and slot is not None:
+                df = slot.dataframe.head(200)
                 await websocket.send_json(
                     {
                         "type": "table",
+                        "name": slot.name,
                         "content": json.loads(df.to_json(orient="records")),
-                        "columns": context.current_dataframe.columns.tolist(),
+                        "columns": slot.dataframe.columns.tolist(),
+                        "handle_id": slot.handle.handle_id if slot.handle else None,
+                        "total_rows": len(slot.dataframe),
                     }
                 )
 
+    @staticmethod
+    async def _handle_part_start_event(
+        event: PartStartEvent, websocket: EventSink, parser: ThinkingStreamParser
+    ) -> None:
+        """Process the first chunk of a text or thinking part, the deltas follow"""
+        part = event.part
+        if isinstance(part, TextPart):
+            await parser.feed(part.content)
+        elif isinstance(part, ThinkingPart) and part.content:
+            await websocket.send_json({"type": "thinking", "content": part.content})
 
     @staticmethod
-    async def _handle_part_delta_event(event: PartDeltaEvent, websocket: WebSocket, parser: ThinkingStreamParser) -> None:
+    async def _handle_part_delta_event(
+        event: PartDeltaEvent, websocket: EventSink, parser: ThinkingStreamParser
+    ) -> None:
         """Process a partial update of message generating, text or thinking, and send it"""
         delta = event.delta
         if isinstance(delta, TextPartDelta):
@@ -160,34 +494,87 @@ class ChatUseCase:
     async def ask(self, session_id: str, question: str) -> AskResponseModel:
         """Ask a question to the agent in an existing session."""
         history = self._session_service.get_history(session_id)
+        await asyncio.to_thread(self._dataset_service.wait_until_loaded)
+        if self._answer_cache_service is not None and not history:
+            self._usage_limits(session_id)
+            run_usage: dict = {}
+            answer = await self._answer_cache_service.fetch(
+                self._answer_cache_key(question),
+                partial(self._record_agent_stream, session_id, question, run_usage),
+            )
+            await asyncio.to_thread(self._restore_tables, session_id, answer)
+            self._session_service.save_history(session_id, answer.messages)
+            usage_report = self._answer_usage_report(session_id, run_usage)
+            return self._build_ask_response(
+                session_id, answer.messages, answer.output, usage_report
+            )
 
         context = AgentContext(
             datasets=self._dataset_service.datasets,
             dataset_info=self._dataset_service.dataset_info,
+            query_service=self._query_service,
+            session_id=session_id,
+            result_handles=self._result_handle_service,
+            session_tables=self._session_table_service,
+            samples=self._sample_service,
+            rollups=self._rollup_service,
         )
         agent = create_agent(self._dataset_service.dataset_info)
+        usage = RunUsage()
+        decision = self._route(question, history)
+        started = time.perf_counter()
+        error = None
 
-        result = await agent.run(
-            question,
-            deps=context,
-            message_history=history,
-        )
+        try:
+            result = await agent.run(
+                question,
+                deps=context,
+                message_history=history,
+                model=self._routed_model(decision),
+                usage=usage,
+                usage_limits=self._usage_limits(session_id),
+            )
+        except UsageLimitExceeded as e:
+            error = str(e)
+            self._record_usage(session_id, usage, context)
+            raise UsageBudgetExceededException(str(e)) from e
+        except BaseException as e:
+            error = str(e) or type(e).__name__
+            if isinstance(e, asyncio.CancelledError):
+                context.cancellation.cancel()
+            self._record_usage(session_id, usage, context)
+            raise
+        finally:
+            self._record_route(decision, started, error, question)
+        usage_report = self._record_usage(session_id, usage, context)
         all_msgs = result.all_messages()
 
         new_msgs = all_msgs[len(history) :]
 
+        self._session_service.save_history(session_id, all_msgs)
+
+        return self._build_ask_response(
+            session_id, new_msgs, result.output, usage_report
+        )
+
+    def _build_ask_response(
+        self,
+        session_id: str,
+        new_msgs: list,
+        output: str,
+        usage_report: Optional[dict] = None,
+    ) -> AskResponseModel:
         thinking_blocks, tool_calls = self._parse_messages(new_msgs)
-        thinking_final, answer = self._parse_thinking(result.output)
+        thinking_final, answer = self._parse_thinking(output)
         if thinking_final:
             thinking_blocks.append(thinking_final)
 
-        self._session_service.save_history(session_id, all_msgs)
-
         return AskResponseModel(
             session_id=session_id,
             thinking=thinking_blocks,
             tool_calls=tool_calls,
             answer=answer,
+            **(usage_report or {}),
         )
 
     @staticmethod
@@ -0,0 +1,54 @@
+import time
+from typing import Any, Dict, List, Optional
+
+
+class EventCollector:
+    """WebSocket stand-in that keeps the events of one agent run.
+
+    It gathers what a non-streaming caller needs: the answer text, the tool
+    calls, the artifact URLs and the timings from its creation.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[dict] = []
+        self._started = time.perf_counter()
+        self.first_token_ms: Optional[float] = None
+
+    async def send_json(self, data: dict) -> None:
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        if data.get("type") == "text" and self.first_token_ms is None:
+            self.first_token_ms = elapsed_ms
+        self.events.append(data)
+
+    @property
+    def answer(self) -> str:
+        return "".join(e["content"] for e in self.events if e.get("type") == "text")
+
+    @property
+    def tool_calls(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": e["name"], "args": e["args"]}
+            for e in self.events
+            if e.get("type") == "tool_call"
+        ]
+
+    @property
+    def file_urls(self) -> List[str]:
+        return [
+            e["file_url"]
+            for e in self.events
+            if e.get("type") == "tool_result" and e.get("file_url")
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "answer": self.answer,
+            "tool_calls": self.tool_calls,
+            "file_urls": self.file_urls,
+            "first_token_ms": _round(self.first_token_ms),
+            "duration_ms": _round((time.perf_counter() - self._started) * 1000),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
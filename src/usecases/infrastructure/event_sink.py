@@ -0,0 +1,12 @@
+from typing import Protocol
+
+
+class EventSink(Protocol):
+    """Where an agent run sends its events.
+
+    The chat WebSocket goes through its `SendQueue`; `EventCollector`,
+    `RecordingSink` and the CLI's terminal printer stand in for it when
+    there is no client to stream to.
+    """
+
+    async def send_json(self, data: dict, /) -> None: ...
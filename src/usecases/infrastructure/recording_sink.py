@@ -0,0 +1,40 @@
+from typing import TYPE_CHECKING, Callable, Optional
+
+from src.services.answer_cache_service import EventEmitter
+
+if TYPE_CHECKING:
+    from src.services.result_handle_service import ResultHandle
+
+
+# Keys of the `done` event that describe the usage of the session that ran.
+USAGE_KEYS = ("usage", "session_usage")
+
+
+class RecordingSink:
+    """WebSocket stand-in that hands every event to an answer cache emitter.
+
+    `table` events are emitted with their result handle so the cache can
+    re-register it in the sessions the answer is replayed into. The usage
+    report of the `done` event belongs to the running session: it is handed
+    to `on_usage` instead of being recorded.
+    """
+
+    def __init__(
+        self,
+        emit: EventEmitter,
+        find_handle: Callable[[str], Optional["ResultHandle"]],
+        on_usage: Optional[Callable[[dict], None]] = None,
+    ) -> None:
+        self._emit = emit
+        self._find_handle = find_handle
+        self._on_usage = on_usage
+
+    async def send_json(self, data: dict) -> None:
+        if data.get("type") == "done":
+            usage = {key: data[key] for key in USAGE_KEYS if key in data}
+            if usage and self._on_usage is not None:
+                self._on_usage(usage)
+            data = {key: value for key, value in data.items() if key not in usage}
+        handle_id = data.get("handle_id")
+        handle = self._find_handle(handle_id) if handle_id else None
+        await self._emit(data, handle)
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from src.services.connection_monitor import ConnectionMonitor
+
+logger = logging.getLogger(__name__)
+
+# Streamed deltas: consecutive ones can be sent as one event without loss.
+MERGEABLE_EVENTS = ("text", "thinking")
+# Close code when the client stopped reading (policy violation).
+SLOW_CLIENT_CLOSE_CODE = 1008
+
+
+class SendQueue:
+    """Bounded outbox between an agent run and its WebSocket.
+
+    `send_json` only queues the event, so a client on a slow link does not
+    throttle the run; a writer task (`run`) sends the events in order. When
+    the client falls behind, consecutive text or thinking deltas are merged
+    into the queued one, while tables, plots and `done` keep their place.
+    A full queue makes the run wait, and a client that does not take an
+    event within the stall timeout is disconnected. Control events of the
+    socket reader (`send_control`) never wait.
+    """
+
+    def __init__(self, ws: WebSocket, monitor: Optional[ConnectionMonitor] = None):
+        self._ws = ws
+        self._monitor = monitor or ConnectionMonitor()
+        self._events: Deque[dict] = deque()
+        self._has_events = asyncio.Event()
+        self._has_room = asyncio.Event()
+        self._has_room.set()
+        self._closing = False
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._events)
+
+    async def send_json(self, event: dict) -> None:
+        if self._merge(event):
+            return
+        while not self._closed and len(self._events) >= self._max_events:
+            self._has_room.clear()
+            await self._has_room.wait()
+        if self._closed:
+            raise WebSocketDisconnect(code=SLOW_CLIENT_CLOSE_CODE)
+        self._events.append(event)
+        self._monitor.queued(len(self._events))
+        self._has_events.set()
+
+    def send_control(self, event: dict) -> None:
+        """Queue a control event (`cancelled`, `error`) without waiting for room.
+
+        The reader must keep reading the socket while the queue is full, so
+        the event may go over the limit. One identical to the last queued
+        event is dropped: a client repeating a request can't grow the queue.
+        """
+        if self._closed or (self._events and self._events[-1] == event):
+            return
+        self._events.append(event)
+        self._monitor.queued(len(self._events))
+        self._has_events.set()
+
+    async def run(self) -> None:
+        """Send the queued events until `close()`, or until the client is gone."""
+        self._monitor.opened()
+        try:
+            while True:
+                if not self._events:
+                    if self._closing:
+                        return
+                    self._has_events.clear()
+                    await self._has_events.wait()
+                    continue
+                event = self._events.popleft()
+                self._monitor.sent()
+                self._has_room.set()
+                try:
+                    await asyncio.wait_for(
+                        self._ws.send_json(event), self._monitor.stall_timeout_seconds
+                    )
+                except asyncio.TimeoutError:
+                    self._monitor.slow_client()
+                    logger.warning(
+                        "Disconnecting a chat client stuck for %gs with %s events queued",
+                        self._monitor.stall_timeout_seconds,
+                        len(self._events) + 1,
+                    )
+                    await self._disconnect()
+                    return
+                except Exception:
+                    return  # the client is gone, the reader sees it too
+        finally:
+            self._closed = True
+            self._has_room.set()
+            self._monitor.closed(len(self._events))
+            self._events.clear()
+
+    def close(self) -> None:
+        """Let the writer send what is queued, then stop."""
+        self._closing = True
+        self._has_events.set()
+
+    @property
+    def _max_events(self) -> int:
+        return self._monitor.max_queued_events
+
+    def _merge(self, event: dict) -> bool:
+        if not self._events or event.get("type") not in MERGEABLE_EVENTS:
+            return False
+        last = self._events[-1]
+        if last.get("type") != event["type"] or set(last) != set(event):
+            return False
+        self._events[-1] = {**last, "content": last["content"] + event["content"]}
+        self._monitor.merged()
+        return True
+
+    async def _disconnect(self) -> None:
+        try:
+            await asyncio.wait_for(
+                self._ws.close(code=SLOW_CLIENT_CLOSE_CODE, reason="Client too slow"),
+                self._monitor.stall_timeout_seconds,
+            )
+        except Exception:
+            pass
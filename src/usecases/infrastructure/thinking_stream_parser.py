@@ -1,4 +1,4 @@
-from fastapi import WebSocket
+from src.usecases.infrastructure.event_sink import EventSink
 
 
 class ThinkingStreamParser:
@@ -7,10 +7,11 @@ class ThinkingStreamParser:
     Sends WebSocket events as soon as content is available.
     """
 
-    def __init__(self, ws: WebSocket) -> None:
+    def __init__(self, ws: EventSink) -> None:
         self._ws = ws
         self._buffer = ""
         self._inside_thinking = False
+        self._in_answer = False
 
     async def feed(self, delta: str) -> None:
         self._buffer += delta
@@ -46,6 +47,7 @@ class ThinkingStreamParser:
                         await self._emit("text_delta", text_before)
                     self._buffer = self._buffer[start_idx + len("<thinking>") :]
                     self._inside_thinking = True
+                    self._in_answer = False
 
     async def flush(self) -> None:
         """Flush any remaining buffer content."""
@@ -55,10 +57,16 @@ class ThinkingStreamParser:
             self._buffer = ""
 
     async def _emit(self, event_type: str, content: str) -> None:
+        if event_type == "text_delta":
+            # Keep the spaces between streamed tokens, only trim where the answer starts.
+            text = content if self._in_answer else content.lstrip()
+            if text:
+                self._in_answer = True
+                await self._ws.send_json({"type": "text", "content": text})
+            return
         stripped = content.strip()
         if stripped:
-            ws_type = "text" if event_type == "text_delta" else event_type
-            await self._ws.send_json({"type": ws_type, "content": stripped})
+            await self._ws.send_json({"type": event_type, "content": stripped})
 
     @staticmethod
     def _could_be_partial_tag(text: str, tag: str) -> bool:
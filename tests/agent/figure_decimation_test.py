@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from src.agent.figure_decimation import (
+    FigureBudget,
+    bin_points,
+    decimate_figure,
+    lttb,
+)
+
+
+class TestFigureDecimation:
+    def setup_method(self):
+        self.budget = FigureBudget(max_points_per_trace=500, webgl_threshold=100)
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        x = np.arange(10_000, dtype=float)
+        y = np.sin(x / 500)
+        y[4321] = 50.0
+
+        picked = lttb(x, y, 200)
+
+        assert len(picked) == 200
+        assert picked[0] == 0 and picked[-1] == 9_999
+        assert 4321 in picked
+        assert (np.diff(picked) > 0).all()
+
+    def test_bin_points_keeps_outliers(self):
+        rng = np.random.default_rng(0)
+        x = np.append(rng.normal(size=10_000), 40.0)
+        y = np.append(rng.normal(size=10_000), -40.0)
+
+        picked = bin_points(x, y, 400)
+
+        assert len(picked) <= 400
+        assert 10_000 in picked
+
+    def test_line_figure_is_decimated_and_switched_to_webgl(self):
+        df = pd.DataFrame(
+            {
+                "day": pd.date_range("2024-01-01", periods=5_000, freq="h"),
+                "value": np.arange(5_000),
+            }
+        )
+        fig = px.line(df, x="day", y="value", render_mode="svg")
+
+        reduced, notes = decimate_figure(fig, self.budget)
+
+        trace = reduced.data[0]
+        assert trace.type == "scattergl"
+        assert len(trace.x) == len(trace.y) == 500
+        assert notes == ["trace 0: 5000 -> 500 points (LTTB), WebGL"]
+
+    def test_scatter_figure_is_binned_per_trace(self):
+        rng = np.random.default_rng(1)
+        df = pd.DataFrame(
+            {
+                "x": rng.normal(size=4_000),
+                "y": rng.normal(size=4_000),
+                "group": ["a", "b"] * 2_000,
+            }
+        )
+        fig = px.scatter(df, x="x", y="y", color="group", render_mode="svg")
+
+        reduced, notes = decimate_figure(fig, self.budget)
+
+        assert [t.name for t in reduced.data] == ["a", "b"]
+        assert all(len(t.x) <= 500 for t in reduced.data)
+        assert all("binning" in note for note in notes)
+
+    def test_small_and_non_scatter_figures_are_unchanged(self):
+        fig = go.Figure([go.Bar(x=list(range(5_000)), y=list(range(5_000)))])
+        fig.add_scatter(x=[1, 2, 3], y=[3, 1, 2])
+
+        reduced, notes = decimate_figure(fig, self.budget)
+
+        assert reduced is fig
+        assert notes == []
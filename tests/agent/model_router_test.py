@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+from pydantic_ai.messages import (
+    ModelRequest,
+    ModelResponse,
+    RetryPromptPart,
+    TextPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.models.function import FunctionModel
+
+from src.agent.model_router import (
+    FAST_TIER,
+    STRONG_TIER,
+    EscalatingModel,
+    ModelRouter,
+    RoutingDecision,
+    _last_tool_error,
+)
+
+
+def _metadata(rows, *columns):
+    return SimpleNamespace(rows=rows, column_types={c: "VARCHAR" for c in columns})
+
+
+def _answer(text):
+    return FunctionModel(
+        lambda messages, info: ModelResponse(parts=[TextPart(text)]),
+        model_name=text,
+    )
+
+
+class TestModelRouter:
+    def setup_method(self):
+        self.fast = _answer("fast")
+        self.strong = _answer("strong")
+        self.router = ModelRouter(self.fast, self.strong, large_dataset_rows=1000)
+        self.catalog = {
+            "customers": _metadata(10, "id", "tenure"),
+            "orders": _metadata(5000, "id", "amount"),
+        }
+
+    def test_simple_question_goes_to_fast_tier(self):
+        decision = self.router.route("How many customers are there?", self.catalog)
+        assert decision.tier == FAST_TIER
+        assert decision.model_name == "fast"
+
+    def test_analysis_wording_goes_to_strong_tier(self):
+        decision = self.router.route("Why do customers churn?", self.catalog)
+        assert decision.tier == STRONG_TIER
+        assert "churn" in decision.reasons[0]
+
+    def test_question_spanning_datasets_goes_to_strong_tier(self):
+        decision = self.router.route("Total amount by tenure", self.catalog)
+        assert decision.tier == STRONG_TIER
+        assert "customers, orders" in decision.reasons[0]
+
+    def test_shared_column_does_not_count_as_a_mention(self):
+        decision = self.router.route("List customers by id", self.catalog)
+        assert decision.tier == FAST_TIER
+
+    def test_large_dataset_alone_stays_on_fast_tier(self):
+        decision = self.router.route("Show 5 orders", self.catalog)
+        assert decision.tier == FAST_TIER
+        assert decision.reasons == ["large dataset: orders"]
+
+    def test_model_for_wraps_fast_tier_only(self):
+        fast = self.router.model_for(RoutingDecision(FAST_TIER, "fast", []))
+        strong = self.router.model_for(RoutingDecision(STRONG_TIER, "strong", []))
+        assert isinstance(fast, EscalatingModel) and fast.wrapped is self.fast
+        assert strong is self.strong
+
+    def test_record_aggregates_per_tier(self):
+        escalated = RoutingDecision(FAST_TIER, "fast", [], escalation="query failed")
+        self.router.record(escalated, 30.0, question="q1")
+        self.router.record(RoutingDecision(FAST_TIER, "fast", []), 10.0, "boom")
+
+        stats = self.router.stats()[FAST_TIER]
+        assert (stats.runs, stats.escalations, stats.errors) == (2, 1, 1)
+        assert stats.avg_ms == 20.0 and stats.max_ms == 30.0
+        recent = self.router.recent()
+        assert recent[0]["error"] == "boom"
+        assert recent[1]["final_tier"] == STRONG_TIER
+
+    def test_name_identifies_both_models(self):
+        assert self.router.name == "routed:fast,strong"
+
+
+class TestLastToolError:
+    def test_ignores_errors_of_previous_runs(self):
+        messages = [
+            ModelRequest(parts=[UserPromptPart("first")]),
+            ModelRequest(parts=[ToolReturnPart("query_data", "Error: bad", "c1")]),
+            ModelRequest(parts=[UserPromptPart("second")]),
+            ModelRequest(parts=[ToolReturnPart("query_data", "ok", "c2")]),
+        ]
+        assert _last_tool_error(messages) is None
+
+    def test_detects_failed_and_retried_tool_calls(self):
+        failed = [
+            ModelRequest(parts=[UserPromptPart("q")]),
+            ModelRequest(parts=[ToolReturnPart("query_data", "Error: bad", "c1")]),
+        ]
+        retried = [
+            ModelRequest(parts=[UserPromptPart("q")]),
+            ModelRequest(parts=[RetryPromptPart("invalid", tool_name="visualize")]),
+        ]
+        assert _last_tool_error(failed).startswith("query_data failed")
+        assert _last_tool_error(retried) == "retry requested by visualize"
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from src.agent.result_formatter import ResultBudget, estimate_tokens, format_result
+
+
+class TestResultFormatter:
+    def test_format_result_with_success(self):
+        df = pd.DataFrame({"city": ["Paris", None], "price": [1.23456789, 2.0]})
+
+        result = format_result(df)
+
+        assert result == "city|price\nParis|1.23456789\n|2\n[2 of 2 rows shown]"
+
+    def test_format_result_keeps_every_digit_of_large_totals(self):
+        df = pd.DataFrame({"total": [185298.31, 14002050.0, 123456789012345.6]})
+
+        result = format_result(df)
+
+        assert result.splitlines()[1:4] == [
+            "185298.31",
+            "14002050",
+            "123456789012345.6",
+        ]
+
+    def test_format_result_truncates_cells_and_escapes_delimiter(self):
+        df = pd.DataFrame({"text": ["a|b\n" + "x" * 100]})
+
+        line = format_result(df, ResultBudget(max_cell_chars=10)).splitlines()[1]
+
+        assert line == "a/b xxxxx…"
+
+    def test_format_result_summarizes_hidden_columns(self):
+        df = pd.DataFrame([range(20)], columns=[f"c{i}" for i in range(20)])
+
+        result = format_result(df, ResultBudget(max_columns=3))
+
+        assert result.splitlines()[0] == "c0|c1|c2"
+        assert result.endswith("17 more columns: c3, c4, c5, …]")
+
+    def test_format_result_stops_at_token_budget(self):
+        df = pd.DataFrame({"value": ["y" * 30] * 1000})
+        budget = ResultBudget(max_tokens=50, max_rows=1000)
+
+        result = format_result(df, budget)
+
+        assert estimate_tokens(result) <= budget.max_tokens + 10
+        assert result.splitlines()[-1] == "[6 of 1000 rows shown]"
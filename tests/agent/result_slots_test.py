@@ -0,0 +1,138 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+
+from src.agent.agent import create_agent
+from src.agent.context import AgentContext
+from src.agent.result_slots import ResultSlot, ResultSlots
+from src.services.dataset_service import DatasetService
+from src.services.query_service import QueryService
+
+
+class TestResultSlots:
+    @pytest.mark.asyncio
+    async def test_get_waits_for_reserved_slot(self):
+        slots = ResultSlots()
+        name = slots.reserve("totals", tool_call_id="call_1")
+
+        waiter = asyncio.create_task(slots.get("totals"))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        slots.store(ResultSlot(name=name, sql="SELECT 1", dataframe=pd.DataFrame()))
+
+        assert (await waiter).sql == "SELECT 1"
+        assert slots.for_tool_call("call_1").name == "totals"
+
+    @pytest.mark.asyncio
+    async def test_reserve_generates_names_and_rejects_invalid_ones(self):
+        slots = ResultSlots()
+
+        assert slots.reserve() == "result_1"
+        assert slots.reserve() == "result_2"
+        with pytest.raises(ValueError):
+            slots.reserve("drop table;")
+
+    @pytest.mark.asyncio
+    async def test_released_slot_resolves_to_none(self):
+        slots = ResultSlots()
+        slots.reserve("failed")
+        slots.release("failed")
+
+        assert await slots.get("failed") is None
+
+    @pytest.mark.asyncio
+    async def test_failed_rerun_drops_the_earlier_result(self):
+        slots = ResultSlots()
+        slots.reserve("totals")
+        slots.store(ResultSlot(name="totals", sql="SELECT 1", dataframe=pd.DataFrame()))
+        slots.release("totals")
+
+        slots.reserve("totals")
+        slots.release("totals")
+
+        assert await slots.get("totals") is None
+        assert slots.latest is None
+
+    @pytest.mark.asyncio
+    async def test_get_latest_waits_for_running_queries(self):
+        slots = ResultSlots()
+        slots.reserve("first")
+        slots.store(ResultSlot(name="first", sql="SELECT 1", dataframe=pd.DataFrame()))
+        slots.release("first")
+        name = slots.reserve()
+
+        waiter = asyncio.create_task(slots.get())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        slots.store(ResultSlot(name=name, sql="SELECT 2", dataframe=pd.DataFrame()))
+
+        assert (await waiter).sql == "SELECT 2"
+
+    @pytest.mark.asyncio
+    async def test_parallel_tool_calls_use_named_results(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("MODEL", "test")
+        monkeypatch.chdir(tmp_path)  # `visualize` writes to ./output
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"city": ["a", "b", "a"], "sales": [1, 2, 3]}).to_csv(
+            data_dir / "sales.csv", index=False
+        )
+        dataset_service = DatasetService(data_dir=str(data_dir))
+        dataset_service.load()
+        context = AgentContext(
+            datasets=dataset_service.datasets,
+            query_service=QueryService(dataset_service),
+        )
+
+        def model(messages, info):
+            if len(messages) == 1:
+                return ModelResponse(
+                    parts=[
+                        ToolCallPart(
+                            "query_data",
+                            {
+                                "sql": "SELECT city, SUM(sales) AS total "
+                                "FROM sales GROUP BY city ORDER BY city",
+                                "description": "totals",
+                                "name": "totals",
+                            },
+                        ),
+                        ToolCallPart(
+                            "query_data",
+                            {
+                                "sql": "SELECT COUNT(*) AS n FROM sales",
+                                "description": "count",
+                            },
+                        ),
+                        ToolCallPart(
+                            "visualize",
+                            {
+                                "code": "result = df",
+                                "title": "slot test",
+                                "result_type": "table",
+                                "description": "totals table",
+                                "result_name": "totals",
+                            },
+                        ),
+                    ]
+                )
+            return ModelResponse(parts=[TextPart("done")])
+
+        agent = create_agent("")
+        with agent.override(model=FunctionModel(model)):
+            result = await agent.run("question", deps=context)
+
+        visualize_result = next(
+            part.content
+            for message in result.all_messages()
+            for part in message.parts
+            if getattr(part, "tool_name", None) == "visualize"
+            and hasattr(part, "content")
+        )
+        assert "Shape: 2 rows x 2 columns" in visualize_result
+        assert sorted(context.results.names) == ["result_2", "totals"]
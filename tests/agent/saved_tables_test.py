@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+from pydantic_ai.messages import ModelResponse, SystemPromptPart, TextPart, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+
+from src.agent.agent import create_agent
+from src.agent.context import AgentContext
+from src.services.dataset_service import DatasetService
+from src.services.query_service import QueryService
+from src.services.session_table_service import SessionTableService
+
+
+class TestSavedTables:
+    @pytest.mark.asyncio
+    async def test_saved_table_is_listed_in_next_turn_prompt(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("MODEL", "test")
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"customer": ["a", "b", "c"], "spend": [5, 50, 500]}).to_csv(
+            data_dir / "orders.csv", index=False
+        )
+        dataset_service = DatasetService(data_dir=str(data_dir))
+        dataset_service.load()
+        session_tables = SessionTableService(dataset_service)
+        context = AgentContext(
+            datasets=dataset_service.datasets,
+            query_service=QueryService(dataset_service, session_tables=session_tables),
+            session_id="s-1",
+            session_tables=session_tables,
+        )
+        prompts = []
+
+        def model(messages, info):
+            prompts.append(
+                "\n".join(
+                    part.content
+                    for part in messages[0].parts
+                    if isinstance(part, SystemPromptPart)
+                )
+            )
+            if len(prompts) == 1:
+                return ModelResponse(
+                    parts=[
+                        ToolCallPart(
+                            "query_data",
+                            {
+                                "sql": "SELECT * FROM orders WHERE spend > 10",
+                                "description": "big spenders",
+                                "save_as": "big_spenders",
+                            },
+                        )
+                    ]
+                )
+            if len(prompts) == 3:
+                return ModelResponse(
+                    parts=[
+                        ToolCallPart(
+                            "query_data",
+                            {
+                                "sql": "SELECT COUNT(*) AS n FROM big_spenders",
+                                "description": "count",
+                            },
+                        )
+                    ]
+                )
+            return ModelResponse(parts=[TextPart("done")])
+
+        agent = create_agent("")
+        with agent.override(model=FunctionModel(model)):
+            first = await agent.run("save them", deps=context)
+            second = await agent.run(
+                "how many?", deps=context, message_history=first.all_messages()
+            )
+
+        assert "Saved as table: big_spenders" in str(first.all_messages())
+        assert "## Saved Tables" not in prompts[0]
+        assert "**big_spenders** (2 rows, 2 columns)" in prompts[2]
+        assert "Result: 1 rows x 1 columns" in str(second.new_messages())
@@ -4,16 +4,63 @@ from src.main import app
 from pydantic_ai import AgentRunResultEvent
 from pydantic_ai.messages import PartDeltaEvent, TextPartDelta
 
+from src.services.batch_service import BatchService
+from src.services.connection_monitor import ConnectionMonitor
 from src.services.dataset_service import DatasetService
+from src.services.query_log_service import QueryLogService
+from src.services.query_service import QueryService
+from src.services.result_handle_service import ResultHandleService
 from src.services.session_service import SessionService
+from src.services.session_table_service import SessionTableService
+from src.services.usage_service import UsageService
+from src.usecases.chat_usecase import ChatUseCase
 
 
 @pytest.fixture
-def client() -> TestClient:  # type: ignore[misc]
+def client(tmp_path) -> TestClient:  # type: ignore[misc]
     with TestClient(app) as test_client:
         app.state.dataset_service = DatasetService(data_dir="data")
         app.state.dataset_service.load()
         app.state.session_service = SessionService()
+        app.state.query_log_service = QueryLogService(
+            path=str(tmp_path / "query_log.jsonl")
+        )
+        app.state.session_table_service = SessionTableService(app.state.dataset_service)
+        app.state.query_service = QueryService(
+            app.state.dataset_service,
+            query_log=app.state.query_log_service,
+            session_tables=app.state.session_table_service,
+        )
+        app.state.result_handle_service = ResultHandleService(
+            app.state.dataset_service, app.state.query_service
+        )
+        app.state.session_service.add_delete_listener(
+            app.state.result_handle_service.drop_session
+        )
+        app.state.session_service.add_delete_listener(
+            app.state.session_table_service.drop_session
+        )
+        app.state.answer_cache_service = None
+        app.state.model_router = None
+        app.state.connection_monitor = ConnectionMonitor()
+        app.state.sample_service = None
+        app.state.rollup_service = None
+        app.state.usage_service = UsageService()
+        app.state.session_service.add_delete_listener(
+            app.state.usage_service.drop_session
+        )
+        app.state.batch_service = BatchService(
+            ChatUseCase(
+                app.state.dataset_service,
+                app.state.session_service,
+                app.state.query_service,
+                app.state.result_handle_service,
+                usage_service=app.state.usage_service,
+            ).collect_agent_response,
+            app.state.session_service,
+            path=str(tmp_path / "batches"),
+            retry_delay_seconds=0,
+        )
         yield test_client
 
 
@@ -0,0 +1,48 @@
+import io
+import json
+
+import pytest
+from unittest.mock import patch
+
+from main import parse_args, read_questions, run_batch
+from src.services.dataset_service import DatasetService
+from src.services.session_service import SessionService
+from src.usecases.chat_usecase import ChatUseCase
+
+
+class TestCli:
+    def setup_method(self):
+        self.session_service = SessionService()
+        self.chat_usecase = ChatUseCase(DatasetService(), self.session_service)
+
+    def test_read_questions_skips_blank_lines_and_comments(self, tmp_path):
+        path = tmp_path / "questions.txt"
+        path.write_text("# nightly\nHow many rows?\n\n  Top 5 customers?  \n")
+
+        assert read_questions(str(path)) == ["How many rows?", "Top 5 customers?"]
+
+    def test_parse_args_rejects_zero_concurrency(self):
+        with pytest.raises(SystemExit):
+            parse_args(["--batch", "q.txt", "--concurrency", "0"])
+
+    @pytest.mark.asyncio
+    @patch("src.usecases.chat_usecase.create_agent")
+    async def test_run_batch_writes_one_line_per_question(
+        self, mock_create_agent, fake_agent_factory
+    ):
+        mock_create_agent.side_effect = lambda _info: fake_agent_factory(
+            ["<thinking>x</thinking>", "Answer", " ready"]
+        )
+        output = io.StringIO()
+
+        records = await run_batch(
+            self.chat_usecase, self.session_service, ["a", "b", "c"], 2, output
+        )
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert all(line["answer"] == "Answer ready" for line in lines)
+        assert all(line["error"] is None for line in lines)
+        assert all(line["duration_ms"] >= 0 for line in lines)
+        assert [r["question"] for r in records] == ["a", "b", "c"]
+        assert self.session_service.list_sessions() == []
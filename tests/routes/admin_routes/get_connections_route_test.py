@@ -0,0 +1,13 @@
+class TestGetConnectionsRoute:
+    def test_get_connection_stats(self, client):
+        monitor = client.app.state.connection_monitor
+        monitor.opened()
+        monitor.queued(depth=1)
+
+        response = client.get("/api/admin/connections")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["open_connections"] == 1
+        assert body["queued_events"] == 1
+        assert body["max_queued_events"] == monitor.max_queued_events
@@ -0,0 +1,16 @@
+class TestGetQueryLogRoute:
+    def test_get_query_log_with_success(self, client):
+        query_service = client.app.state.query_service
+        query_service.execute("SELECT COUNT(*) FROM sales WHERE quantity > 1")
+        query_service.execute("SELECT COUNT(*) FROM sales WHERE quantity > 5")
+        query_service.execute("SELECT 42 AS answer")
+
+        response = client.get("/api/admin/query-log", params={"limit": 1})
+
+        assert response.status_code == 200
+        frequent = response.json()["most_frequent"]
+        assert len(frequent) == 1
+        assert frequent[0]["normalized_sql"] == (
+            "SELECT count(*) FROM sales WHERE quantity > ?"
+        )
+        assert frequent[0]["count"] == 2
@@ -0,0 +1,36 @@
+from unittest.mock import MagicMock
+
+from src.services.rollup_service import Measure, Rollup
+
+
+class TestGetRollupsRoute:
+    def test_rollups_disabled(self, client):
+        response = client.get("/api/admin/rollups")
+
+        assert response.status_code == 200
+        assert response.json()["enabled"] is False
+
+    def test_get_rollup_report(self, client):
+        rollup_service = MagicMock()
+        rollup_service.hit_counts.return_value = (8, 6)
+        rollup_service.rollups.return_value = [
+            Rollup(
+                name="sales_1a2b3c4d",
+                dataset="sales",
+                version="v1",
+                groups=("product",),
+                measures=frozenset({Measure("sum", "amount"), Measure("count_star")}),
+                rows=5,
+                source_rows=20_000,
+                built_at="2024-01-01T00:00:00+00:00",
+                hits=6,
+            )
+        ]
+        client.app.state.rollup_service = rollup_service
+
+        response = client.get("/api/admin/rollups")
+
+        body = response.json()
+        assert body["hit_rate"] == 0.75
+        assert body["rollups"][0]["groups"] == ["product"]
+        assert body["rollups"][0]["measures"] == ["count_star()", "sum(amount)"]
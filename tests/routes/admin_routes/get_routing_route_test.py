@@ -0,0 +1,24 @@
+from src.agent.model_router import FAST_TIER, ModelRouter, RoutingDecision
+
+
+class TestGetRoutingRoute:
+    def test_routing_disabled(self, client):
+        response = client.get("/api/admin/routing")
+
+        assert response.status_code == 200
+        assert response.json() == {"enabled": False, "tiers": {}, "recent": []}
+
+    def test_get_routing_report(self, client):
+        router = ModelRouter("test", "test")
+        router.record(
+            RoutingDecision(FAST_TIER, "test", ["simple question"]), 12.0, question="q"
+        )
+        client.app.state.model_router = router
+
+        response = client.get("/api/admin/routing")
+
+        body = response.json()
+        assert body["enabled"]
+        assert body["tiers"]["fast"]["runs"] == 1
+        assert body["tiers"]["fast"]["avg_ms"] == 12.0
+        assert body["recent"][0]["reasons"] == ["simple question"]
@@ -0,0 +1,17 @@
+from pydantic_ai.usage import RunUsage
+
+
+class TestGetUsageRoute:
+    def test_get_usage_report(self, client):
+        usage_service = client.app.state.usage_service
+        usage_service.record(
+            "s1", RunUsage(input_tokens=120, output_tokens=30, requests=2), ["sales"]
+        )
+
+        response = client.get("/api/admin/usage")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"]["total_tokens"] == 150
+        assert body["by_dataset"]["sales"]["requests"] == 2
+        assert body["top_sessions"][0]["session_id"] == "s1"
@@ -0,0 +1,42 @@
+import time
+from unittest.mock import patch
+
+
+class TestBatchRoutes:
+    def _wait_for(self, client, job_id):
+        for _ in range(200):
+            job = client.get(f"/api/batches/{job_id}").json()
+            if job["status"] in ("succeeded", "failed"):
+                return job
+            time.sleep(0.01)
+        raise AssertionError("batch did not finish")
+
+    @patch("src.usecases.chat_usecase.create_agent")
+    def test_create_batch_and_poll_results(
+        self, mock_create_agent, client, fake_agent_factory
+    ):
+        mock_create_agent.side_effect = lambda _info: fake_agent_factory(
+            ["<thinking>plan</thinking>", "Forty", " two"]
+        )
+
+        response = client.post(
+            "/api/batches/", json={"questions": ["How many?", "Which one?"]}
+        )
+
+        assert response.status_code == 202
+        job = self._wait_for(client, response.json()["job_id"])
+        assert job["status"] == "succeeded"
+        assert job["completed"] == 2
+        assert [item["answer"] for item in job["items"]] == ["Forty two"] * 2
+        assert all(item["duration_ms"] is not None for item in job["items"])
+        assert client.app.state.session_service.list_sessions() == []
+
+    def test_create_batch_with_unknown_session(self, client):
+        response = client.post(
+            "/api/batches/", json={"questions": ["Hi"], "session_id": "missing"}
+        )
+
+        assert response.status_code == 404
+
+    def test_get_unknown_batch(self, client):
+        assert client.get("/api/batches/unknown").status_code == 404
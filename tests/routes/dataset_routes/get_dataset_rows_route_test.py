@@ -0,0 +1,33 @@
+class TestGetDatasetRowsRoute:
+    def test_get_dataset_rows_route(self, client):
+        response = client.get(
+            "/api/datasets/sales/rows", params={"limit": 5, "offset": 2}
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["name"] == "sales"
+        assert len(body["rows"]) == 5
+        assert body["next_cursor"] is not None
+        assert response.headers["etag"]
+        assert "must-revalidate" in response.headers["cache-control"]
+
+    def test_get_dataset_rows_not_modified(self, client):
+        response = client.get("/api/datasets/sales/rows", params={"limit": 5})
+        etag = response.headers["etag"]
+
+        cached = client.get(
+            "/api/datasets/sales/rows",
+            params={"limit": 5},
+            headers={"If-None-Match": etag},
+        )
+        assert cached.status_code == 304
+
+    def test_get_dataset_rows_invalid_filter(self, client):
+        response = client.get(
+            "/api/datasets/sales/rows", params={"filter": "nope:eq:1"}
+        )
+        assert response.status_code == 400
+
+    def test_get_dataset_rows_not_found(self, client):
+        response = client.get("/api/datasets/nonexistent/rows")
+        assert response.status_code == 404
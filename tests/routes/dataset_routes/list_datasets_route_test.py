@@ -1,4 +1,5 @@
 import pandas as pd
+from src.services.dataset_service import DatasetService
 
 
 class TestListDatasetsRoute:
@@ -13,3 +14,19 @@ class TestListDatasetsRoute:
         response = client.get("/api/datasets")
         assert response.status_code == 200
         assert len(response.json()) > 0
+        assert all("memory_bytes" in dataset for dataset in response.json())
+
+    def test_reload_datasets_route(self, client, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        csv_file = data_dir / "sales.csv"
+        csv_file.write_text("id\n1\n")
+        client.app.state.dataset_service = DatasetService(data_dir=str(data_dir))
+        client.app.state.dataset_service.load()
+        with open(csv_file, "a") as f:
+            f.write("2\n")
+
+        response = client.post("/api/datasets/reload")
+
+        assert response.status_code == 200
+        assert response.json()[0]["rows"] == 2
@@ -0,0 +1,68 @@
+import plotly.graph_objects as go
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routes.artifact_files import IMMUTABLE_CACHE_CONTROL, ArtifactFiles
+from src.services.infrastructure.artifact_storage import ensure_plotly_js, precompress
+
+
+class TestArtifactFiles:
+    def setup_method(self):
+        self.payload = b"id,amount\n" + b"1,10.5\n" * 2000
+
+    def _client(self, tmp_path) -> TestClient:
+        app = FastAPI()
+        app.mount("/files", ArtifactFiles(directory=str(tmp_path)))
+        return TestClient(app)
+
+    def test_serves_gzip_variant_with_etag(self, tmp_path):
+        (tmp_path / "table.csv").write_bytes(self.payload)
+        precompress(str(tmp_path / "table.csv"))
+        client = self._client(tmp_path)
+
+        response = client.get("/files/table.csv", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/csv")
+        assert int(response.headers["content-length"]) < len(self.payload) / 10
+        assert response.content == self.payload
+        assert response.headers["cache-control"] == "no-cache"
+
+        revalidated = client.get(
+            "/files/table.csv",
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": response.headers["etag"],
+            },
+        )
+        assert revalidated.status_code == 304
+
+    def test_range_request_reads_identity_bytes(self, tmp_path):
+        (tmp_path / "table.csv").write_bytes(self.payload)
+        precompress(str(tmp_path / "table.csv"))
+
+        response = self._client(tmp_path).get(
+            "/files/table.csv",
+            headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9"},
+        )
+
+        assert response.status_code == 206
+        assert "content-encoding" not in response.headers
+        assert response.content == self.payload[:10]
+
+    def test_figure_references_shared_immutable_plotly_js(self, tmp_path):
+        name = ensure_plotly_js(str(tmp_path))
+        go.Figure(go.Bar(x=[1, 2], y=[3, 4])).write_html(
+            str(tmp_path / "chart.html"), include_plotlyjs=name
+        )
+        client = self._client(tmp_path)
+
+        html = (tmp_path / "chart.html").read_text()
+        assert f'src="{name}"' in html
+        assert len(html) < 100_000
+
+        script = client.get(f"/files/{name}", headers={"Accept-Encoding": "gzip"})
+        assert script.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert script.headers["content-encoding"] == "gzip"
+        assert int(script.headers["content-length"]) < len(script.content) / 3
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.dataset_service import DatasetService
+
+
+class TestHealthRoutes:
+    def test_liveness_with_success(self, client):
+        response = client.get("/api/health/live")
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+
+    def test_readiness_when_datasets_are_loaded(self, client):
+        response = client.get("/api/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert response.json()["datasets"] > 0
+
+    def test_readiness_after_application_startup(self):
+        # No `client` fixture: the services are the ones the lifespan built,
+        # with file access restricted while the datasets load.
+        with TestClient(app) as client:
+            assert client.app.state.dataset_service.wait_until_loaded(timeout=60)
+
+            response = client.get("/api/health/ready")
+
+        assert response.status_code == 200, response.json()
+        assert response.json()["datasets"] > 0
+
+    def test_readiness_while_datasets_are_loading(self, client):
+        client.app.state.dataset_service = DatasetService(data_dir="data")
+
+        ready = client.get("/api/health/ready")
+        datasets = client.get("/api/datasets/")
+
+        assert ready.status_code == 503
+        assert ready.json()["status"] == "loading"
+        assert ready.headers["Retry-After"] == "1"
+        assert datasets.status_code == 503
+        assert client.get("/api/health/live").status_code == 200
+
+    def test_readiness_when_loading_failed(self, client, tmp_path):
+        not_a_directory = tmp_path / "data"
+        not_a_directory.write_text("")
+        dataset_service = DatasetService(data_dir=str(not_a_directory))
+        dataset_service.load_in_background().exception()
+        client.app.state.dataset_service = dataset_service
+
+        response = client.get("/api/health/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "failed"
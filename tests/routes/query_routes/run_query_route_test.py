@@ -0,0 +1,26 @@
+import json
+
+
+class TestRunQueryRoute:
+    def test_run_query_route_ndjson(self, client):
+        response = client.post(
+            "/api/query/", json={"sql": "SELECT * FROM sales LIMIT 3"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 3
+
+    def test_run_query_route_arrow(self, client):
+        response = client.post(
+            "/api/query/",
+            json={"sql": "SELECT * FROM sales LIMIT 3", "format": "arrow"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == (
+            "application/vnd.apache.arrow.stream"
+        )
+
+    def test_run_query_route_rejects_writes(self, client):
+        response = client.post("/api/query/", json={"sql": "DROP TABLE sales"})
+        assert response.status_code == 400
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from src.main import app
+
+
+class TestGetResultRowsRoute:
+    def test_get_result_rows_route(self, client):
+        session_id = client.post("/api/sessions/").json()["session_id"]
+        handle = app.state.result_handle_service.register(
+            session_id, "SELECT 1", pd.DataFrame({"x": [3, 1, 2]})
+        )
+
+        response = client.get(
+            f"/api/sessions/{session_id}/results/{handle.handle_id}/rows",
+            params={"sort": "-x", "limit": 2},
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["rows"] == [{"x": 3}, {"x": 2}]
+        assert body["total_rows"] == 3
+        assert body["next_cursor"] is not None
+
+    def test_get_result_rows_not_found(self, client):
+        session_id = client.post("/api/sessions/").json()["session_id"]
+        response = client.get(f"/api/sessions/{session_id}/results/missing/rows")
+        assert response.status_code == 404
+
+    def test_get_result_rows_when_re_execution_fails(self, client):
+        session_id = client.post("/api/sessions/").json()["session_id"]
+        service = app.state.result_handle_service
+        handle = service.adopt(
+            session_id,
+            service.register(
+                session_id, "SELECT * FROM missing ORDER BY 1", pd.DataFrame({"x": [1]})
+            ),
+        )
+
+        response = client.get(
+            f"/api/sessions/{session_id}/results/{handle.handle_id}/rows"
+        )
+        assert response.status_code == 400
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from src.services.answer_cache_service import AnswerCacheService
+from src.services.result_handle_service import ResultHandle
+
+
+class TestAnswerCacheService:
+    def setup_method(self):
+        self.cache = AnswerCacheService()
+        self.runs = 0
+
+    async def _run(self, emit, answer):
+        self.runs += 1
+        await emit({"type": "text_delta", "content": "Hello"})
+        await asyncio.sleep(0.01)
+        await emit({"type": "done"})
+        answer.output = "Hello"
+
+    def test_make_key_normalizes_question(self):
+        key = AnswerCacheService.make_key("Top  products by revenue?", "v1", "m")
+
+        assert key == AnswerCacheService.make_key("top products by revenue", "v1", "m")
+        assert key != AnswerCacheService.make_key("top products by revenue", "v2", "m")
+        assert key != AnswerCacheService.make_key("top products by revenue", "v1", "n")
+
+    @pytest.mark.asyncio
+    async def test_fetch_replays_cached_answer(self):
+        first, second = [], []
+
+        async def send_first(event):
+            first.append(event)
+
+        async def send_second(event):
+            second.append(event)
+
+        await self.cache.fetch("key", self._run, send=send_first)
+        answer = await self.cache.fetch("key", self._run, send=send_second)
+
+        assert self.runs == 1
+        assert second == first
+        assert answer.output == "Hello"
+
+    @pytest.mark.asyncio
+    async def test_fetch_coalesces_concurrent_identical_questions(self):
+        received = [[], [], []]
+
+        def sender(i):
+            async def send(event):
+                received[i].append(event["type"])
+
+            return send
+
+        await asyncio.gather(
+            *(self.cache.fetch("key", self._run, send=sender(i)) for i in range(3))
+        )
+
+        assert self.runs == 1
+        assert received == [["text_delta", "done"]] * 3
+
+    @pytest.mark.asyncio
+    async def test_fetch_does_not_cache_failed_runs(self):
+        async def failing_run(emit, answer):
+            self.runs += 1
+            raise RuntimeError("model unavailable")
+
+        with pytest.raises(RuntimeError):
+            await self.cache.fetch("key", failing_run)
+        await self.cache.fetch("key", self._run)
+
+        assert self.runs == 2
+
+    @pytest.mark.asyncio
+    async def test_replayed_table_events_use_adopted_handles(self):
+        handle = ResultHandle(
+            handle_id="original",
+            sql="SELECT 1",
+            columns=["x"],
+            rows=1,
+            nbytes=8,
+            column_types={"x": "INTEGER"},
+        )
+
+        async def run(emit, answer):
+            await emit({"type": "table", "handle_id": "original"}, handle)
+
+        sent = []
+
+        async def send(event):
+            sent.append(event)
+
+        await self.cache.fetch("key", run)
+        await self.cache.fetch("key", run, send=send, adopt=lambda h: "adopted")
+
+        assert sent == [{"type": "table", "handle_id": "adopted"}]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_subscriber_leaves_the_shared_run(self):
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def run(emit, answer):
+            self.runs += 1
+            started.set()
+            await release.wait()
+            await emit({"type": "done"})
+            answer.output = "Hello"
+
+        leader = asyncio.create_task(self.cache.fetch("key", run))
+        await started.wait()
+        waiter = asyncio.create_task(self.cache.fetch("key", run))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        release.set()
+
+        assert (await waiter).output == "Hello"
+        assert leader.cancelled()
+        assert self.runs == 1
+        assert self.cache.get("key") is not None
+
+    @pytest.mark.asyncio
+    async def test_shared_run_is_cancelled_when_every_subscriber_left(self):
+        cancelled = asyncio.Event()
+
+        async def run(emit, answer):
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        leader = asyncio.create_task(self.cache.fetch("key", run))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+
+        assert cancelled.is_set()
+        assert self.cache.get("key") is None
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+
+from src.exceptions.batch.batch_not_found_exception import BatchNotFoundException
+from src.exceptions.session.usage_budget_exceeded_exception import (
+    UsageBudgetExceededException,
+)
+from src.services.batch_service import BatchService
+from src.services.session_service import SessionService
+
+
+class FakeChat:
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or RuntimeError("model overloaded")
+        self.calls = []
+
+    async def answer(self, session_id, question):
+        self.calls.append((session_id, question))
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        await asyncio.sleep(0)
+        return {
+            "answer": f"answer to {question}",
+            "tool_calls": [{"name": "query_data", "args": {"sql": "SELECT 1"}}],
+            "file_urls": ["/api/files/chart.html"],
+            "first_token_ms": 1.0,
+            "duration_ms": 2.0,
+        }
+
+
+class TestBatchService:
+    def setup_method(self):
+        self.session_service = SessionService()
+
+    def _service(self, tmp_path, chat, **kwargs):
+        return BatchService(
+            chat.answer,
+            self.session_service,
+            path=str(tmp_path),
+            retry_delay_seconds=0,
+            **kwargs,
+        )
+
+    @pytest.mark.asyncio
+    async def test_items_are_retried_then_succeed(self, tmp_path):
+        chat = FakeChat(failures=2)
+        service = self._service(tmp_path, chat, workers=1, max_retries=2)
+
+        job = service.submit(["q1", "q2"])
+        await service.join()
+        await service.stop()
+
+        assert job.status == "succeeded"
+        assert [item.attempts for item in job.items] == [3, 1]
+        assert job.items[0].file_urls == ["/api/files/chart.html"]
+        assert self.session_service.list_sessions() == []
+
+    @pytest.mark.asyncio
+    async def test_item_fails_after_max_retries(self, tmp_path):
+        service = self._service(tmp_path, FakeChat(failures=5), max_retries=1)
+
+        job = service.submit(["q1"])
+        await service.join()
+        await service.stop()
+
+        assert job.status == "failed"
+        assert job.items[0].attempts == 2
+        assert job.items[0].error == "model overloaded"
+
+    @pytest.mark.asyncio
+    async def test_item_over_its_usage_budget_is_not_retried(self, tmp_path):
+        chat = FakeChat(failures=1, error=UsageBudgetExceededException("tokens"))
+        service = self._service(tmp_path, chat, max_retries=2)
+
+        job = service.submit(["q1"])
+        await service.join()
+        await service.stop()
+
+        assert job.status == "failed"
+        assert job.items[0].attempts == 1
+        assert len(chat.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_session_runs_questions_in_order(self, tmp_path):
+        chat = FakeChat()
+        service = self._service(tmp_path, chat, workers=3)
+
+        job = service.submit(["first", "second", "third"], shared_session=True)
+        await service.join()
+        await service.stop()
+
+        assert chat.calls == [(job.session_id, q) for q in ("first", "second", "third")]
+        assert self.session_service.list_sessions() == [job.session_id]
+
+    @pytest.mark.asyncio
+    async def test_unfinished_items_resume_after_restart(self, tmp_path):
+        service = self._service(tmp_path, FakeChat())
+        job = service.submit(["q1", "q2"])
+        await service.stop()  # before any worker picked the items
+        saved = json.loads((tmp_path / f"{job.job_id}.json").read_text())
+        saved["items"][0]["status"] = "running"
+        (tmp_path / f"{job.job_id}.json").write_text(json.dumps(saved))
+
+        chat = FakeChat()
+        restarted = self._service(tmp_path, chat)
+        restarted.start()
+        await restarted.join()
+        await restarted.stop()
+
+        assert restarted.get_job(job.job_id).status == "succeeded"
+        assert sorted(q for _, q in chat.calls) == ["q1", "q2"]
+        with pytest.raises(BatchNotFoundException):
+            restarted.get_job("unknown")
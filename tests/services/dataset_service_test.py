@@ -1,5 +1,15 @@
+import duckdb
 import pandas as pd
-from src.services.dataset_service import DatasetService
+import pytest
+
+from src.exceptions.dataset.dataset_not_found_exception import (
+    DatasetNotFoundException,
+)
+from src.exceptions.dataset.invalid_dataset_query_exception import (
+    InvalidDatasetQueryException,
+)
+from src.services.dataset_service import CatalogFrames, DatasetService
+from src.services.infrastructure.rows_query_builder import RowFilter, SortKey
 
 
 class TestDatasetService:
@@ -43,3 +53,482 @@ class TestDatasetService:
         assert response[0]["rows"] == 3
         assert response[0]["columns"] == 2
         assert response[0]["column_names"] == ["col1", "col2"]
+
+    def test_get_rows_with_projection_filter_and_sort(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        df = pd.DataFrame({"id": [1, 2, 3, 4], "city": ["a", "b", "a", "a"]})
+        df.to_csv(data_dir / "cities.csv", index=False)
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        page = service.get_rows(
+            "cities",
+            columns=["id"],
+            filters=[RowFilter(column="city", operator="eq", value="a")],
+            sort=[SortKey(column="id", descending=True)],
+        )
+
+        assert page["columns"] == ["id"]
+        assert page["rows"] == [{"id": 4}, {"id": 3}, {"id": 1}]
+        assert page["total_rows"] == 3
+
+    def test_get_rows_keyset_pagination_matches_offset(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        df = pd.DataFrame({"id": range(10), "score": [5, 3, 5, None, 1, 5, 3, 2, 4, 1]})
+        df.to_csv(data_dir / "scores.csv", index=False)
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        sort = [SortKey(column="score")]
+        first = service.get_rows("scores", sort=sort, limit=4)
+        second = service.get_rows(
+            "scores", sort=sort, limit=4, cursor=first["next_cursor"]
+        )
+        by_offset = service.get_rows("scores", sort=sort, limit=4, offset=4)
+
+        assert second["rows"] == by_offset["rows"]
+
+    def test_get_rows_keyset_pagination_on_float_sort_column(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        charges = [185298.3123456789, 0.1 + 0.2, 1e-7 / 3, 2 / 3, 70.123456789012]
+        pd.DataFrame({"id": range(10), "charges": charges * 2}).to_csv(
+            data_dir / "charges.csv", index=False
+        )
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        sort = [SortKey(column="charges", descending=True)]
+        seen, cursor = [], None
+        for _ in range(10):
+            page = service.get_rows("charges", sort=sort, limit=3, cursor=cursor)
+            seen += [row["id"] for row in page["rows"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert sorted(seen) == list(range(10))
+
+    def test_get_rows_with_unknown_dataset(self):
+        with pytest.raises(DatasetNotFoundException):
+            self.dataset_service.get_rows("missing")
+
+    def test_get_rows_with_unknown_column(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"col1": [1]}).to_csv(data_dir / "one.csv", index=False)
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        with pytest.raises(InvalidDatasetQueryException):
+            service.get_rows("one", columns=["nope"])
+
+    def test_load_semicolon_file_with_decimal_commas(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        (data_dir / "passengers.csv").write_text(
+            "name;age;fare;;;\n" "Allen;29;211,3375;;;\n" "Allison;0,9167;151,55;;;\n"
+        )
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        meta = service.metadata["passengers"]
+
+        assert meta.column_names == ["name", "age", "fare"]
+        assert meta.column_types["fare"] == "DOUBLE"
+        assert service.datasets["passengers"]["age"].tolist() == [29.0, 0.9167]
+
+    @pytest.mark.parametrize("delimiter", [";", "\t"])
+    def test_load_delimited_file_with_decimal_points(self, tmp_path, delimiter):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        (data_dir / "charges.csv").write_text(
+            delimiter.join(["id", "monthly", "total"])
+            + "\n"
+            + "".join(
+                delimiter.join([str(i), f"{i}.25", f"{i * 100}.5"]) + "\n"
+                for i in range(1, 6)
+            )
+        )
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        meta = service.metadata["charges"]
+
+        assert meta.column_types == {
+            "id": "BIGINT",
+            "monthly": "DOUBLE",
+            "total": "DOUBLE",
+        }
+        assert service.datasets["charges"]["total"].tolist()[:2] == [100.5, 200.5]
+
+    def test_load_keeps_yes_no_columns_as_text(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"id": [1, 2], "churn": ["Yes", "No"]}).to_csv(
+            data_dir / "clients.csv", index=False
+        )
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+
+        assert service.metadata["clients"].column_types["churn"] == "VARCHAR"
+
+    def test_load_multiple_files_concurrently(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        for i in range(6):
+            pd.DataFrame({"value": range(i + 1)}).to_csv(
+                data_dir / f"part_{i}.csv", index=False
+            )
+
+        service = DatasetService(data_dir=str(data_dir), max_workers=3)
+        service.load()
+
+        assert [s["rows"] for s in service.get_dataset_summaries()] == [
+            1,
+            2,
+            3,
+            4,
+            5,
+            6,
+        ]
+
+    def test_load_parquet_file_as_view(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"id": [1, 2, 3]}).to_parquet(data_dir / "ids.parquet")
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+
+        assert service.metadata["ids"].is_view
+        assert service.get_dataset_summaries()[0]["rows"] == 3
+
+    def test_load_hive_partitioned_parquet_directory(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        with duckdb.connect() as conn:
+            conn.execute(
+                "COPY (SELECT range AS id, 2023 + range % 2 AS year FROM range(10)) "
+                f"TO '{data_dir / 'orders'}' (FORMAT parquet, PARTITION_BY (year))"
+            )
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        with service.cursor() as conn:
+            plan = conn.execute(
+                "EXPLAIN ANALYZE SELECT COUNT(*) FROM orders WHERE year = 2024"
+            ).fetchall()[0][1]
+
+        assert sorted(service.metadata["orders"].column_names) == ["id", "year"]
+        assert "Scanning Files: 1/2" in plan
+
+    def test_load_suffixes_sources_with_the_same_name(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"id": [1, 2]}).to_csv(data_dir / "sales.csv", index=False)
+        pd.DataFrame({"id": [1, 2, 3]}).to_parquet(data_dir / "sales.parquet")
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+
+        assert service.metadata["sales"].rows == 2
+        assert service.metadata["sales_parquet"].rows == 3
+
+        (data_dir / "sales.csv").unlink()
+        service.load()
+
+        assert service.metadata["sales"].format == "parquet"
+        assert "sales_parquet" not in service.metadata
+
+    def test_large_parquet_views_are_not_loaded_into_frames(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"id": range(10)}).to_parquet(data_dir / "events.parquet")
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+
+        assert len(CatalogFrames(service)["events"]) == 10
+        with pytest.raises(InvalidDatasetQueryException, match="query it with SQL"):
+            CatalogFrames(service, max_view_rows=5)["events"]
+
+    def test_get_rows_keyset_pagination_on_parquet(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"id": range(10), "group": [1, 2] * 5}).to_parquet(
+            data_dir / "groups.parquet"
+        )
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        sort = [SortKey(column="group")]
+        first = service.get_rows("groups", sort=sort, limit=3)
+        second = service.get_rows(
+            "groups", sort=sort, limit=3, cursor=first["next_cursor"]
+        )
+
+        assert (
+            second["rows"]
+            == service.get_rows("groups", sort=sort, limit=3, offset=3)["rows"]
+        )
+
+    def test_load_reports_compressed_memory_per_dataset(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame(
+            {"id": range(50_000), "contract": ["Month-to-month", "One year"] * 25_000}
+        ).to_csv(data_dir / "contracts.csv", index=False)
+        pd.DataFrame({"id": [1, 2, 3]}).to_parquet(data_dir / "ids.parquet")
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        summaries = {s["name"]: s for s in service.get_dataset_summaries()}
+        with service.cursor() as conn:
+            compression = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT compression FROM pragma_storage_info('contracts')"
+                ).fetchall()
+            }
+
+        assert 0 < summaries["contracts"]["memory_bytes"] < 50_000 * 16
+        assert summaries["ids"]["memory_bytes"] == 0
+        assert compression != {"Uncompressed"}
+
+    def test_datasets_are_arrow_backed_with_categorical_strings(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame(
+            {"id": range(6), "city": ["a", "b"] * 3, "code": list("uvwxyz")}
+        ).to_csv(data_dir / "cities.csv", index=False)
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        df = service.datasets["cities"]
+
+        assert isinstance(df["id"].dtype, pd.ArrowDtype)
+        assert isinstance(df["city"].dtype, pd.CategoricalDtype)
+        assert isinstance(df["code"].dtype, pd.ArrowDtype)
+
+    def test_load_in_background_reports_readiness(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"id": [1, 2, 3]}).to_csv(data_dir / "ids.csv", index=False)
+
+        service = DatasetService(data_dir=str(data_dir))
+        assert not service.is_ready
+        future = service.load_in_background()
+
+        assert service.wait_until_loaded(timeout=30)
+        assert future.exception() is None
+        assert service.is_ready
+        assert service.metadata["ids"].rows == 3
+
+    def test_load_indexes_key_columns_and_lists_them(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame(
+            {
+                "customerID": [f"{i:04d}-ABCDE" for i in range(100)],
+                "paid": range(100),
+                "Contract": ["Month-to-month", "One year"] * 50,
+                "region_code": ["EU", "US"] * 50,
+            }
+        ).to_csv(data_dir / "telcoclient.csv", index=False)
+        pd.DataFrame(
+            {
+                "CUST_ID": [f"C{i}" for i in range(99)] + ["C0"],
+                "customer_id": ["x"] * 100,
+            }
+        ).to_csv(data_dir / "credit.csv", index=False)
+
+        service = DatasetService(data_dir=str(data_dir))
+        service.load()
+        with service.cursor() as conn:
+            indexes = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT table_name || '.' || sql FROM duckdb_indexes()"
+                ).fetchall()
+            }
+
+        assert [k.column for k in service.metadata["telcoclient"].keys] == [
+            "customerID"
+        ]
+        assert service.metadata["telcoclient"].keys[0].unique
+        assert service.metadata["credit"].keys[0].distinct_ratio == 0.99
+        assert len(indexes) == 2
+        assert (
+            "Indexed keys (fast lookups and joins): customerID (unique; joins "
+            "credit.customer_id)" in service.dataset_info
+        )
+        assert "CUST_ID (99% distinct)" in service.dataset_info
+
+
+class TestDatasetServiceRefresh:
+    def _load(self, tmp_path, content):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir(exist_ok=True)
+        self.csv_file = data_dir / "sales.csv"
+        self.csv_file.write_text(content)
+        self.service = DatasetService(data_dir=str(data_dir))
+        self.service.load()
+
+    def _rows(self):
+        with self.service.cursor() as conn:
+            return conn.execute("SELECT * FROM sales ORDER BY ALL").fetchall()
+
+    def test_reload_appends_only_the_new_lines(self, tmp_path, monkeypatch):
+        self._load(tmp_path, "id,amount\n1,1.5\n2,2.5\n")
+        version = self.service.get_version("sales")
+        with open(self.csv_file, "a") as f:
+            f.write("3,3.5\n4,4")  # the last line is still being written
+
+        monkeypatch.setattr(
+            "src.services.dataset_service.ingest_csv",
+            lambda *args: pytest.fail("the file was parsed again"),
+        )
+        self.service.load()
+
+        assert self._rows() == [(1, 1.5), (2, 2.5), (3, 3.5)]
+        assert self.service.metadata["sales"].rows == 3
+        assert self.service.get_version("sales") != version
+
+        with open(self.csv_file, "a") as f:
+            f.write(".5\n")
+        self.service.load()
+        assert self._rows()[-1] == (4, 4.5)
+
+    def test_reload_keeps_unchanged_files(self, tmp_path, monkeypatch):
+        self._load(tmp_path, "id\n1\n")
+        monkeypatch.setattr(
+            "src.services.dataset_service.ingest_csv",
+            lambda *args: pytest.fail("the file was parsed again"),
+        )
+
+        self.service.load()
+
+        assert self.service.metadata["sales"].rows == 1
+
+    def test_reload_whole_file_when_its_start_changed(self, tmp_path):
+        self._load(tmp_path, "id,amount\n1,1.5\n")
+        self.csv_file.write_text("id,amount\n9,1.5\n2,2.5\n")
+
+        self.service.load()
+
+        assert self._rows() == [(2, 2.5), (9, 1.5)]
+
+    def test_reload_whole_file_when_new_lines_change_types(self, tmp_path):
+        self._load(tmp_path, "id,amount\n1,1\n")
+        with open(self.csv_file, "a") as f:
+            f.write("2,n/a\n")
+
+        self.service.load()
+
+        assert self.service.metadata["sales"].column_types["amount"] == "VARCHAR"
+        assert self.service.metadata["sales"].rows == 2
+
+    @pytest.mark.parametrize("amounts", [("1.5", "2.5"), ("1,5", "2,5")])
+    def test_reload_appends_with_the_detected_decimal_separator(
+        self, tmp_path, amounts
+    ):
+        self._load(tmp_path, f"id;amount\n1;{amounts[0]}\n")
+        with open(self.csv_file, "a") as f:
+            f.write(f"2;{amounts[1]}\n")
+
+        self.service.load()
+
+        assert self._rows() == [(1, 1.5), (2, 2.5)]
+
+    def test_reload_recounts_keys_after_an_append(self, tmp_path):
+        rows = "".join(f"{i},{i * 10}\n" for i in range(40))
+        self._load(tmp_path, "customerID,amount\n" + rows)
+        assert self.service.metadata["sales"].keys[0].unique
+
+        with open(self.csv_file, "a") as f:
+            f.write("3,40\n")
+        self.service.load()
+
+        (key,) = self.service.metadata["sales"].keys
+        assert not key.unique
+        assert "customerID (98% distinct)" in self.service.dataset_info
+
+        with open(self.csv_file, "a") as f:
+            f.write("".join(f"{i},0\n" for i in range(10)))
+        self.service.load()
+
+        assert self.service.metadata["sales"].keys == ()
+        with self.service.cursor() as conn:
+            assert conn.execute("SELECT * FROM duckdb_indexes()").fetchall() == []
+
+    def test_reload_drops_datasets_whose_file_was_deleted(self, tmp_path):
+        self._load(tmp_path, "id,amount\n1,1.5\n")
+        pd.DataFrame({"id": [1]}).to_parquet(self.csv_file.with_name("ids.parquet"))
+        self.service.load()
+        self.csv_file.unlink()
+        self.csv_file.with_name("ids.parquet").unlink()
+
+        self.service.load()
+
+        assert self.service.metadata == {}
+        assert "sales" not in self.service._csv_states
+        with self.service.cursor() as conn:
+            assert (
+                conn.execute(
+                    "SELECT table_name FROM information_schema.tables "
+                    "WHERE table_catalog = 'datasets'"
+                ).fetchall()
+                == []
+            )
+        assert "No datasets available" in self.service.dataset_info
+
+    def test_reload_does_not_block_readers(self, tmp_path, monkeypatch):
+        self._load(tmp_path, "id\n1\n")
+        self.csv_file.write_text("id\n2\n3\n")
+        seen = []
+        load_source = self.service._load_source
+
+        def observe(*args):
+            seen.append(
+                (self.service.is_ready, self.service.wait_until_loaded(timeout=0))
+            )
+            return load_source(*args)
+
+        monkeypatch.setattr(self.service, "_load_source", observe)
+        self.service.load()
+
+        assert seen == [(True, True)]
+        assert self.service.metadata["sales"].rows == 2
+
+    def test_failed_reload_keeps_the_previous_datasets(self, tmp_path, monkeypatch):
+        self._load(tmp_path, "id\n1\n")
+        info = self.service.dataset_info
+        self.csv_file.write_text("id\n2\n3\n")
+
+        def fail(*args):
+            raise duckdb.OutOfMemoryException("out of memory")
+
+        monkeypatch.setattr(self.service, "_compact", fail)
+        with pytest.raises(duckdb.OutOfMemoryException):
+            self.service.load()
+
+        assert self.service.is_ready
+        assert self.service.load_error is not None
+        assert self.service.dataset_info == info
+        assert self.service.metadata["sales"].rows == 1
+
+    def test_appended_rows_are_found_through_the_key_index(self, tmp_path):
+        self._load(tmp_path, "order_id,amount\n1,10\n2,20\n")
+
+        with open(self.csv_file, "a") as f:
+            f.write("3,30\n")
+        self.service.load()
+
+        assert [k.column for k in self.service.metadata["sales"].keys] == ["order_id"]
+        with self.service.cursor() as conn:
+            assert conn.execute(
+                "SELECT amount FROM sales WHERE order_id = 3"
+            ).fetchall() == [(30,)]
@@ -0,0 +1,67 @@
+import json
+
+from src.services.infrastructure.sql_shape import normalize_sql
+from src.services.query_log_service import QueryLogService
+
+
+class TestQueryLogService:
+    def test_normalize_sql_replaces_constants(self):
+        first = normalize_sql(
+            "select * from Sales where price > 10 and city in ('a','b')"
+        )
+        second = normalize_sql(
+            "SELECT *  FROM sales WHERE price > 99 AND city IN ('c')"
+        )
+
+        assert first == "SELECT * FROM sales WHERE price > ? AND city IN (?, ...)"
+        assert (
+            normalize_sql("SELECT * FROM sales WHERE price > 99 AND city IN ('c', 'd')")
+            == first
+        )
+        assert second == "SELECT * FROM sales WHERE price > ? AND city IN (?)"
+
+    def test_record_aggregates_by_shape(self, tmp_path):
+        service = QueryLogService(path=str(tmp_path / "log.jsonl"))
+
+        service.record("SELECT * FROM sales WHERE id = 1", 5, rows=1, session_id="s1")
+        service.record("SELECT * FROM sales WHERE id = 2", 15, rows=1, session_id="s2")
+        service.record("SELECT COUNT(*) FROM titanic", 50, rows=1)
+
+        frequent = service.most_frequent(1)[0]
+        assert frequent.count == 2
+        assert frequent.avg_ms == 10
+        assert frequent.tables == ["sales"]
+        assert service.slowest(1)[0].tables == ["titanic"]
+
+    def test_log_is_append_only_and_replayed(self, tmp_path):
+        path = tmp_path / "log.jsonl"
+        QueryLogService(path=str(path)).record("SELECT 1", 5, rows=1, error="boom")
+
+        service = QueryLogService(path=str(path))
+        service.record("SELECT 2", 5, rows=1)
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["sql"] for line in lines] == ["SELECT 1", "SELECT 2"]
+        assert service.most_frequent(1)[0].count == 2
+        assert service.most_frequent(1)[0].errors == 1
+
+    def test_slow_queries_get_their_plan_captured_once(self, tmp_path):
+        service = QueryLogService(path=str(tmp_path / "log.jsonl"), slow_query_ms=100)
+        profiled = []
+
+        def profile(sql):
+            profiled.append(sql)
+            return "PLAN"
+
+        service.record("SELECT 1", 10, rows=1, profile=profile)
+        service.record("SELECT 2", 500, rows=1, profile=profile)
+        service.wait_for_profiles()
+        service.record("SELECT 3", 500, rows=1, profile=profile)
+        service.wait_for_profiles()
+
+        assert profiled == ["SELECT 2"]
+        assert service.slowest(1)[0].plan == "PLAN"
+        assert (
+            QueryLogService(path=str(tmp_path / "log.jsonl")).slowest(1)[0].plan
+            == "PLAN"
+        )
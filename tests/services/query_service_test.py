@@ -0,0 +1,196 @@
+import io
+import json
+import threading
+import time
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.exceptions.query.invalid_query_exception import InvalidQueryException
+from src.exceptions.query.query_limit_exceeded_exception import (
+    QueryLimitExceededException,
+)
+from src.exceptions.session.run_cancelled_exception import RunCancelledException
+from src.services.dataset_service import DatasetService
+from src.services.infrastructure.cancellation import Cancellation
+from src.services.query_log_service import QueryLogService
+from src.services.query_service import QueryService
+
+
+class TestQueryService:
+    def setup_method(self):
+        self.dataset_service = DatasetService()
+        self.query_service = QueryService(self.dataset_service, rows_per_batch=2)
+
+    def _load(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        df = pd.DataFrame({"id": [1, 2, 3], "amount": [1.5, None, 3.0]})
+        df.to_csv(data_dir / "payments.csv", index=False)
+        self.dataset_service = DatasetService(data_dir=str(data_dir))
+        self.dataset_service.load()
+        self.query_service = QueryService(self.dataset_service, rows_per_batch=2)
+
+    def test_validate_with_success(self):
+        assert self.query_service.validate("SELECT 1") == "SELECT 1"
+
+    @pytest.mark.parametrize(
+        "sql",
+        ["DROP TABLE payments", "SELECT 1; SELECT 2", "INSERT INTO t VALUES (1)"],
+    )
+    def test_validate_rejects_non_select(self, sql):
+        with pytest.raises(InvalidQueryException):
+            self.query_service.validate(sql)
+
+    def test_execute_with_success(self, tmp_path):
+        self._load(tmp_path)
+        result = self.query_service.execute("SELECT SUM(id) AS total FROM payments")
+        assert result["total"].iloc[0] == 6
+
+    def test_execute_with_invalid_table(self, tmp_path):
+        self._load(tmp_path)
+        with pytest.raises(InvalidQueryException):
+            self.query_service.execute("SELECT * FROM missing")
+
+    def test_stream_ndjson_with_success(self, tmp_path):
+        self._load(tmp_path)
+        body = b"".join(
+            self.query_service.stream_ndjson("SELECT * FROM payments ORDER BY id")
+        )
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert rows == [
+            {"id": 1, "amount": 1.5},
+            {"id": 2, "amount": None},
+            {"id": 3, "amount": 3.0},
+        ]
+
+    def test_stream_arrow_with_success(self, tmp_path):
+        self._load(tmp_path)
+        body = b"".join(self.query_service.stream_arrow("SELECT * FROM payments"))
+        table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+        assert table.num_rows == 3
+        assert table.column_names == ["id", "amount"]
+
+    def test_execute_rejects_plan_above_row_estimate(self, tmp_path):
+        self._load(tmp_path)
+        query_service = QueryService(self.dataset_service, max_estimated_rows=5)
+
+        with pytest.raises(QueryLimitExceededException) as e:
+            query_service.execute("SELECT * FROM payments a, payments b")
+        assert "GROUP BY" in str(e.value)
+
+    def test_execute_interrupts_query_after_timeout(self):
+        query_service = QueryService(self.dataset_service, timeout_seconds=0.2)
+
+        with pytest.raises(QueryLimitExceededException) as e:
+            query_service.execute(
+                "WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r) "
+                "SELECT COUNT(*) FROM r"
+            )
+        assert "longer than 0.2s" in str(e.value)
+
+    @pytest.mark.parametrize("stream", ["stream_ndjson", "stream_arrow"])
+    def test_stream_interrupts_query_after_timeout(self, stream):
+        query_service = QueryService(
+            self.dataset_service, timeout_seconds=0.5, max_estimated_rows=10**12
+        )
+        chunks = getattr(query_service, stream)(
+            "SELECT range FROM range(10000000000) WHERE hash(range) % 100 = 0"
+        )
+
+        started = time.perf_counter()
+        with pytest.raises(QueryLimitExceededException):
+            for _ in chunks:
+                pass
+        assert time.perf_counter() - started < 5
+
+    def test_execute_interrupts_query_when_cancelled(self):
+        cancellation = Cancellation()
+        threading.Timer(0.2, cancellation.cancel).start()
+
+        with pytest.raises(RunCancelledException):
+            self.query_service.execute(
+                "WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r) "
+                "SELECT COUNT(*) FROM r",
+                cancellation=cancellation,
+            )
+
+    def test_cancelled_query_is_logged_as_an_error(self, tmp_path):
+        query_log = QueryLogService(path=str(tmp_path / "queries.jsonl"))
+        query_service = QueryService(self.dataset_service, query_log=query_log)
+        cancellation = Cancellation()
+        cancellation.cancel()
+
+        with pytest.raises(RunCancelledException):
+            query_service.execute("SELECT 1 AS x", cancellation=cancellation)
+
+        assert query_log.most_frequent(1)[0].errors == 1
+
+    def test_execute_does_not_start_when_already_cancelled(self):
+        cancellation = Cancellation()
+        cancellation.cancel()
+
+        with pytest.raises(RunCancelledException):
+            self.query_service.execute(
+                "SELECT * FROM range(10000000) t CROSS JOIN range(1000) u",
+                cancellation=cancellation,
+            )
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT * FROM read_csv('/etc/passwd', header = false)",
+            "SELECT * FROM read_text('/etc/hostname')",
+            "SELECT * FROM '/etc/passwd'",
+            "SELECT * FROM duckdb_tables()",
+            "SELECT * FROM information_schema.tables",
+            "SELECT * FROM results.anything",
+            "SELECT * FROM (SHOW ALL TABLES)",
+            "SELECT * FROM (DESCRIBE payments)",
+            "SELECT * FROM (SUMMARIZE payments)",
+            "SELECT * FROM payments JOIN (FROM (SHOW TABLES)) s ON true",
+        ],
+    )
+    def test_queries_cannot_read_files_or_other_schemas(self, tmp_path, sql):
+        self._load(tmp_path)
+
+        with pytest.raises(InvalidQueryException):
+            self.query_service.execute(sql)
+        with pytest.raises(InvalidQueryException):
+            self.query_service.stream_ndjson(sql)
+
+    def test_file_access_is_disabled_for_the_whole_catalog(self, tmp_path):
+        self._load(tmp_path)
+
+        with self.dataset_service.cursor() as conn:
+            with pytest.raises(duckdb.PermissionException):
+                conn.execute("SELECT * FROM read_text('/etc/hostname')")
+            with pytest.raises(duckdb.InvalidInputException):
+                conn.execute("SET enable_external_access = true")
+
+    def test_generators_and_ctes_are_allowed(self, tmp_path):
+        self._load(tmp_path)
+
+        df = self.query_service.execute(
+            "WITH p AS (SELECT * FROM main.payments) "
+            "SELECT COUNT(*) AS n FROM p, range(2)"
+        )
+
+        assert df["n"].iloc[0] == 6
+
+    def test_memory_limit_and_threads_are_applied(self):
+        # The configuration is locked by the first QueryService of a catalog.
+        dataset_service = DatasetService()
+        QueryService(dataset_service, memory_limit="512MB", threads=2)
+
+        with dataset_service.cursor() as conn:
+            settings = dict(
+                conn.execute(
+                    "SELECT name, value FROM duckdb_settings() "
+                    "WHERE name IN ('memory_limit', 'threads')"
+                ).fetchall()
+            )
+        assert settings["threads"] == "2"
+        assert settings["memory_limit"].startswith("488")
@@ -0,0 +1,118 @@
+import pandas as pd
+import pytest
+
+from src.exceptions.session.result_handle_not_found_exception import (
+    ResultHandleNotFoundException,
+)
+from src.services.dataset_service import DatasetService
+from src.services.infrastructure.rows_query_builder import SortKey
+from src.services.query_service import QueryService
+from src.services.result_handle_service import ResultHandleService
+
+
+class TestResultHandleService:
+    def setup_method(self):
+        self.dataset_service = DatasetService()
+        self.query_service = QueryService(self.dataset_service)
+        self.result_handle_service = ResultHandleService(
+            self.dataset_service, self.query_service
+        )
+
+    def test_register_and_get_rows_with_success(self):
+        df = pd.DataFrame({"id": range(300), "value": range(300, 0, -1)})
+        handle = self.result_handle_service.register("session", "SELECT 1", df)
+
+        page = self.result_handle_service.get_rows(
+            "session",
+            handle.handle_id,
+            sort=[SortKey(column="value")],
+            offset=250,
+            limit=10,
+        )
+
+        assert handle.rows == 300
+        assert page["total_rows"] == 300
+        assert page["rows"][0] == {"id": 49, "value": 251}
+
+    def test_get_rows_re_executes_evicted_result(self):
+        service = ResultHandleService(
+            self.dataset_service, self.query_service, max_bytes_per_session=1
+        )
+        first = service.register(
+            "session",
+            "SELECT 42 AS answer ORDER BY answer",
+            pd.DataFrame({"answer": [42]}),
+        )
+        service.register("session", "SELECT 1 AS x", pd.DataFrame({"x": [1]}))
+        assert not first.materialized
+
+        page = service.get_rows("session", first.handle_id)
+
+        assert first.materialized
+        assert page["rows"] == [{"answer": 42}]
+
+    def test_evicted_unordered_result_is_forgotten(self):
+        service = ResultHandleService(
+            self.dataset_service, self.query_service, max_bytes_per_session=1
+        )
+        first = service.register(
+            "session", "SELECT 42 AS answer", pd.DataFrame({"answer": [42]})
+        )
+        service.register("session", "SELECT 1 AS x", pd.DataFrame({"x": [1]}))
+
+        assert not first.replayable
+        with pytest.raises(ResultHandleNotFoundException):
+            service.get_rows("session", first.handle_id)
+
+    def test_results_of_all_sessions_fit_the_total_budget(self):
+        df = pd.DataFrame({"x": range(1000)})
+        service = ResultHandleService(
+            self.dataset_service,
+            self.query_service,
+            max_bytes_total=df.memory_usage(deep=True).sum() * 2,
+        )
+        handles = [
+            service.register(f"session-{i}", "SELECT 1 AS x ORDER BY x", df)
+            for i in range(3)
+        ]
+
+        assert [h.materialized for h in handles] == [False, True, True]
+        assert service.get_rows("session-0", handles[0].handle_id)["rows"] == [{"x": 1}]
+        assert [h.materialized for h in handles] == [True, False, True]
+
+    def test_get_rows_of_a_session_deleted_meanwhile(self, monkeypatch):
+        handle = self.result_handle_service.adopt(
+            "session",
+            self.result_handle_service.register(
+                "other", "SELECT 42 AS answer ORDER BY answer", pd.DataFrame({"a": [1]})
+            ),
+        )
+        execute = self.query_service.execute
+
+        def execute_while_the_session_is_deleted(*args):
+            self.result_handle_service.drop_session("session")
+            return execute(*args)
+
+        monkeypatch.setattr(
+            self.query_service, "execute", execute_while_the_session_is_deleted
+        )
+
+        with pytest.raises(ResultHandleNotFoundException):
+            self.result_handle_service.get_rows("session", handle.handle_id)
+        with self.dataset_service.cursor() as conn:
+            tables = conn.execute(
+                "SELECT table_name FROM duckdb_tables() WHERE schema_name = 'results'"
+            ).fetchall()
+        assert (handle.handle_id,) not in tables
+
+    def test_get_rows_with_unknown_handle(self):
+        with pytest.raises(ResultHandleNotFoundException):
+            self.result_handle_service.get_rows("session", "missing")
+
+    def test_drop_session_forgets_results(self):
+        handle = self.result_handle_service.register(
+            "session", "SELECT 1", pd.DataFrame({"x": [1]})
+        )
+        self.result_handle_service.drop_session("session")
+        with pytest.raises(ResultHandleNotFoundException):
+            self.result_handle_service.get_handle("session", handle.handle_id)
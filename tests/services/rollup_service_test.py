@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from src.services.dataset_service import DatasetService
+from src.services.query_log_service import QueryLogService
+from src.services.query_service import QueryService
+from src.services.rollup_service import RollupService
+
+BY_PRODUCT = (
+    "SELECT product, SUM(amount) AS total, COUNT(*) AS n FROM sales "
+    "WHERE region = 'EU' GROUP BY product ORDER BY total DESC"
+)
+CHURN_RATE = (
+    "SELECT s.product, ROUND(100.0 * AVG(CASE WHEN s.churn = 'Yes' THEN 1 "
+    "ELSE 0 END), 2) AS churn_rate FROM sales s GROUP BY s.product "
+    "HAVING COUNT(*) > 10 ORDER BY 1"
+)
+
+
+class TestRollupService:
+    def setup_method(self):
+        self.dataset_service = DatasetService()
+
+    def _load(self, tmp_path, rows=20_000):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir(exist_ok=True)
+        rng = np.random.default_rng(0)
+        pd.DataFrame(
+            {
+                "product": rng.choice(list("abcde"), rows),
+                "Region": rng.choice(["EU", "US", "ASIA"], rows),
+                "amount": rng.integers(0, 100, rows),
+                "churn": rng.choice(["Yes", "No"], rows),
+            }
+        ).to_csv(data_dir / "sales.csv", index=False)
+        self.dataset_service = DatasetService(data_dir=str(data_dir))
+        self.dataset_service.load()
+        self.query_log = QueryLogService(path=str(tmp_path / "query_log.jsonl"))
+        self.query_service = QueryService(
+            self.dataset_service, query_log=self.query_log
+        )
+        self.service = RollupService(
+            self.dataset_service, self.query_log, min_queries=3, min_rows=1000
+        )
+
+    def _run(self, sql, times=3):
+        for _ in range(times):
+            self.query_service.execute(sql)
+
+    def test_advise_materializes_frequent_aggregate_shapes(self, tmp_path):
+        self._load(tmp_path)
+        self._run(BY_PRODUCT)
+        self._run(CHURN_RATE)
+        self._run("SELECT product, MEDIAN(amount) FROM sales GROUP BY product")
+        self._run("SELECT region, SUM(amount) FROM sales GROUP BY region", times=2)
+
+        rollups = {r.groups: r for r in self.service.advise()}
+
+        assert set(rollups) == {("Region", "product"), ("product",)}
+        assert rollups[("Region", "product")].rows == 15
+        assert rollups[("Region", "product")].source_rows == 20_000
+        assert [str(m) for m in sorted(rollups[("product",)].measures, key=str)] == [
+            "count(CASE  WHEN ((churn = 'Yes')) THEN (1) ELSE 0 END)",
+            "count_star()",
+            "sum(CASE  WHEN ((churn = 'Yes')) THEN (1) ELSE 0 END)",
+        ]
+
+    def test_rewritten_queries_return_the_same_result(self, tmp_path):
+        self._load(tmp_path)
+        self._run(BY_PRODUCT)
+        self._run(CHURN_RATE)
+        self.service.advise()
+
+        for sql in [
+            BY_PRODUCT,
+            BY_PRODUCT.replace("'EU'", "'US'"),
+            CHURN_RATE,
+            "SELECT COUNT(*) FROM sales WHERE region = 'US' AND product IN ('a', 'b')",
+        ]:
+            rewritten = self.service.rewrite(sql)
+            assert "datasets.rollups." in rewritten
+            pd.testing.assert_frame_equal(
+                self.query_service.execute(sql, rewritten=rewritten),
+                self.query_service.execute(sql),
+            )
+        assert (
+            self.service.rewrite(
+                "SELECT product, MAX(amount) FROM sales GROUP BY product"
+            )
+            is None
+        )
+        assert self.service.rewrite("SELECT * FROM sales") is None
+        assert self.service.hit_counts() == (5, 4)
+
+    def test_rollups_are_invalidated_by_a_reload(self, tmp_path):
+        self._load(tmp_path)
+        self._run(BY_PRODUCT)
+        (rollup,) = self.service.advise()
+
+        with open(tmp_path / "data" / "sales.csv", "a") as f:
+            f.write("z,EU,1,No\n")
+        self.dataset_service.load()
+
+        assert self.service.rewrite(BY_PRODUCT) is None
+        (rebuilt,) = self.service.advise()
+        assert rebuilt.version != rollup.version
+        assert (
+            "z"
+            in self.query_service.execute(
+                BY_PRODUCT, rewritten=self.service.rewrite(BY_PRODUCT)
+            )["product"].tolist()
+        )
+
+    def test_rollup_not_much_smaller_than_its_dataset_is_rejected(self, tmp_path):
+        self._load(tmp_path)
+        service = RollupService(
+            self.dataset_service, self.query_log, min_rows=1000, max_rows_ratio=0.01
+        )
+        self._run(
+            "SELECT amount, product, COUNT(*) FROM sales GROUP BY amount, product"
+        )
+
+        assert service.advise() == []
+        assert service.rewrite("SELECT COUNT(*) FROM sales") is None
+
+    def test_dropped_rollup_falls_back_to_the_dataset(self, tmp_path):
+        self._load(tmp_path)
+        self._run(BY_PRODUCT)
+        self.service.advise()
+        rewritten = self.service.rewrite(BY_PRODUCT)
+        with self.dataset_service.cursor() as conn:
+            conn.execute("DROP SCHEMA datasets.rollups CASCADE")
+
+        result = self.query_service.execute(BY_PRODUCT, rewritten=rewritten)
+
+        pd.testing.assert_frame_equal(result, self.query_service.execute(BY_PRODUCT))
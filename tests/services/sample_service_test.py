@@ -0,0 +1,72 @@
+import pandas as pd
+
+from src.services.dataset_service import DatasetService
+from src.services.query_service import QueryService
+from src.services.sample_service import SampleService, describe_approximation
+
+
+class TestSampleService:
+    def setup_method(self):
+        self.dataset_service = DatasetService()
+
+    def _load(self, tmp_path, rows=5000):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir(exist_ok=True)
+        pd.DataFrame({"id": range(rows), "segment": ["a", "b"] * (rows // 2)}).to_csv(
+            data_dir / "accounts.csv", index=False
+        )
+        pd.DataFrame({"code": ["a", "b"]}).to_csv(data_dir / "codes.csv", index=False)
+        self.dataset_service = DatasetService(data_dir=str(data_dir))
+        self.dataset_service.load()
+        self.query_service = QueryService(self.dataset_service)
+
+    def test_plan_samples_large_datasets_on_request(self, tmp_path):
+        self._load(tmp_path)
+        service = SampleService(self.dataset_service, sample_rows=500)
+        sql = "SELECT COUNT(*) AS n FROM accounts JOIN codes ON segment = code"
+
+        assert service.plan(sql) == []
+        assert service.plan(sql, approximate=False) == []
+        (sample,) = service.plan(sql, approximate=True)
+
+        assert (sample.name, sample.rows, sample.population) == ("accounts", 500, 5000)
+        assert sample.fraction == 0.1
+        sampled = self.query_service.execute(sql, sampled=True)
+        exact = self.query_service.execute(sql)
+        assert sampled["n"][0] == 500
+        assert exact["n"][0] == 5000
+
+    def test_plan_samples_automatically_above_row_threshold(self, tmp_path):
+        self._load(tmp_path)
+        service = SampleService(self.dataset_service, sample_rows=500, auto_rows=1000)
+
+        assert [s.name for s in service.plan("SELECT * FROM accounts")] == ["accounts"]
+        assert service.plan("SELECT * FROM codes") == []
+        assert service.plan("SELECT * FROM accounts", approximate=False) == []
+
+    def test_sample_is_redrawn_for_a_new_dataset_version(self, tmp_path):
+        self._load(tmp_path)
+        service = SampleService(self.dataset_service, sample_rows=500)
+        assert [s.name for s in service.refresh()] == ["accounts"]
+
+        with open(tmp_path / "data" / "accounts.csv", "a") as f:
+            f.write("".join(f"{i},c\n" for i in range(5000, 10000)))
+        self.dataset_service.load()
+        (sample,) = service.plan("SELECT * FROM accounts", approximate=True)
+
+        assert sample.population == 10000
+        sampled = self.query_service.execute(
+            "SELECT COUNT(*) AS n FROM accounts WHERE segment = 'c'", sampled=True
+        )
+        assert 150 < sampled["n"][0] < 350
+
+    def test_describe_approximation_reports_size_scale_and_margin(self, tmp_path):
+        self._load(tmp_path)
+        service = SampleService(self.dataset_service, sample_rows=500)
+
+        text = describe_approximation(service.plan("SELECT * FROM accounts", True))
+
+        assert "APPROXIMATE" in text
+        assert "500 of 5,000 rows (10.00%)" in text
+        assert "multiply COUNT and SUM by 10" in text
+        assert "±4.4%" in text
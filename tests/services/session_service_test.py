@@ -52,3 +52,11 @@ class TestSessionService:
             str(exception_info.value)
             == f"Session not found, session_id provided: {session_id}"
         )
+
+    def test_delete_session_notifies_listeners(self):
+        deleted = []
+        self.session_service.add_delete_listener(deleted.append)
+        session_id = self.session_service.create_session()
+        self.session_service.delete_session(session_id)
+
+        assert deleted == [session_id]
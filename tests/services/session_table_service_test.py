@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from src.exceptions.query.invalid_query_exception import InvalidQueryException
+from src.exceptions.session.session_table_exception import SessionTableException
+from src.services.dataset_service import DatasetService
+from src.services.query_service import QueryService
+from src.services.session_table_service import SessionTableService
+
+
+class TestSessionTableService:
+    def _load(self, tmp_path, **limits):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        pd.DataFrame({"id": [1, 2, 3, 4], "amount": [10, 20, 30, 40]}).to_csv(
+            data_dir / "payments.csv", index=False
+        )
+        self.dataset_service = DatasetService(data_dir=str(data_dir))
+        self.dataset_service.load()
+        self.session_tables = SessionTableService(self.dataset_service, **limits)
+        self.query_service = QueryService(
+            self.dataset_service, session_tables=self.session_tables
+        )
+
+    def _save(self, session_id, name, sql):
+        df = self.query_service.execute(sql, session_id)
+        return self.session_tables.save(session_id, name, sql, df)
+
+    def test_saved_table_is_queryable_by_its_session_only(self, tmp_path):
+        self._load(tmp_path)
+        table = self._save("s-1", "Big", "SELECT * FROM payments WHERE amount > 15")
+
+        assert table.name == "big"
+        assert table.rows == 3
+        df = self.query_service.execute(
+            "SELECT COUNT(*) AS n FROM big JOIN payments USING (id)", "s-1"
+        )
+        assert df["n"].iloc[0] == 3
+        with pytest.raises(Exception):
+            self.query_service.execute("SELECT * FROM big", "s-2")
+
+    def test_other_sessions_schemas_cannot_be_read(self, tmp_path):
+        self._load(tmp_path)
+        self._save("s-1", "secret", "SELECT * FROM payments")
+        schema = self.session_tables.schema_for("s-1")
+        self._save("s-2", "mine", "SELECT 1 AS x")
+
+        for session_id in ("s-2", None):
+            with pytest.raises(InvalidQueryException):
+                self.query_service.execute(f"SELECT * FROM {schema}.secret", session_id)
+        with pytest.raises(InvalidQueryException):
+            self.query_service.stream_ndjson(f"SELECT * FROM {schema}.secret")
+        own = self.query_service.execute(f"SELECT * FROM {schema}.secret", "s-1")
+        assert len(own) == 4
+
+    def test_save_replaces_table_with_same_name(self, tmp_path):
+        self._load(tmp_path)
+        self._save("s-1", "cohort", "SELECT * FROM payments")
+        self._save("s-1", "cohort", "SELECT * FROM payments LIMIT 1")
+
+        assert [t.rows for t in self.session_tables.list_tables("s-1")] == [1]
+        assert "**cohort** (1 rows, 2 columns)" in self.session_tables.describe("s-1")
+
+    @pytest.mark.parametrize("name", ["payments", "bad-name", "1st"])
+    def test_save_rejects_invalid_names(self, tmp_path, name):
+        self._load(tmp_path)
+        with pytest.raises(SessionTableException):
+            self._save("s-1", name, "SELECT 1 AS x")
+
+    def test_save_enforces_table_and_size_limits(self, tmp_path):
+        self._load(tmp_path, max_tables_per_session=1, max_bytes_per_session=2**20)
+        self._save("s-1", "first", "SELECT 1 AS x")
+        with pytest.raises(SessionTableException, match="limit 1"):
+            self._save("s-1", "second", "SELECT 1 AS x")
+        with pytest.raises(SessionTableException, match="MB"):
+            self._save("s-2", "large", "SELECT range AS x FROM range(200000)")
+
+    def test_drop_session_removes_its_schema(self, tmp_path):
+        self._load(tmp_path)
+        self._save("s-1", "cohort", "SELECT * FROM payments")
+
+        self.session_tables.drop_session("s-1")
+
+        assert self.session_tables.search_path("s-1") is None
+        with self.dataset_service.cursor() as conn:
+            schemas = conn.execute(
+                "SELECT schema_name FROM information_schema.schemata"
+            ).fetchall()
+        assert ("session_s1",) not in schemas
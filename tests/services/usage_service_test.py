@@ -0,0 +1,47 @@
+import pytest
+from pydantic_ai.usage import RunUsage
+
+from src.exceptions.session.usage_budget_exceeded_exception import (
+    UsageBudgetExceededException,
+)
+from src.services.usage_service import UsageService
+
+
+class TestUsageService:
+    def setup_method(self):
+        self.usage_service = UsageService(
+            max_tokens_per_session=1000, max_requests_per_session=5
+        )
+
+    def test_record_aggregates_per_session_dataset_and_total(self):
+        run = RunUsage(input_tokens=300, output_tokens=50, requests=2, tool_calls=1)
+        self.usage_service.record("s1", run, ["sales", "sales"])
+        self.usage_service.record("s2", run, ["sales", "customers"])
+        self.usage_service.record("s1", RunUsage(input_tokens=10, requests=1))
+
+        assert self.usage_service.session_usage("s1").total_tokens == 360
+        assert self.usage_service.session_usage("s1").runs == 2
+        assert self.usage_service.by_dataset()["sales"].requests == 4
+        assert self.usage_service.totals().to_dict()["total_tokens"] == 710
+        assert [s for s, _ in self.usage_service.top_sessions(1)] == ["s1"]
+
+        self.usage_service.drop_session("s1")
+        assert self.usage_service.session_usage("s1").runs == 0
+        assert self.usage_service.totals().runs == 3
+
+    def test_limits_are_what_is_left_of_the_budget(self):
+        self.usage_service.record(
+            "s1", RunUsage(input_tokens=700, output_tokens=100, requests=3)
+        )
+
+        limits = self.usage_service.limits("s1")
+
+        assert limits.request_limit == 2
+        assert limits.total_tokens_limit == 200
+        assert UsageService().limits("s1").total_tokens_limit is None
+
+    def test_limits_raise_when_budget_is_spent(self):
+        self.usage_service.record("s1", RunUsage(input_tokens=10, requests=5))
+
+        with pytest.raises(UsageBudgetExceededException, match="5 model requests"):
+            self.usage_service.limits("s1")
@@ -1,8 +1,31 @@
+import asyncio
+
+import pandas as pd
 import pytest
+from fastapi import WebSocketDisconnect
 from unittest.mock import patch
+from pydantic_ai import AgentRunResultEvent
+from pydantic_ai.messages import (
+    ModelResponse,
+    PartDeltaEvent,
+    TextPart,
+    TextPartDelta,
+    ToolCallPart,
+)
+from pydantic_ai.models.function import FunctionModel
+from src.agent.agent import create_agent
+from src.agent.model_router import FAST_TIER, ModelRouter
+from src.exceptions.session.usage_budget_exceeded_exception import (
+    UsageBudgetExceededException,
+)
+from src.services.answer_cache_service import AnswerCacheService
 from src.services.dataset_service import DatasetService
+from src.services.query_service import QueryService
 from src.services.session_service import SessionService
+from src.services.session_table_service import SessionTableService
+from src.services.usage_service import UsageService
 from src.usecases.chat_usecase import ChatUseCase
+from src.usecases.infrastructure.event_collector import EventCollector
 
 
 class TestChatUsecase:
@@ -59,3 +82,393 @@ class TestChatUsecase:
         assert fake_websocket.sent[0]["type"] == "thinking"
         assert fake_websocket.sent[0]["content"] == "analysis"
         assert fake_websocket.sent[-1]["type"] == "done"
+
+    @pytest.mark.asyncio
+    @patch("src.usecases.chat_usecase.create_agent")
+    async def test_stream_agent_response_replays_cached_answer(
+        self, mock_create_agent, fake_websocket
+    ):
+        class FakeResult:
+            output = "Hello"
+
+            def all_messages(self):
+                return ["message"]
+
+        class FakeAgent:
+            runs = 0
+
+            async def run_stream_events(self, *args, **kwargs):
+                FakeAgent.runs += 1
+                yield PartDeltaEvent(index=0, delta=TextPartDelta(content_delta="Hi"))
+                yield AgentRunResultEvent(result=FakeResult())
+
+        mock_create_agent.return_value = FakeAgent()
+        chat_usecase = ChatUseCase(
+            self.dataset_service,
+            self.session_service,
+            answer_cache_service=AnswerCacheService(),
+        )
+        first = self.session_service.create_session()
+        second = self.session_service.create_session()
+
+        await chat_usecase.stream_agent_response(fake_websocket, first, "Hello?")
+        sent_first = list(fake_websocket.sent)
+        await chat_usecase.stream_agent_response(fake_websocket, second, "hello")
+
+        assert FakeAgent.runs == 1
+        assert fake_websocket.sent[len(sent_first) :] == sent_first
+        assert self.session_service.get_history(second) == ["message"]
+
+    @pytest.mark.asyncio
+    @patch("src.usecases.chat_usecase.create_agent")
+    async def test_cancelled_leader_of_a_shared_run_keeps_no_history(
+        self, mock_create_agent
+    ):
+        started, finish = asyncio.Event(), asyncio.Event()
+
+        class FakeResult:
+            output = "Hello"
+
+            def all_messages(self):
+                return ["message"]
+
+        class FakeAgent:
+            async def run_stream_events(self, *args, **kwargs):
+                started.set()
+                await finish.wait()
+                yield AgentRunResultEvent(result=FakeResult())
+
+        mock_create_agent.return_value = FakeAgent()
+        answer_cache = AnswerCacheService()
+        chat_usecase = ChatUseCase(
+            self.dataset_service,
+            self.session_service,
+            answer_cache_service=answer_cache,
+        )
+        leader = self.session_service.create_session()
+        follower = self.session_service.create_session()
+
+        leading = asyncio.create_task(
+            chat_usecase.stream_agent_response(EventCollector(), leader, "Hello?")
+        )
+        await asyncio.wait_for(started.wait(), 5)
+        following = asyncio.create_task(
+            chat_usecase.stream_agent_response(EventCollector(), follower, "Hello?")
+        )
+        _, waiters, _ = next(iter(answer_cache._in_flight.values()))
+        while len(waiters) < 2:
+            await asyncio.sleep(0.01)
+        leading.cancel()
+        await asyncio.gather(leading, return_exceptions=True)
+        finish.set()
+        await asyncio.wait_for(following, 5)
+
+        assert self.session_service.get_history(leader) == []
+        assert self.session_service.get_history(follower) == ["message"]
+        assert mock_create_agent.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch("src.usecases.chat_usecase.create_agent")
+    async def test_replayed_answer_recreates_saved_tables(
+        self, mock_create_agent, fake_websocket, tmp_path
+    ):
+        pd.DataFrame({"id": [1, 2, 3]}).to_csv(tmp_path / "ids.csv", index=False)
+        dataset_service = DatasetService(data_dir=str(tmp_path))
+        dataset_service.load()
+        session_tables = SessionTableService(dataset_service)
+        query_service = QueryService(dataset_service, session_tables=session_tables)
+
+        class FakeResult:
+            output = "Saved as table: big"
+
+            def all_messages(self):
+                return []
+
+        class FakeAgent:
+            async def run_stream_events(self, *args, deps, **kwargs):
+                sql = "SELECT * FROM ids WHERE id > 1"
+                df = deps.query_service.execute(sql, deps.session_id)
+                deps.session_tables.save(deps.session_id, "big", sql, df)
+                yield AgentRunResultEvent(result=FakeResult())
+
+        mock_create_agent.return_value = FakeAgent()
+        chat_usecase = ChatUseCase(
+            dataset_service,
+            self.session_service,
+            query_service=query_service,
+            answer_cache_service=AnswerCacheService(),
+            session_table_service=session_tables,
+        )
+        first = self.session_service.create_session()
+        second = self.session_service.create_session()
+
+        await chat_usecase.stream_agent_response(fake_websocket, first, "Save")
+        await chat_usecase.stream_agent_response(fake_websocket, second, "save")
+
+        df = query_service.execute("SELECT COUNT(*) AS n FROM big", second)
+        assert df["n"].iloc[0] == 2
+        assert [t.name for t in session_tables.list_tables(first)] == ["big"]
+
+    @pytest.mark.asyncio
+    @patch("src.usecases.chat_usecase.create_agent")
+    async def test_stream_agent_response_keeps_spaces_between_tokens(
+        self, mock_create_agent, fake_agent_factory
+    ):
+        mock_create_agent.return_value = fake_agent_factory(
+            ["<thinking>plan</thinking>\n", "The answer", " is", " 42."]
+        )
+        session_id = self.session_service.create_session()
+        collector = EventCollector()
+
+        await self.chat_usecase.stream_agent_response(collector, session_id, "q")
+
+        assert collector.answer == "The answer is 42."
+        assert collector.first_token_ms is not None
+
+    @pytest.mark.asyncio
+    async def test_ask_reports_usage_and_stops_at_session_budget(self, monkeypatch):
+        monkeypatch.setenv("MODEL", "test")
+        usage_service = UsageService(max_requests_per_session=3)
+        chat_usecase = ChatUseCase(
+            self.dataset_service, self.session_service, usage_service=usage_service
+        )
+        agent = create_agent("")
+
+        def looping_model(messages, info):
+            return ModelResponse(
+                parts=[
+                    ToolCallPart("query_data", {"sql": "SELECT 1", "description": "x"})
+                ]
+            )
+
+        session_id = self.session_service.create_session()
+        with (
+            patch("src.usecases.chat_usecase.create_agent", return_value=agent),
+            agent.override(model=FunctionModel(looping_model)),
+        ):
+            with pytest.raises(UsageBudgetExceededException):
+                await chat_usecase.ask(session_id, "loop forever")
+            with pytest.raises(UsageBudgetExceededException, match="3 model requests"):
+                await chat_usecase.ask(session_id, "again")
+
+        usage = usage_service.session_usage(session_id)
+        assert usage.requests == 3
+        assert usage.tool_calls == 3
+
+    @pytest.mark.asyncio
+    async def test_ask_returns_run_and_session_usage(self, monkeypatch):
+        monkeypatch.setenv("MODEL", "test")
+        usage_service = UsageService()
+        chat_usecase = ChatUseCase(
+            self.dataset_service, self.session_service, usage_service=usage_service
+        )
+        agent = create_agent("")
+        session_id = self.session_service.create_session()
+
+        with (
+            patch("src.usecases.chat_usecase.create_agent", return_value=agent),
+            agent.override(
+                model=FunctionModel(lambda m, i: ModelResponse(parts=[TextPart("ok")]))
+            ),
+        ):
+            await chat_usecase.ask(session_id, "first")
+            response = await chat_usecase.ask(session_id, "second")
+
+        assert response.usage.requests == 1
+        assert response.usage.total_tokens > 0
+        assert response.session_usage.runs == 2
+
+    @pytest.mark.asyncio
+    async def test_done_event_carries_usage(self, monkeypatch, fake_websocket):
+        monkeypatch.setenv("MODEL", "test")
+        chat_usecase = ChatUseCase(
+            self.dataset_service, self.session_service, usage_service=UsageService()
+        )
+        agent = create_agent("")
+
+        async def stream(messages, info):
+            yield "ok"
+
+        session_id = self.session_service.create_session()
+        with (
+            patch("src.usecases.chat_usecase.create_agent", return_value=agent),
+            agent.override(model=FunctionModel(stream_function=stream)),
+        ):
+            await chat_usecase.stream_agent_response(fake_websocket, session_id, "q")
+
+        done = fake_websocket.sent[-1]
+        assert done["type"] == "done"
+        assert done["usage"]["requests"] == 1
+        assert done["session_usage"]["runs"] == 1
+
+    @pytest.mark.asyncio
+    async def test_replayed_done_event_reports_the_replaying_session(self, monkeypatch):
+        monkeypatch.setenv("MODEL", "test")
+        usage_service = UsageService()
+        chat_usecase = ChatUseCase(
+            self.dataset_service,
+            self.session_service,
+            answer_cache_service=AnswerCacheService(),
+            usage_service=usage_service,
+        )
+        agent = create_agent("")
+
+        async def stream(messages, info):
+            yield "ok"
+
+        first, second = (self.session_service.create_session() for _ in range(2))
+        collectors = [EventCollector(), EventCollector()]
+        with (
+            patch("src.usecases.chat_usecase.create_agent", return_value=agent),
+            agent.override(model=FunctionModel(stream_function=stream)),
+        ):
+            await chat_usecase.stream_agent_response(collectors[0], first, "q")
+            await chat_usecase.stream_agent_response(collectors[1], second, "q")
+
+        run, replay = (collector.events[-1] for collector in collectors)
+        assert run["usage"]["requests"] == 1
+        assert replay["usage"]["requests"] == 0
+        assert replay["session_usage"]["runs"] == 1
+        assert usage_service.session_usage(first).requests == 1
+        assert usage_service.session_usage(second).runs == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_agent_response_keeps_first_chunk(self, monkeypatch):
+        monkeypatch.setenv("MODEL", "test")
+        agent = create_agent("")
+
+        async def stream(messages, info):
+            yield "Hello"
+            yield " world"
+
+        collector = EventCollector()
+        session_id = self.session_service.create_session()
+        with (
+            patch("src.usecases.chat_usecase.create_agent", return_value=agent),
+            agent.override(model=FunctionModel(stream_function=stream)),
+        ):
+            await self.chat_usecase.stream_agent_response(collector, session_id, "q")
+
+        assert collector.answer == "Hello world"
+
+    @pytest.mark.asyncio
+    async def test_ask_escalates_to_strong_model_after_tool_error(self, monkeypatch):
+        monkeypatch.setenv("MODEL", "test")
+        calls = []
+
+        def fast_model(messages, info):
+            calls.append("fast")
+            return ModelResponse(
+                parts=[ToolCallPart("query_data", {"sql": "SELEC", "description": "x"})]
+            )
+
+        def strong_model(messages, info):
+            calls.append("strong")
+            return ModelResponse(parts=[TextPart("fixed")])
+
+        router = ModelRouter(FunctionModel(fast_model), FunctionModel(strong_model))
+        chat_usecase = ChatUseCase(
+            self.dataset_service, self.session_service, model_router=router
+        )
+        agent = create_agent("")
+        session_id = self.session_service.create_session()
+
+        with patch("src.usecases.chat_usecase.create_agent", return_value=agent):
+            response = await chat_usecase.ask(session_id, "How many rows?")
+
+        assert response.answer == "fixed"
+        assert calls == ["fast", "strong"]
+        decision = router.recent()[0]
+        assert decision["tier"] == FAST_TIER
+        assert decision["final_tier"] == "strong"
+        assert decision["escalation"].startswith("query_data failed")
+        assert router.stats()[FAST_TIER].escalations == 1
+
+
+class ScriptedWebSocket:
+    """Client that sends queued messages and records what the server sends."""
+
+    def __init__(self):
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+
+    async def receive_json(self):
+        message = await self.incoming.get()
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+class TestChatUsecaseCancellation:
+    def setup_method(self):
+        self.session_service = SessionService()
+        self.usage_service = UsageService()
+        self.chat_usecase = ChatUseCase(
+            DatasetService(), self.session_service, usage_service=self.usage_service
+        )
+        self.started = asyncio.Event()
+        self.stream_cancelled = False
+
+    async def _blocking_stream(self, messages, info):
+        yield "Working"
+        self.started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.stream_cancelled = True
+            raise
+        yield "never"
+
+    async def _run(self, ws, session_id, after_start):
+        agent = create_agent("")
+        with (
+            patch("src.usecases.chat_usecase.create_agent", return_value=agent),
+            agent.override(model=FunctionModel(stream_function=self._blocking_stream)),
+        ):
+            reader = asyncio.create_task(self.chat_usecase.stream_ask(ws, session_id))
+            ws.incoming.put_nowait({"question": "long analysis"})
+            await asyncio.wait_for(self.started.wait(), 5)
+            await after_start()
+            return await asyncio.wait_for(
+                asyncio.gather(reader, return_exceptions=True), 5
+            )
+
+    @pytest.mark.asyncio
+    async def test_cancel_message_aborts_running_question(self, monkeypatch):
+        monkeypatch.setenv("MODEL", "test")
+        ws = ScriptedWebSocket()
+        session_id = self.session_service.create_session()
+
+        async def cancel_then_disconnect():
+            ws.incoming.put_nowait({"question": "second one"})
+            ws.incoming.put_nowait({"type": "cancel"})
+            while {"type": "cancelled"} not in ws.sent:
+                await asyncio.sleep(0.01)
+            ws.incoming.put_nowait(WebSocketDisconnect())
+
+        await self._run(ws, session_id, cancel_then_disconnect)
+
+        assert self.stream_cancelled
+        assert ws.sent[-2]["type"] == "error"
+        assert "already running" in ws.sent[-2]["content"]
+        assert ws.sent[-1] == {"type": "cancelled"}
+        assert self.session_service.get_history(session_id) == []
+        assert self.usage_service.session_usage(session_id).runs == 1
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_running_question(self, monkeypatch):
+        monkeypatch.setenv("MODEL", "test")
+        ws = ScriptedWebSocket()
+        session_id = self.session_service.create_session()
+
+        async def disconnect():
+            ws.incoming.put_nowait(WebSocketDisconnect())
+
+        (outcome,) = await self._run(ws, session_id, disconnect)
+
+        assert isinstance(outcome, WebSocketDisconnect)
+        assert self.stream_cancelled
+        assert not any(event["type"] == "done" for event in ws.sent)
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from src.services.connection_monitor import ConnectionMonitor
+from src.usecases.infrastructure.send_queue import SLOW_CLIENT_CLOSE_CODE, SendQueue
+
+
+class GatedWebSocket:
+    """Client that only takes events once `gate` is open."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.sent = []
+        self.close_code = None
+
+    async def send_json(self, data):
+        await self.gate.wait()
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+
+
+class TestSendQueue:
+    def setup_method(self):
+        self.ws = GatedWebSocket()
+        self.monitor = ConnectionMonitor(max_queued_events=3, stall_timeout_seconds=5)
+        self.queue = SendQueue(self.ws, self.monitor)
+
+    async def _start(self):
+        writer = asyncio.create_task(self.queue.run())
+        await asyncio.sleep(0)
+        return writer
+
+    async def _finish(self, writer):
+        self.ws.gate.set()
+        self.queue.close()
+        await asyncio.wait_for(writer, 1)
+
+    @pytest.mark.asyncio
+    async def test_merges_pending_deltas_and_keeps_other_events_in_order(self):
+        self.monitor.max_queued_events = 4
+        writer = await self._start()
+        await self.queue.send_json({"type": "text", "content": "a"})
+        await asyncio.sleep(0)  # the writer is now blocked sending "a"
+        for event in (
+            {"type": "text", "content": "b"},
+            {"type": "text", "content": "c"},
+            {"type": "table", "name": "result_1"},
+            {"type": "text", "content": "d"},
+            {"type": "done"},
+        ):
+            await self.queue.send_json(event)
+
+        await self._finish(writer)
+
+        assert self.ws.sent == [
+            {"type": "text", "content": "a"},
+            {"type": "text", "content": "bc"},
+            {"type": "table", "name": "result_1"},
+            {"type": "text", "content": "d"},
+            {"type": "done"},
+        ]
+        stats = self.monitor.stats()
+        assert stats.merged_events == 1
+        assert stats.max_queue_depth == 4
+        assert (stats.open_connections, stats.queued_events) == (0, 0)
+
+    @pytest.mark.asyncio
+    async def test_full_queue_makes_the_producer_wait(self):
+        writer = await self._start()
+        for i in range(4):  # one in flight, three queued
+            await self.queue.send_json({"type": "plot", "content": i})
+        producer = asyncio.create_task(
+            self.queue.send_json({"type": "plot", "content": 4})
+        )
+        await asyncio.sleep(0.01)
+        assert not producer.done()
+        assert self.monitor.stats().queued_events == 3
+
+        await self._finish(writer)
+        await producer
+        assert [e["content"] for e in self.ws.sent] == [0, 1, 2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_control_events_do_not_wait_for_room(self):
+        writer = await self._start()
+        for i in range(4):  # one in flight, three queued
+            await self.queue.send_json({"type": "plot", "content": i})
+
+        for _ in range(3):
+            self.queue.send_control({"type": "error", "content": "busy"})
+        self.queue.send_control({"type": "cancelled"})
+
+        assert self.queue.depth == 5
+        await self._finish(writer)
+        assert [e["type"] for e in self.ws.sent[-2:]] == ["error", "cancelled"]
+
+    @pytest.mark.asyncio
+    async def test_stuck_client_is_disconnected(self):
+        self.monitor.stall_timeout_seconds = 0.05
+        writer = await self._start()
+        await self.queue.send_json({"type": "table"})
+        await self.queue.send_json({"type": "done"})
+
+        await asyncio.wait_for(writer, 1)
+
+        assert self.ws.close_code == SLOW_CLIENT_CLOSE_CODE
+        stats = self.monitor.stats()
+        assert stats.slow_disconnects == 1
+        assert (stats.open_connections, stats.queued_events) == (0, 0)
+        with pytest.raises(WebSocketDisconnect):
+            await self.queue.send_json({"type": "plot"})